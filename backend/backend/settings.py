@@ -20,7 +20,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-^$+7m57u6d09ys2p36@gaigyx*_z@ep7+om$oj24gfb0)sejp2'
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY', 'django-insecure-^$+7m57u6d09ys2p36@gaigyx*_z@ep7+om$oj24gfb0)sejp2')
 
 # SECURITY WARNING: don't run with debug turned on in production!
 # DEBUG = True
@@ -80,21 +80,66 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-
-        
-        # 'ENGINE': 'django.db.backends.mysql',
-        # 'NAME': 'expense',     
-        # 'USER': 'root',   
-        # 'PASSWORD': 'root',
-        # 'HOST': '127.0.0.1',            
-        # 'PORT': '3306',             
-    }
+# DB_ENGINE picks the backend:
+#   sqlite      (default) single-node installs. WAL journal, IMMEDIATE
+#               transactions and a busy timeout so concurrent requests queue
+#               for the write lock instead of failing with "database is locked"
+#               (see `manage.py bench_db_concurrency`). DB_SQLITE_TUNED=0
+#               restores stock SQLite behaviour.
+#   postgresql  production. Persistent connections (DB_CONN_MAX_AGE seconds,
+#               health-checked) or, with DB_POOL_MAX_SIZE > 0, a psycopg 3
+#               connection pool per worker process (needs psycopg[pool]).
+#   mysql       the previous commented-out MySQL setup, env-driven.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+SQLITE_TUNED_OPTIONS = {
+    # Take the write lock at BEGIN: deferred transactions that later upgrade
+    # to a write fail immediately with SQLITE_BUSY, bypassing the timeout.
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': float(os.environ.get('DB_SQLITE_BUSY_TIMEOUT', 20)),
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'      # readers and the writer no longer block each other
+        'PRAGMA synchronous=NORMAL;'    # safe with WAL; fsync at checkpoints only
+        'PRAGMA temp_store=MEMORY;'
+        'PRAGMA cache_size=-32000;'     # 32 MB page cache per connection
+        'PRAGMA mmap_size=268435456;'   # 256 MB memory-mapped reads
+    ),
 }
 
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': SQLITE_TUNED_OPTIONS if os.environ.get('DB_SQLITE_TUNED', '1') == '1' else {},
+        }
+    }
+elif DB_ENGINE in ('postgresql', 'mysql'):
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 0))
+    DATABASES = {
+        'default': {
+            'ENGINE': f'django.db.backends.{DB_ENGINE}',
+            'NAME': os.environ.get('DB_NAME', 'expense'),
+            'USER': os.environ.get('DB_USER', 'root' if DB_ENGINE == 'mysql' else 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+            'PORT': os.environ.get('DB_PORT', '3306' if DB_ENGINE == 'mysql' else '5432'),
+            # Reuse connections across requests instead of reconnecting each time
+            # (Django rejects CONN_MAX_AGE together with a pool).
+            'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    if DB_ENGINE == 'postgresql' and DB_POOL_MAX_SIZE:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    raise ValueError(f"Unsupported DB_ENGINE '{DB_ENGINE}' (expected sqlite, postgresql or mysql)")
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -114,6 +159,70 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Userdetails passwords (money.passwords): PBKDF2-SHA256 at
+# PASSWORD_HASH_ITERATIONS. 300k is ~0.15 s per hash on one core. That
+# keeps a real user's login p99 under 1 s while four clients stuff
+# credentials at the same core (`manage.py bench_login`); 600k (the OWASP
+# recommendation) does not fit that budget on one core. Raise it where
+# workers have cores to spare. A change takes effect for each user on
+# their next login (their hash is redone).
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', 300_000))
+PASSWORD_HASHERS = [
+    'money.passwords.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Token-bucket limits on the credential endpoints (money.ratelimit):
+# "N/period" allows bursts of N and N per period sustained; "" disables.
+RATE_LIMITS = {
+    'login-ip': os.environ.get('RATE_LIMIT_LOGIN_IP', '30/min'),
+    'login-email': os.environ.get('RATE_LIMIT_LOGIN_EMAIL', '10/min'),
+    'otp-ip': os.environ.get('RATE_LIMIT_OTP_IP', '20/min'),
+    'otp-send-email': os.environ.get('RATE_LIMIT_OTP_SEND_EMAIL', '5/h'),
+    'otp-verify-email': os.environ.get('RATE_LIMIT_OTP_VERIFY_EMAIL', '10/h'),
+}
+# API authentication (money.authentication): login issues an HS256 token
+# valid for AUTH_TOKEN_TTL seconds; requests resolve their user through an
+# in-process LRU of AUTH_PRINCIPAL_CACHE_SIZE rows, each trusted for
+# AUTH_PRINCIPAL_CACHE_TTL seconds (the longest a password change or account
+# deletion in another worker takes to revoke tokens here).
+AUTH_TOKEN_SECRET = os.environ.get('AUTH_TOKEN_SECRET', SECRET_KEY)
+AUTH_TOKEN_TTL = int(os.environ.get('AUTH_TOKEN_TTL', 24 * 3600))
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.environ.get('AUTH_PRINCIPAL_CACHE_SIZE', 1024))
+AUTH_PRINCIPAL_CACHE_TTL = int(os.environ.get('AUTH_PRINCIPAL_CACHE_TTL', 60))
+# Expense writes resolve category names to ids through an in-process LRU
+# (money.categories) of this many entries.
+CATEGORY_CACHE_SIZE = int(os.environ.get('CATEGORY_CACHE_SIZE', 10000))
+# Currency conversion (money.fx): FxRate rows are quoted against
+# FX_BASE_CURRENCY (the ECB's reference rates are per euro). Each process
+# keeps the whole table in memory and reloads it after FX_CACHE_TTL seconds,
+# the longest `load_fx_rates` in another process takes to show up here.
+FX_BASE_CURRENCY = os.environ.get('FX_BASE_CURRENCY', 'EUR')
+FX_CACHE_TTL = int(os.environ.get('FX_CACHE_TTL', 300))
+# Budget alerts (money.budgets): an email goes out the first time a month's
+# spend reaches each of these percentages of a budget.
+BUDGET_ALERT_THRESHOLDS = tuple(
+    int(level) for level in os.environ.get('BUDGET_ALERT_THRESHOLDS', '80,100').split(',') if level.strip()
+)
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': ['money.authentication.TokenAuthentication'],
+    # Signed in, and only ever acting on your own user id.
+    'DEFAULT_PERMISSION_CLASSES': [
+        'rest_framework.permissions.IsAuthenticated',
+        'money.authentication.IsAccountOwner',
+    ],
+    # Missing exchange rates become a 400 instead of a 500.
+    'EXCEPTION_HANDLER': 'money.views.api_exception_handler',
+}
+
+# Reverse proxies in front of the app that append to X-Forwarded-For
+# (ingress + nginx sidecar = 2). 0 uses the socket address.
+RATE_LIMIT_PROXY_COUNT = int(os.environ.get('RATE_LIMIT_PROXY_COUNT', 0))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -131,6 +240,8 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+# `collectstatic` target; served by the nginx sidecar in production.
+STATIC_ROOT = os.environ.get('STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -138,14 +249,96 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Email Configuration
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
-EMAIL_HOST_USER = 'emailId'
-EMAIL_HOST_PASSWORD = 'password'
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', '1') == '1'
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', 'emailId')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', 'password')
+# A hung SMTP server fails the attempt (and it is retried) instead of
+# blocking the outbox sender forever.
+EMAIL_TIMEOUT = int(os.environ.get('EMAIL_TIMEOUT', 10))
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@yourexpensetracker.com')
+
+# Email outbox (money.outbox): requests queue rows; a sender thread in each
+# web process delivers them. Set to 0 and run `manage.py run_email_worker`
+# instead to send from one place. For local testing, `manage.py
+# run_smtp_sink` plus EMAIL_HOST=127.0.0.1 EMAIL_PORT=1025 EMAIL_USE_TLS=0.
+EMAIL_OUTBOX_THREADS = int(os.environ.get('EMAIL_OUTBOX_THREADS', 1))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+# First retry after this many seconds, doubling per attempt (capped at 1h).
+EMAIL_OUTBOX_RETRY_DELAY = int(os.environ.get('EMAIL_OUTBOX_RETRY_DELAY', 30))
+# How long a claimed message is reserved before another sender may retry it.
+EMAIL_OUTBOX_LEASE = int(os.environ.get('EMAIL_OUTBOX_LEASE', 120))
 # Use your Gmail App Password (not your normal Gmail password)
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
-DEBUG = True 
+
+# Background expense imports: threads in each web process that pick up new
+# import jobs. Set to 0 and run `manage.py run_import_worker` instead to
+# process the queue out of process.
+IMPORT_WORKER_THREADS = int(os.environ.get('IMPORT_WORKER_THREADS', 2))
+# How often (seconds) each pool looks for jobs left behind by a dead
+# worker or queued while no pool was running (money.jobs.start_sweeper).
+IMPORT_SWEEP_INTERVAL = float(os.environ.get('IMPORT_SWEEP_INTERVAL', 60))
+
+# PDF reports: rendered by a process pool into a content-addressed cache.
+# 0 processes renders inline in the requesting worker.
+REPORT_WORKER_PROCESSES = int(os.environ.get('REPORT_WORKER_PROCESSES', 2))
+REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR', os.path.join(BASE_DIR, 'report_cache'))
+
+# Downloads offloaded to the front proxy (money.sendfile): set
+# SENDFILE_HEADER=X-Accel-Redirect behind nginx and map each directory to the
+# internal location nginx serves it from. Empty streams through Django.
+SENDFILE_HEADER = os.environ.get('SENDFILE_HEADER', '')
+SENDFILE_ROOTS = {
+    REPORT_CACHE_DIR: os.environ.get('SENDFILE_REPORTS_URL', '/internal/reports/'),
+}
+
+# Rendered charts (PDF report + /api/charts/): an in-process LRU of this many
+# images in front of a disk cache keyed by the plotted data. Safe to clear.
+CHART_MEMORY_CACHE_SIZE = int(os.environ.get('CHART_MEMORY_CACHE_SIZE', 128))
+CHART_CACHE_DIR = os.environ.get('CHART_CACHE_DIR', os.path.join(BASE_DIR, 'chart_cache'))
+
+# Per-user API response cache (money.response_cache): profile, expense list
+# and summary responses plus each user's current data version, so unchanged
+# dashboards get a 304 without touching the database.
+# "locmem" is per process and only right for a single worker (runserver);
+# with several workers use "file" (one host) or "redis" (REDIS_URL, needs
+# the redis package) so write invalidations reach every worker.
+# "dummy" disables it.
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'locmem')
+RESPONSE_CACHE_BACKENDS = {
+    'locmem': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'money-responses'},
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('RESPONSE_CACHE_DIR', os.path.join(BASE_DIR, 'response_cache')),
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/0'),
+    },
+    'dummy': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'responses': {
+        **RESPONSE_CACHE_BACKENDS[RESPONSE_CACHE_BACKEND],
+        # Also bounds how long a missed invalidation can serve stale data.
+        'TIMEOUT': int(os.environ.get('RESPONSE_CACHE_TTL', 300)),
+        'KEY_PREFIX': 'money',
+    },
+}
+# Rate limit buckets: "locmem" limits per process (so per worker), "redis"
+# shares them so the limits hold across workers and pods.
+RATELIMIT_CACHE_BACKEND = os.environ.get('RATELIMIT_CACHE_BACKEND', 'locmem')
+CACHES['ratelimit'] = {
+    **RESPONSE_CACHE_BACKENDS[RATELIMIT_CACHE_BACKEND],
+    **({'LOCATION': 'money-ratelimit'} if RATELIMIT_CACHE_BACKEND == 'locmem' else {}),
+    'KEY_PREFIX': 'money',
+}
+# Expense lists longer than this are not cached (ETags still apply).
+RESPONSE_CACHE_MAX_ROWS = int(os.environ.get('RESPONSE_CACHE_MAX_ROWS', 2000))
+# runserver default; the production profile sets DJANGO_DEBUG=0.
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
@@ -0,0 +1,82 @@
+"""
+Production serving profile: ``gunicorn -c gunicorn.conf.py``.
+
+SERVER_MODE=wsgi (default) runs backend.wsgi on threaded sync workers;
+SERVER_MODE=asgi runs backend.asgi on uvicorn workers (needs uvicorn-worker).
+Every setting can be overridden from the environment, so the same image
+serves a laptop, a single VM and a Kubernetes pod.
+
+Signals: HUP re-forks every worker gracefully (new config, same preloaded
+code — ship code changes as a new image / rolling update); TERM stops
+accepting connections and lets in-flight requests finish within
+``graceful_timeout``.
+"""
+import os
+
+
+def _cpus():
+    # A pod's CPU limit (passed in by the deployment) wins over the node's
+    # core count, which says nothing about what this container may use.
+    if os.environ.get("GUNICORN_CPUS"):
+        return max(1, int(float(os.environ["GUNICORN_CPUS"])))
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # macOS
+        return os.cpu_count() or 1
+
+
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", _cpus() * 2 + 1))
+
+if SERVER_MODE == "asgi":
+    # Async views (status polling, probes, password reset) then share an
+    # event loop, but Django runs the sync DRF views one at a time per
+    # worker, so keep the worker count up.
+    wsgi_app = "backend.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+elif SERVER_MODE == "wsgi":
+    wsgi_app = "backend.wsgi:application"
+    # A few threads per worker keep it busy while a request waits on the
+    # database or the report pool.
+    worker_class = "gthread"
+    threads = int(os.environ.get("GUNICORN_THREADS", 4))
+else:
+    raise ValueError(f"Unsupported SERVER_MODE '{SERVER_MODE}' (expected wsgi or asgi)")
+
+# Import Django and the app once in the master; workers fork with it loaded.
+preload_app = True
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers now and then so slow leaks can't accumulate; the jitter
+# keeps them from all restarting at once.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+# Heartbeat files on tmpfs: a slow container disk must not look like a hung worker.
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+# Behind the ingress / nginx sidecar.
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "*")
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+# %(D)s: request time in microseconds, for per-pod latency from the logs.
+access_log_format = '%(h)s "%(r)s" %(s)s %(B)s %(D)sus pid=%(p)s'
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # Nothing should have connected during preload, but a connection made in
+    # the master must never be shared by forked workers.
+    from django.db import connections
+
+    connections.close_all()
+
+    # Threads don't survive fork(): start this worker's import-job sweeper here.
+    from money import jobs
+
+    jobs.start_sweeper()
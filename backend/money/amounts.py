@@ -0,0 +1,58 @@
+"""
+Money as integer minor units (hundredths: paise, cents).
+
+Amount columns have two decimal places, so every stored amount is an exact
+integer number of minor units. Analytics, rollup arithmetic and reports
+work on those ints, or on int64 NumPy arrays, where sums and means run at C
+speed and are still exact. ``Decimal`` appears only at the edges: model
+fields, and values that leave through the API.
+
+``minor_units("amount")`` makes the database do the conversion, so a
+``values_list`` never builds a ``Decimal`` per row.
+"""
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+MINOR_DIGITS = 2
+MINOR_PER_UNIT = 10 ** MINOR_DIGITS
+
+_QUANTUM = Decimal(1).scaleb(-MINOR_DIGITS)
+
+# How reports and charts print a currency. ReportLab's built-in fonts have
+# no ₹ glyph, hence "Rs"; anything else prints as its code.
+CURRENCY_LABELS = {"INR": "Rs", "USD": "$", "EUR": "€", "GBP": "£", "JPY": "¥"}
+
+
+def minor_units(field):
+    """An ORM expression for a money column as a BIGINT of minor units."""
+    # Round first: SQLite keeps decimals as REAL, where 0.29 * 100 is 28.999...
+    return Cast(Round(F(field) * MINOR_PER_UNIT), BigIntegerField())
+
+
+def to_minor(value):
+    """``Decimal("12.50")`` (or "12.5", 12) -> 1250, rounding half-even to the nearest minor unit."""
+    if isinstance(value, int):
+        return value * MINOR_PER_UNIT
+    return int(Decimal(value).quantize(_QUANTUM, rounding=ROUND_HALF_EVEN).scaleb(MINOR_DIGITS))
+
+
+def from_minor(minor):
+    """1250 -> ``Decimal("12.50")``. Fractional minor units (means) are rounded first."""
+    return Decimal(int(round(minor))).scaleb(-MINOR_DIGITS)
+
+
+def format_minor(minor):
+    """1234550 -> "12,345.50"."""
+    return f"{from_minor(minor):,.{MINOR_DIGITS}f}"
+
+
+def currency_label(currency):
+    """"INR" -> "Rs", "USD" -> "$", "CHF" -> "CHF"."""
+    return CURRENCY_LABELS.get(currency, currency)
+
+
+def format_money(minor, currency):
+    """(1234550, "INR") -> "Rs 12,345.50"."""
+    return f"{currency_label(currency)} {format_minor(minor)}"
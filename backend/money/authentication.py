@@ -0,0 +1,127 @@
+"""
+DRF authentication and permissions for the API.
+
+``TokenAuthentication`` checks an ``Authorization: Bearer <token>`` header
+(see money.tokens) and resolves the user through a small in-process LRU of
+principal rows, so an authenticated request normally costs no user query.
+An entry lives for AUTH_PRINCIPAL_CACHE_TTL seconds. It is dropped early
+when this process saves or deletes the user. A password change made in
+another process revokes old tokens once that TTL runs out.
+
+The principal holds only ``PRINCIPAL_FIELDS``. Other fields (data_version,
+budgets, profile) load from the database when a view reads them, so they are
+never stale.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.permissions import BasePermission
+
+from .models import Userdetails
+from .tokens import InvalidToken, decode_token, password_fingerprint
+
+PRINCIPAL_FIELDS = ("id", "FullName", "Email", "Password")
+
+# Request kwargs / body fields that name the account a request acts on.
+USER_KWARGS = ("user_id", "user_Id")
+USER_BODY_FIELD = "userId"
+
+_principals = OrderedDict()
+_principals_lock = threading.Lock()
+
+
+# ==========================================
+# 🔹 Principal cache
+# ==========================================
+def get_principal(user_id):
+    """A ``Userdetails`` with ``PRINCIPAL_FIELDS`` loaded, or ``None`` if there's no such user."""
+    now = time.monotonic()
+    with _principals_lock:
+        entry = _principals.get(user_id)
+        if entry is not None and entry[0] > now:
+            _principals.move_to_end(user_id)
+            values = entry[1]
+        else:
+            values = None
+
+    if values is None:
+        values = Userdetails.objects.filter(id=user_id).values_list(*PRINCIPAL_FIELDS).first()
+        if values is None:
+            return None
+        with _principals_lock:
+            _principals[user_id] = (now + settings.AUTH_PRINCIPAL_CACHE_TTL, values)
+            _principals.move_to_end(user_id)
+            while len(_principals) > settings.AUTH_PRINCIPAL_CACHE_SIZE:
+                _principals.popitem(last=False)
+
+    # A fresh instance per request; the remaining fields stay deferred.
+    return Userdetails.from_db(DEFAULT_DB_ALIAS, PRINCIPAL_FIELDS, values)
+
+
+def forget_principal(user_id):
+    with _principals_lock:
+        _principals.pop(user_id, None)
+
+
+def clear_principal_cache():
+    with _principals_lock:
+        _principals.clear()
+
+
+def authenticate_token(token):
+    """The user a token belongs to; raises ``AuthenticationFailed`` otherwise."""
+    try:
+        claims = decode_token(token)
+    except InvalidToken as e:
+        raise exceptions.AuthenticationFailed(str(e))
+    user = get_principal(claims.get("sub"))
+    if user is None:
+        raise exceptions.AuthenticationFailed("User not found.")
+    if claims.get("pwd") != password_fingerprint(user.Password):
+        raise exceptions.AuthenticationFailed("Token has been revoked.")
+    return user, claims
+
+
+# ==========================================
+# 🔹 DRF classes
+# ==========================================
+class TokenAuthentication(BaseAuthentication):
+    keyword = b"bearer"
+
+    def authenticate(self, request):
+        parts = get_authorization_header(request).split()
+        if not parts or parts[0].lower() != self.keyword:
+            return None
+        if len(parts) != 2:
+            raise exceptions.AuthenticationFailed("Invalid Authorization header.")
+        return authenticate_token(parts[1].decode("latin-1"))
+
+    def authenticate_header(self, request):
+        # Makes DRF answer unauthenticated requests with 401, not 403.
+        return 'Bearer realm="api"'
+
+
+def requested_user_id(request, kwargs):
+    """The account id a request names in its URL or body, or ``None``."""
+    for name in USER_KWARGS:
+        if name in kwargs:
+            return kwargs[name]
+    if request.method in ("POST", "PUT", "PATCH") and hasattr(request, "data"):
+        return request.data.get(USER_BODY_FIELD)
+    return None
+
+
+class IsAccountOwner(BasePermission):
+    """A request may only name the caller's own account (URL ``user_id`` or body ``userId``)."""
+    message = "You can only access your own account."
+
+    def has_permission(self, request, view):
+        claimed = requested_user_id(request, getattr(view, "kwargs", {}))
+        if claimed in (None, ""):
+            return True
+        return str(claimed) == str(getattr(request.user, "id", None))
@@ -0,0 +1,164 @@
+"""
+Batch expense mutations: many creates, updates and deletes in one call.
+
+Every operation is validated first. The valid ones are then applied in one
+transaction with set-based statements, whatever the batch size:
+
+- one locked read of the referenced expenses;
+- one category resolution (usually served from money.categories' cache);
+- ``bulk_create``, ``bulk_update`` and one ``DELETE ... WHERE id IN``;
+- one rollup write and one data-version bump.
+
+Operations look like ``{"op": "create", "title": ..., "amount": ...}``,
+``{"op": "update", "id": 7, "amount": "12.50"}`` (only the fields given
+change) or ``{"op": "delete", "id": 7}``. Fields are validated like bulk
+uploads (money.ingest.clean_entry); creates without a ``currency`` are in
+the user's.
+"""
+from django.db import transaction
+
+from . import ingest, rollups
+from .categories import resolve_categories
+from .models import Expense, normalize_category_name
+from .versions import bump_data_version
+
+MAX_OPERATIONS = 1000
+OPERATIONS = ("create", "update", "delete")
+NOT_APPLIED = {"batch": "Not applied because other operations in the batch failed"}
+
+
+class BatchError(ValueError):
+    """The request is not a usable list of operations."""
+
+
+def _parse_id(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return None
+
+
+def _validate(operations, home_currency):
+    """``(pending, errors)``: ``(index, op, id, values)`` tuples and ``{index: errors}``."""
+    pending, errors, seen = [], {}, set()
+    for index, operation in enumerate(operations):
+        op = operation.get("op") if isinstance(operation, dict) else None
+        if op not in OPERATIONS:
+            errors[index] = {"op": "Must be one of: " + ", ".join(OPERATIONS)}
+            continue
+
+        expense_id = None
+        if op != "create":
+            expense_id = _parse_id(operation.get("id"))
+            if expense_id is None:
+                errors[index] = {"id": "An expense id is required"}
+                continue
+            if expense_id in seen:
+                errors[index] = {"id": "Expense appears more than once in this batch"}
+                continue
+            seen.add(expense_id)
+
+        values = None
+        if op != "delete":
+            fields = {name: value for name, value in operation.items() if name not in ("op", "id")}
+            values, field_errors = ingest.clean_entry(
+                fields, partial=op == "update", home_currency=home_currency,
+            )
+            if field_errors:
+                errors[index] = field_errors
+                continue
+        pending.append((index, op, expense_id, values))
+    return pending, errors
+
+
+def apply_operations(user, operations, atomic=True):
+    """
+    Applies ``operations`` for ``user``. With ``atomic`` (the default) any
+    invalid operation means nothing is applied. Otherwise the valid ones go
+    through and the rest are reported.
+
+    Returns ``{"applied": bool, "results": [...], "created"/"updated"/"deleted": int}``
+    with one result per operation, in order.
+    """
+    if not isinstance(operations, list):
+        raise BatchError("'operations' must be a list")
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(f"At most {MAX_OPERATIONS} operations per batch")
+
+    pending, errors = _validate(operations, user.currency)
+    results = [
+        {"index": index, "op": operation.get("op") if isinstance(operation, dict) else None}
+        for index, operation in enumerate(operations)
+    ]
+    counts = {"created": 0, "updated": 0, "deleted": 0}
+
+    with transaction.atomic():
+        ids = [expense_id for _, op, expense_id, _ in pending if op != "create"]
+        existing = Expense.objects.select_for_update().filter(user_id=user.id).in_bulk(ids) if ids else {}
+        for index, op, expense_id, _ in pending:
+            if op != "create" and expense_id not in existing:
+                errors[index] = {"id": "Expense not found"}
+        pending = [item for item in pending if item[0] not in errors]
+
+        applied = not (atomic and errors)
+        if applied and pending:
+            _apply(user, pending, existing, results, counts)
+
+    for index, result in enumerate(results):
+        if index in errors:
+            result.update(success=False, errors=errors[index])
+        elif not applied:
+            result.update(success=False, errors=NOT_APPLIED)
+    return {"applied": applied, "results": results, **counts}
+
+
+def _apply(user, pending, existing, results, counts):
+    names = [values["category"] for _, _, _, values in pending if values and "category" in values]
+    category_ids = resolve_categories(user.id, names) if names else {}
+
+    def category_id(values):
+        return category_ids[normalize_category_name(values.pop("category"))[1]]
+
+    created, updated, update_fields, removed = [], [], set(), []
+    deltas = None
+    for index, op, expense_id, values in pending:
+        if op == "create":
+            created.append((index, Expense(
+                user_id=user.id,
+                category_id=category_id(values),
+                currency=values.pop("currency", user.currency),
+                **values,
+            )))
+            continue
+
+        expense = existing[expense_id]
+        # Debit the old bucket of both updates and deletes.
+        deltas = rollups.collect_deltas([rollups.rollup_entry(expense)], deltas, sign=-1)
+        if op == "delete":
+            removed.append((index, expense))
+            continue
+        if "category" in values:
+            expense.category_id = category_id(values)
+            update_fields.add("category")
+        for name, value in values.items():
+            setattr(expense, name, value)
+        update_fields.update(values)
+        updated.append((index, expense))
+
+    if created:
+        Expense.objects.bulk_create([expense for _, expense in created])
+    if updated and update_fields:
+        Expense.objects.bulk_update([expense for _, expense in updated], sorted(update_fields))
+    if removed:
+        Expense.objects.filter(id__in=[expense.id for _, expense in removed]).delete()
+
+    deltas = rollups.collect_deltas([e for _, e in created + updated], deltas)
+    if deltas:
+        rollups.apply_deltas(deltas)
+    bump_data_version(user.id)
+
+    for status, items in (("created", created), ("updated", updated), ("deleted", removed)):
+        counts[status] = len(items)
+        for index, expense in items:
+            results[index].update(success=True, id=expense.id)
@@ -0,0 +1,293 @@
+"""
+Monthly budgets and the running spend counters behind them.
+
+Every expense write already reduces to rollup deltas (money.rollups). The
+same deltas keep MonthlySpend current: one counter per user × month ×
+category, plus the month's overall total. Counters hold integer minor units
+of the user's currency; amounts in other currencies are converted at the
+expense date's rate (money.fx) as they are written. Checking a budget reads
+one row instead of summing the month's expenses, and the budget endpoint
+reads one row per category.
+
+When a write takes this month's spend past an alert threshold
+(``BUDGET_ALERT_THRESHOLDS``, percent of a budget), the user gets a single
+email through the outbox (money.outbox). It lists every budget the write
+pushed over a threshold. Each threshold fires once per budget and month.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import fx
+from .amounts import format_money, from_minor, minor_units, to_minor
+from .models import Budget, ExpenseDailyRollup, MonthlySpend, Userdetails
+from .outbox import queue_email
+from .upserts import save_rows
+
+
+# Tries at writing the counters; each conflict means another writer created a
+# counter this one meant to create.
+WRITE_ATTEMPTS = 3
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+# ==========================================
+# 🔹 Counters
+# ==========================================
+def _spend_changes(entries, homes):
+    """
+    Folds ``((user_id, date, category_id, currency), minor)`` pairs into
+    ``{(user_id, month, category_id or None): minor}`` in each user's currency.
+    """
+    entries = [(key, minor) for key, minor in entries if minor and key[0] in homes]
+    amounts = [minor for _, minor in entries]
+
+    # One conversion batch per reporting currency (usually just one).
+    foreign = defaultdict(list)
+    for index, ((user_id, _, _, currency), _) in enumerate(entries):
+        if currency != homes[user_id]:
+            foreign[homes[user_id]].append(index)
+    for home, indexes in foreign.items():
+        converted = fx.convert_minor(
+            [amounts[i] for i in indexes],
+            [entries[i][0][3] for i in indexes],
+            [entries[i][0][1] for i in indexes],
+            home,
+        )
+        for i, value in zip(indexes, converted.tolist()):
+            amounts[i] = value
+
+    changes = defaultdict(int)
+    for ((user_id, day, category_id, _), _), minor in zip(entries, amounts):
+        month = month_start(day)
+        changes[(user_id, month, None)] += minor
+        if category_id is not None:
+            changes[(user_id, month, category_id)] += minor
+    return changes
+
+
+def apply_spend(deltas):
+    """
+    Adds rollup ``deltas`` (money.rollups) to the monthly counters and queues
+    alerts for budgets they push over a threshold. Call inside the writer's
+    transaction.
+    """
+    user_ids = {key[0] for key in deltas}
+    users = {
+        row[0]: row
+        for row in Userdetails.objects.filter(id__in=user_ids)
+        .values_list("id", "currency", "monthly_budget", "Email")
+    }
+    changes = _spend_changes(
+        (((user_id, day, category_id, currency), minor)
+         for (user_id, day, category_id, _, currency), (minor, _) in deltas.items()),
+        {user_id: row[1] for user_id, row in users.items()},
+    )
+    if not changes:
+        return
+
+    for attempt in range(WRITE_ATTEMPTS):
+        try:
+            alerts = _write_counters(changes, users)
+            break
+        except IntegrityError:
+            # A concurrent writer created one of the new counters first. It
+            # is committed (and lockable) now, so the next attempt adds to it.
+            if attempt == WRITE_ATTEMPTS - 1:
+                raise
+    for user_id, crossed in alerts.items():
+        _queue_alert(users[user_id], crossed)
+
+
+def _locked_counters(changes):
+    return {
+        (row.user_id, row.month, row.category_id): row
+        for row in MonthlySpend.objects.select_for_update().filter(
+            user_id__in={key[0] for key in changes}, month__in={key[1] for key in changes}
+        )
+    }
+
+
+def _write_counters(changes, users):
+    existing = _locked_counters(changes)
+    to_create, to_update = [], []
+    for (user_id, month, category_id), minor in changes.items():
+        row = existing.get((user_id, month, category_id))
+        if row is None:
+            row = MonthlySpend(user_id=user_id, month=month, category_id=category_id, total=minor)
+            to_create.append(row)
+        else:
+            row.total += minor
+            to_update.append(row)
+
+    alerts = _check_thresholds(
+        [row for row in to_create + to_update if changes[(row.user_id, row.month, row.category_id)] > 0],
+        users,
+    )
+    if to_create:
+        # Nothing is written before this savepoint, so a conflict leaves no trace.
+        with transaction.atomic():
+            MonthlySpend.objects.bulk_create(to_create, batch_size=1000)
+    save_rows(MonthlySpend, to_update, ["total", "alerted"])
+    return alerts
+
+
+def rebuild_spend(user_ids=None):
+    """
+    Recomputes the counters from the daily rollups, e.g. after the user's
+    currency or exchange rates change. Alerts already sent stay sent.
+    Returns rows written.
+    """
+    with transaction.atomic():
+        counters = MonthlySpend.objects.all()
+        rollups = ExpenseDailyRollup.objects.all()
+        users = Userdetails.objects.all()
+        if user_ids is not None:
+            counters = counters.filter(user_id__in=user_ids)
+            rollups = rollups.filter(user_id__in=user_ids)
+            users = users.filter(id__in=user_ids)
+
+        alerted = {
+            (user_id, month, category_id): level
+            for user_id, month, category_id, level in counters.filter(alerted__gt=0)
+            .values_list("user_id", "month", "category_id", "alerted")
+        }
+        changes = _spend_changes(
+            (((user_id, day, category_id, currency), minor)
+             for user_id, day, category_id, currency, minor in rollups
+             .values_list("user_id", "date", "category_id", "currency", minor_units("total"))
+             .iterator(chunk_size=5000)),
+            dict(users.values_list("id", "currency")),
+        )
+        counters.delete()
+        MonthlySpend.objects.bulk_create(
+            [
+                MonthlySpend(user_id=user_id, month=month, category_id=category_id, total=total,
+                             alerted=alerted.get((user_id, month, category_id), 0))
+                for (user_id, month, category_id), total in changes.items()
+            ],
+            batch_size=1000,
+        )
+    return len(changes)
+
+
+# ==========================================
+# 🔹 Alerts
+# ==========================================
+def _threshold_reached(total, limit, alerted):
+    """The highest alert threshold ``total`` has reached above ``alerted``, or 0."""
+    if limit <= 0:
+        return 0
+    return max(
+        (level for level in settings.BUDGET_ALERT_THRESHOLDS if level > alerted and total * 100 >= level * limit),
+        default=0,
+    )
+
+
+def _check_thresholds(rows, users):
+    """
+    Marks this month's ``rows`` that crossed a threshold and returns
+    ``{user_id: [(category name or None, level, total, limit), ...]}``.
+    """
+    this_month = month_start(timezone.now().date())
+    rows = [row for row in rows if row.month == this_month]
+    category_rows = [row for row in rows if row.category_id is not None]
+    limits = {}
+    if category_rows:
+        limits = {
+            (user_id, category_id): (to_minor(amount), name)
+            for user_id, category_id, amount, name in Budget.objects.filter(
+                user_id__in={row.user_id for row in category_rows},
+                category_id__in={row.category_id for row in category_rows},
+            ).values_list("user_id", "category_id", "amount", "category__name")
+        }
+
+    alerts = defaultdict(list)
+    for row in rows:
+        if row.category_id is None:
+            limit, name = to_minor(users[row.user_id][2]), None
+        else:
+            limit, name = limits.get((row.user_id, row.category_id), (0, None))
+        level = _threshold_reached(row.total, limit, row.alerted)
+        if level:
+            row.alerted = level
+            alerts[row.user_id].append((name, level, row.total, limit))
+    return alerts
+
+
+def _queue_alert(user, crossed):
+    _, currency, _, email = user
+    lines = [
+        f"{'Overall' if name is None else name}: {level}% of your monthly budget reached "
+        f"({format_money(total, currency)} of {format_money(limit, currency)})."
+        for name, level, total, limit in crossed
+    ]
+    if len(crossed) == 1:
+        name, level, _, _ = crossed[0]
+        subject = f"Budget alert: {level}% of your {'overall' if name is None else name} budget"
+    else:
+        subject = f"Budget alerts for {timezone.now().date():%B %Y}"
+    queue_email([email], subject, "\n".join(lines))
+
+
+# ==========================================
+# 🔹 Reading
+# ==========================================
+def _utilization(limit, spent):
+    return {
+        "budget": from_minor(limit),
+        "spent": from_minor(spent),
+        "remaining": from_minor(limit - spent),
+        "utilization": round(spent * 100 / limit, 1) if limit > 0 else None,
+    }
+
+
+def budget_status(user, month=None):
+    """
+    Budgets against spend for ``month`` (any date in it; default this
+    month), from the counters alone: no Expense rows are read.
+    """
+    month = month_start(month or timezone.now().date())
+    profile = (
+        Userdetails.objects.filter(id=user.id)
+        .values("currency", "monthly_budget", "monthly_income", "savings_goal").get()
+    )
+    spent, names = {}, {}
+    for category_id, name, total in (
+        MonthlySpend.objects.filter(user_id=user.id, month=month).values_list("category_id", "category__name", "total")
+    ):
+        spent[category_id] = total
+        names[category_id] = name
+    limits = {}
+    for category_id, name, amount in (
+        Budget.objects.filter(user_id=user.id).values_list("category_id", "category__name", "amount")
+    ):
+        limits[category_id] = to_minor(amount)
+        names[category_id] = name
+
+    total = spent.get(None, 0)
+    savings = to_minor(profile["monthly_income"]) - total
+    return {
+        "month": f"{month:%Y-%m}",
+        "currency": profile["currency"],
+        "overall": _utilization(to_minor(profile["monthly_budget"]), total),
+        "categories": sorted(
+            (
+                {"category_id": category_id, "category": names[category_id],
+                 **_utilization(limits.get(category_id, 0), spent.get(category_id, 0))}
+                for category_id in (set(spent) | set(limits)) - {None}
+            ),
+            key=lambda item: item["spent"],
+            reverse=True,
+        ),
+        "savings": {
+            "goal": profile["savings_goal"],
+            "projected": from_minor(savings),
+            "on_track": savings >= to_minor(profile["savings_goal"]),
+        },
+    }
@@ -0,0 +1,131 @@
+"""
+Category resolution: expense writes name a category, this turns the name
+into an id.
+
+Names are matched case- and whitespace-insensitively through
+``Category.key`` ("food  & DINING" is "Food & Dining"), so spelling
+variants can't split one category into several aggregation buckets. A name
+resolves to the shared default category with that key, else to one of the
+user's own, which is created on first use.
+
+Resolved ids are kept in a per-process LRU of CATEGORY_CACHE_SIZE entries,
+so a write normally costs no category query. Only committed rows are
+cached: ids learned inside a transaction are stored once it commits, so a
+rolled-back insert can never leave a dangling id behind. Entries are
+dropped when a category is saved or deleted in this process. Categories
+are never renamed, so other processes only hold ids of deleted rows, which
+belong to deleted accounts.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Q
+
+from .models import Category, normalize_category_name
+
+DEFAULT_CATEGORY = "Other"
+
+_ids = OrderedDict()
+_ids_lock = threading.Lock()
+
+
+# ==========================================
+# 🔹 Cache
+# ==========================================
+def _cached(alias, owner_id, key):
+    with _ids_lock:
+        category_id = _ids.get((alias, owner_id, key))
+        if category_id is not None:
+            _ids.move_to_end((alias, owner_id, key))
+        return category_id
+
+
+def _remember(alias, rows):
+    """Caches ``(owner_id, key, id)`` rows once the current transaction commits."""
+    rows = list(rows)
+
+    def store():
+        with _ids_lock:
+            for owner_id, key, category_id in rows:
+                _ids[(alias, owner_id, key)] = category_id
+                _ids.move_to_end((alias, owner_id, key))
+            while len(_ids) > settings.CATEGORY_CACHE_SIZE:
+                _ids.popitem(last=False)
+
+    transaction.on_commit(store, using=alias)
+
+
+def forget_category(alias, owner_id, key):
+    with _ids_lock:
+        _ids.pop((alias, owner_id, key), None)
+
+
+def clear_category_cache():
+    with _ids_lock:
+        _ids.clear()
+
+
+def warm_default_categories(using=DEFAULT_DB_ALIAS):
+    _remember(using, Category.objects.using(using).filter(created_by__isnull=True)
+              .values_list("created_by_id", "key", "id"))
+
+
+# ==========================================
+# 🔹 Resolution
+# ==========================================
+def resolve_categories(user_id, names, using=DEFAULT_DB_ALIAS):
+    """
+    ``{key: id}`` for every name in ``names``, creating the user's custom
+    categories that don't exist yet (one bulk insert).
+    """
+    display = {}
+    for name in names:
+        name, key = normalize_category_name(name)
+        display.setdefault(key, name)
+
+    ids, missing = {}, []
+    for key in display:
+        category_id = _cached(using, None, key) or (user_id and _cached(using, user_id, key))
+        if category_id:
+            ids[key] = category_id
+        else:
+            missing.append(key)
+    if not missing:
+        return ids
+
+    def lookup(keys):
+        owners = Q(created_by__isnull=True) | Q(created_by_id=user_id) if user_id else Q(created_by__isnull=True)
+        rows = list(
+            Category.objects.using(using)
+            .filter(owners, key__in=keys)
+            .values_list("created_by_id", "key", "id")
+        )
+        # A default wins over a custom category of the same name.
+        for owner_id, key, category_id in sorted(rows, key=lambda row: row[0] is None):
+            ids[key] = category_id
+        _remember(using, rows)
+
+    lookup(missing)
+    new = [key for key in missing if key not in ids]
+    if new and user_id:
+        # ignore_conflicts: another request may create the same name meanwhile.
+        Category.objects.using(using).bulk_create(
+            [Category(name=display[key], key=key, is_custom=True, created_by_id=user_id) for key in new],
+            ignore_conflicts=True,
+        )
+        lookup(new)
+    return ids
+
+
+def resolve_category(user_id, name, using=DEFAULT_DB_ALIAS):
+    """The id of the category ``name`` means for ``user_id`` (created if needed)."""
+    name = name or DEFAULT_CATEGORY
+    return resolve_categories(user_id, [name], using)[normalize_category_name(name)[1]]
+
+
+def default_category_id(using=DEFAULT_DB_ALIAS):
+    """The shared "Other" category, or ``None`` if it hasn't been created."""
+    _, key = normalize_category_name(DEFAULT_CATEGORY)
+    return resolve_categories(None, [DEFAULT_CATEGORY], using).get(key)
@@ -0,0 +1,178 @@
+"""
+Chart rendering shared by the PDF report and the chart endpoint.
+
+Charts are drawn with matplotlib's object-oriented Figure API (no pyplot
+state machine), so renders are safe from any thread. Output is cached in
+memory (LRU) and on disk, keyed by a hash of the plotted data.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from matplotlib.figure import Figure
+
+from . import analytics
+from .amounts import MINOR_PER_UNIT, currency_label
+from .models import Expense
+
+# Bump whenever chart styling changes so cached images stop matching.
+CHART_STYLE_VERSION = 1
+
+KINDS = ("monthly", "weekly", "category", "payment")
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+# Weekly trend covers at most this many weeks, with a rolling mean overlay.
+WEEKLY_WINDOW = 52
+WEEKLY_ROLLING = 4
+
+# What a chart plots: parallel labels/values (values in major units of
+# ``currency`` from exact minor-unit totals, so they hash the same whether
+# summed from expenses or rollups).
+ChartData = namedtuple("ChartData", ["kind", "labels", "values", "currency"])
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+# ==========================================
+# 🔹 Chart data
+# ==========================================
+def chart_data(kind, series):
+    """Builds the plotted labels/values for ``kind``; ``None`` if there is nothing to plot."""
+    if kind == "monthly":
+        monthly = analytics.monthly_totals(series)
+        labels = [analytics.month_label(key) for key in monthly.keys]
+        values = monthly.totals.tolist()
+    elif kind == "weekly":
+        weekly = analytics.weekly_totals(series, fill_gaps=True)
+        keys, totals = weekly.keys[-WEEKLY_WINDOW:], weekly.totals[-WEEKLY_WINDOW:]
+        labels = [analytics.week_start(key).strftime("%d %b %y") for key in keys]
+        values = totals.tolist()
+    elif kind == "category":
+        pairs = [(name, total) for name, total, _ in analytics.category_totals(series) if name is not None]
+        labels, values = (list(col) for col in zip(*pairs)) if pairs else ([], [])
+    elif kind == "payment":
+        display = dict(Expense.PAYMENT_MODES)
+        pairs = [(display.get(mode, mode), total) for mode, total, _ in analytics.payment_mode_totals(series)]
+        labels, values = (list(col) for col in zip(*pairs)) if pairs else ([], [])
+    else:
+        raise ValueError(f"Unknown chart kind '{kind}'.")
+
+    if not labels:
+        return None
+    return ChartData(kind, labels, [value / MINOR_PER_UNIT for value in values], series.currency)
+
+
+# ==========================================
+# 🔹 Rendering
+# ==========================================
+def _bar(data, title, xlabel):
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    ax.bar(data.labels, data.values, color="#2874A6", width=0.6)
+    ax.set_title(title, fontsize=14, fontweight="bold", pad=15)
+    ax.set_xlabel(xlabel, fontsize=11)
+    ax.set_ylabel(f"Total ({currency_label(data.currency)})", fontsize=11)
+    ax.tick_params(axis="x", labelrotation=45)
+    ax.grid(axis="y", linestyle="--", alpha=0.6)
+    fig.tight_layout()
+    return fig
+
+
+def _weekly(data):
+    fig = Figure(figsize=(8, 4))
+    ax = fig.subplots()
+    positions = range(len(data.values))
+    ax.plot(positions, data.values, color="#2874A6", marker="o", markersize=3, label="Weekly total")
+    ax.plot(positions, analytics.rolling_mean(data.values, WEEKLY_ROLLING),
+            color="#E67E22", linestyle="--", label=f"{WEEKLY_ROLLING}-week average")
+    step = max(1, len(data.labels) // 12)
+    ax.set_xticks(list(positions)[::step], data.labels[::step], rotation=45)
+    ax.set_title("Weekly Expense Trend", fontsize=14, fontweight="bold", pad=15)
+    ax.set_ylabel(f"Total ({currency_label(data.currency)})", fontsize=11)
+    ax.grid(axis="y", linestyle="--", alpha=0.6)
+    ax.legend()
+    fig.tight_layout()
+    return fig
+
+
+def _pie(data):
+    fig = Figure(figsize=(5.5, 5.5))
+    ax = fig.subplots()
+    ax.pie(data.values, labels=data.labels, autopct="%1.1f%%", startangle=140)
+    ax.set_title("Expenses by Category", fontsize=13, fontweight="bold")
+    return fig
+
+
+def _draw(data):
+    if data.kind == "monthly":
+        return _bar(data, "Monthly Expense Trend", "Month")
+    if data.kind == "weekly":
+        return _weekly(data)
+    if data.kind == "category":
+        return _pie(data)
+    return _bar(data, "Expenses by Payment Mode", "Payment Mode")
+
+
+def render(data, fmt="png"):
+    buffer = BytesIO()
+    # No "Date" metadata, so identical data gives byte-identical SVGs.
+    metadata = {"Date": None} if fmt == "svg" else None
+    _draw(data).savefig(buffer, format=fmt, bbox_inches="tight", metadata=metadata)
+    return buffer.getvalue()
+
+
+# ==========================================
+# 🔹 LRU + disk cache
+# ==========================================
+def chart_key(data, fmt):
+    raw = json.dumps([CHART_STYLE_VERSION, fmt, data.kind, data.labels, data.values, data.currency])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _disk_path(key, fmt):
+    return Path(settings.CHART_CACHE_DIR) / key[:2] / f"{key}.{fmt}"
+
+
+def _remember(key, image):
+    with _memory_lock:
+        _memory[key] = image
+        _memory.move_to_end(key)
+        while len(_memory) > settings.CHART_MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def get_chart(data, fmt="png"):
+    """Returns ``(key, image_bytes)``, rendering only on a memory and disk miss."""
+    key = chart_key(data, fmt)
+    with _memory_lock:
+        image = _memory.get(key)
+        if image is not None:
+            _memory.move_to_end(key)
+            return key, image
+
+    path = _disk_path(key, fmt)
+    try:
+        image = path.read_bytes()
+    except FileNotFoundError:
+        image = render(data, fmt)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so other workers never read a half-written image.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".part")
+        with os.fdopen(fd, "wb") as out:
+            out.write(image)
+        os.replace(tmp, path)
+
+    _remember(key, image)
+    return key, image
+
+
+def clear_memory_cache():
+    with _memory_lock:
+        _memory.clear()
@@ -0,0 +1,188 @@
+"""
+Currency conversion from the local FxRate table.
+
+Rates are quoted against ``settings.FX_BASE_CURRENCY``: ``per_base`` units
+of a currency buy one unit of the base. Converting on a given day uses each
+currency's latest rate on or before that day, so weekends and holidays
+carry the previous fixing; days before a currency's first rate use that
+first rate.
+
+Each process holds the whole table in memory: per currency, a sorted
+``array("q")`` of day numbers (days since 1970-01-01, like ``datetime64[D]``)
+and a parallel ``array("d")`` of rates. One lookup bisects the day array.
+A batch goes through ``np.searchsorted`` over the same buffers, without a
+copy. Converting a series therefore costs one vectorized pass per currency
+in it and no queries. The table reloads after ``FX_CACHE_TTL`` seconds, or
+as soon as ``load_fx_rates`` runs in this process.
+"""
+import csv
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import Expense, FxRate
+from .upserts import upsert
+from .versions import bump_data_version
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+_table = None
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+class MissingRate(LookupError):
+    """There is no exchange rate for a currency."""
+
+
+def _rates():
+    """``{currency: (day numbers, per-base rates)}``, loaded with one query."""
+    global _table, _loaded_at
+    now = time.monotonic()
+    with _lock:
+        if _table is not None and now - _loaded_at < settings.FX_CACHE_TTL:
+            return _table
+
+    table = {}
+    rows = FxRate.objects.order_by("currency", "date").values_list("currency", "date", "per_base")
+    for currency, day, per_base in rows.iterator(chunk_size=5000):
+        days, rates = table.setdefault(currency, (array("q"), array("d")))
+        days.append(day.toordinal() - _EPOCH_ORDINAL)
+        rates.append(per_base)
+    with _lock:
+        _table, _loaded_at = table, now
+    return table
+
+
+def clear_rates_cache():
+    global _table
+    with _lock:
+        _table = None
+
+
+def has_rates(currency):
+    """Whether amounts in ``currency`` can be converted (the base always can)."""
+    return currency == settings.FX_BASE_CURRENCY or currency in _rates()
+
+
+def rate(currency, day):
+    """Units of ``currency`` per unit of the base currency on ``day``."""
+    if currency == settings.FX_BASE_CURRENCY:
+        return 1.0
+    try:
+        days, rates = _rates()[currency]
+    except KeyError:
+        raise MissingRate(f"No exchange rates for {currency}") from None
+    index = bisect_right(days, day.toordinal() - _EPOCH_ORDINAL) - 1
+    return rates[max(index, 0)]
+
+
+def _day_numbers(np, days):
+    if isinstance(days, np.ndarray):
+        return days.astype("datetime64[D]").astype(np.int64)
+    ordinals = np.fromiter(map(date.toordinal, days), dtype=np.int64, count=len(days))
+    return ordinals - _EPOCH_ORDINAL
+
+
+def _per_base(np, table, currency, day_numbers):
+    if currency == settings.FX_BASE_CURRENCY:
+        return np.ones(len(day_numbers))
+    try:
+        days, rates = table[currency]
+    except KeyError:
+        raise MissingRate(f"No exchange rates for {currency}") from None
+    index = np.searchsorted(np.frombuffer(days, dtype=np.int64), day_numbers, side="right") - 1
+    return np.frombuffer(rates, dtype=np.float64)[np.maximum(index, 0)]
+
+
+def convert_minor(amounts, currencies, days, to):
+    """
+    Converts parallel sequences of minor-unit amounts, their currencies and
+    their dates (``date`` objects or a ``datetime64`` array) into ``to``.
+    Returns an int64 array, each amount rounded to the nearest minor unit.
+    Amounts already in ``to`` are passed through untouched.
+    """
+    # NumPy loads on first use, so API-only workers never pay for it.
+    import numpy as np
+
+    converted = np.array(amounts, dtype=np.int64)
+    codes = np.asarray(currencies, dtype=object)
+    foreign = codes != to
+    if not foreign.any():
+        return converted
+
+    table = _rates()
+    day_numbers = _day_numbers(np, days)
+    for currency in set(codes[foreign].tolist()):
+        mask = codes == currency
+        slot_days = day_numbers[mask]
+        factor = _per_base(np, table, to, slot_days) / _per_base(np, table, currency, slot_days)
+        converted[mask] = np.rint(converted[mask] * factor).astype(np.int64)
+    return converted
+
+
+# ==========================================
+# 🔹 Loading rates
+# ==========================================
+def read_rates(file):
+    """
+    Yields ``(currency, date, per_base)`` from CSV text, either one rate per
+    row (``date,currency,rate`` columns) or the ECB's wide layout: a date
+    column followed by one column per currency, with blanks or "N/A" where
+    there was no fixing.
+    """
+    reader = csv.reader(file)
+    header = [name.strip() for name in next(reader, [])]
+    columns = [name.lower() for name in header]
+    if {"date", "currency", "rate"} <= set(columns):
+        day_at, currency_at, rate_at = (columns.index(name) for name in ("date", "currency", "rate"))
+        for row in reader:
+            if row:
+                yield row[currency_at].strip().upper(), date.fromisoformat(row[day_at].strip()), float(row[rate_at])
+        return
+
+    currencies = [name.upper() for name in header[1:]]
+    for row in reader:
+        if not row:
+            continue
+        day = date.fromisoformat(row[0].strip())
+        for currency, value in zip(currencies, row[1:]):
+            value = value.strip()
+            if currency and value and value != "N/A":
+                yield currency, day, float(value)
+
+
+def store_rates(rates, batch_size=1000):
+    """
+    Upserts ``(currency, date, per_base)`` rates and returns how many were
+    written. Cached data and budget counters of users with expenses in a
+    currency other than their own are refreshed, and this process's table is
+    reloaded on next use.
+    """
+    rows = [
+        FxRate(currency=currency, date=day, per_base=per_base)
+        for currency, day, per_base in rates
+        if currency != settings.FX_BASE_CURRENCY
+    ]
+    with transaction.atomic():
+        upsert(FxRate, rows, ["currency", "date"], ["per_base"], batch_size=batch_size)
+        user_ids = list(
+            Expense.objects.exclude(currency=F("user__currency"))
+            .values_list("user_id", flat=True).distinct().order_by()
+        )
+        for user_id in user_ids:
+            bump_data_version(user_id)
+        clear_rates_cache()
+        if user_ids:
+            # Their budget counters were converted at the old rates.
+            from .budgets import rebuild_spend
+            rebuild_spend(user_ids)
+    # Again, so nothing read inside the transaction outlives it.
+    clear_rates_cache()
+    return len(rows)
@@ -0,0 +1,196 @@
+import csv
+import io
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from .ingest import MalformedUpload, iter_json_entries
+
+MAPPABLE_FIELDS = ("title", "amount", "category", "payment_mode", "note", "expense_date")
+
+# Per-format column mapping (expense field -> source column), constant values
+# for fields the source does not carry, and the default date format.
+FORMAT_PRESETS = {
+    "csv": {"mapping": {}, "defaults": {}, "date_format": ""},
+    "xlsx": {"mapping": {}, "defaults": {}, "date_format": ""},
+    "bank": {
+        "mapping": {
+            "expense_date": "Date",
+            "title": "Description",
+            "amount": "Debit",
+            "note": "Reference",
+        },
+        "defaults": {"payment_mode": "BANK_TRANSFER", "category": "Other"},
+        "date_format": "%d/%m/%Y",
+    },
+}
+
+# Thousands separators, whitespace and currency markers around an amount.
+_AMOUNT_JUNK = re.compile(r"[,\s₹$€£]|Rs\.?|INR", re.IGNORECASE)
+
+
+class _CountingReader(io.RawIOBase):
+    """Wraps a binary file and counts the bytes consumed (for progress)."""
+
+    def __init__(self, file):
+        self.file = file
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.file.read(len(buffer))
+        if isinstance(data, str):
+            data = data.encode()
+        size = len(data)
+        buffer[:size] = data
+        self.bytes_read += size
+        return size
+
+
+def _file_size(file):
+    size = getattr(file, "size", None)
+    if size is None:
+        try:
+            position = file.tell()
+            size = file.seek(0, io.SEEK_END)
+            file.seek(position)
+        except (AttributeError, OSError):
+            size = 0
+    return size or 0
+
+
+def _parse_amount(value):
+    if value is None or isinstance(value, (int, float, Decimal)):
+        return value
+    cleaned = _AMOUNT_JUNK.sub("", str(value))
+    if not cleaned:
+        return None
+    try:
+        return Decimal(cleaned)
+    except InvalidOperation:
+        return value  # left for clean_entry to report
+
+
+def _parse_date(value, date_format):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date) or value in (None, ""):
+        return value or None
+    if date_format:
+        try:
+            return datetime.strptime(str(value).strip(), date_format).date()
+        except ValueError:
+            return value  # left for clean_entry to report
+    return str(value).strip()
+
+
+class ImportSource:
+    """
+    A tabular upload mapped onto expense entries. ``entries()`` yields dicts
+    for ``ingest.ingest_expenses``; ``progress()`` estimates completion (0-100).
+    """
+
+    def __init__(self, file, fmt, mapping=None, date_format=""):
+        if fmt not in FORMAT_PRESETS and fmt != "json":
+            raise MalformedUpload(f"Unsupported import format '{fmt}'")
+        preset = FORMAT_PRESETS.get(fmt, {"mapping": {}, "defaults": {}, "date_format": ""})
+
+        unknown = set(mapping or {}) - set(MAPPABLE_FIELDS)
+        if unknown:
+            raise MalformedUpload(f"Cannot map unknown field(s): {', '.join(sorted(unknown))}")
+
+        self.format = fmt
+        self.mapping = {**preset["mapping"], **(mapping or {})}
+        self.required = set(mapping or {}) | set(preset["mapping"])
+        self.defaults = preset["defaults"]
+        self.date_format = date_format or preset["date_format"]
+        self.skip_blank_amount = fmt == "bank"
+        self.total_bytes = _file_size(file)
+        self.reader = _CountingReader(file)
+        self.total_rows = 0
+        self.rows_read = 0
+
+    def progress(self):
+        if self.total_rows:
+            return min(100.0, 100.0 * self.rows_read / self.total_rows)
+        if self.total_bytes:
+            return min(100.0, 100.0 * self.reader.bytes_read / self.total_bytes)
+        return 0.0
+
+    def entries(self):
+        if self.format == "json":
+            for entry in iter_json_entries(self.reader):
+                self.rows_read += 1
+                yield entry
+            return
+
+        rows = self._xlsx_rows() if self.format == "xlsx" else self._csv_rows()
+        header = next(rows, None)
+        if not header:
+            raise MalformedUpload("The uploaded file has no header row")
+        columns = self._resolve_columns(header)
+
+        for row in rows:
+            self.rows_read += 1
+            if not any(cell not in (None, "") for cell in row):
+                continue
+            entry = dict(self.defaults)
+            for field, index in columns.items():
+                value = row[index] if index < len(row) else None
+                if isinstance(value, str):
+                    value = value.strip()
+                if value not in (None, ""):
+                    entry[field] = value
+
+            entry["amount"] = _parse_amount(entry.get("amount"))
+            if entry["amount"] is None and self.skip_blank_amount:
+                continue  # credits / balance lines on a bank statement
+            if self.skip_blank_amount and isinstance(entry["amount"], Decimal):
+                entry["amount"] = abs(entry["amount"])
+            if isinstance(entry.get("payment_mode"), str):
+                entry["payment_mode"] = entry["payment_mode"].upper().replace(" ", "_")
+            if "expense_date" in entry:
+                entry["expense_date"] = _parse_date(entry["expense_date"], self.date_format)
+            yield entry
+
+    def _resolve_columns(self, header):
+        positions = {
+            str(name).strip().lower(): index
+            for index, name in enumerate(header) if name is not None
+        }
+        columns = {}
+        for field in MAPPABLE_FIELDS:
+            source = self.mapping.get(field, field)
+            index = positions.get(str(source).strip().lower())
+            if index is not None:
+                columns[field] = index
+            elif field in self.required:
+                raise MalformedUpload(f"Column '{source}' not found in upload")
+        if "amount" not in columns:
+            raise MalformedUpload("No amount column found in upload")
+        return columns
+
+    def _csv_rows(self):
+        text = io.TextIOWrapper(io.BufferedReader(self.reader), encoding="utf-8-sig", newline="")
+        try:
+            yield from csv.reader(text)
+        except (csv.Error, UnicodeDecodeError) as e:
+            raise MalformedUpload(f"Invalid CSV: {e}")
+
+    def _xlsx_rows(self):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise MalformedUpload("XLSX import requires the 'openpyxl' package")
+        try:
+            workbook = load_workbook(self.reader.file, read_only=True, data_only=True)
+        except Exception as e:
+            raise MalformedUpload(f"Invalid XLSX file: {e}")
+        try:
+            sheet = workbook.active
+            self.total_rows = max((sheet.max_row or 1) - 1, 0)
+            yield from sheet.iter_rows(values_only=True)
+        finally:
+            workbook.close()
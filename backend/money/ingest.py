@@ -0,0 +1,284 @@
+import codecs
+import json
+from contextlib import nullcontext
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from . import fx
+from .categories import resolve_categories
+from .models import Category, Expense, normalize_category_name
+from . import rollups
+from .versions import bump_data_version
+
+READ_CHUNK_SIZE = 64 * 1024
+# Longest single JSON value (one expense, or a skipped key's value) read
+# before giving up; without it invalid JSON is buffered to the end.
+MAX_VALUE_SIZE = 1024 * 1024
+BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 100
+
+_FIELDS = {name: Expense._meta.get_field(name) for name in (
+    "title", "amount", "payment_mode", "note", "expense_date",
+)}
+_CATEGORY_NAME = Category._meta.get_field("name")
+
+ENTRY_DEFAULTS = {
+    "title": "Miscellaneous",
+    "amount": 0,
+    "category": "Other",
+    "payment_mode": "CASH",
+    "note": "",
+}
+
+
+class MalformedUpload(ValueError):
+    """The upload cannot be read as a list of expenses."""
+
+
+# ==========================================
+# 🔹 Streaming JSON reader
+# ==========================================
+class _JSONStream:
+    """Incrementally decodes JSON values from a binary file without loading it."""
+
+    def __init__(self, file, chunk_size=READ_CHUNK_SIZE, max_value_size=MAX_VALUE_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.max_value_size = max_value_size
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(b"", final=True)
+        else:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            self.buffer = self.buffer[self.pos:] + self.decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character (``""`` at EOF)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise MalformedUpload(f"Expected '{char}' in JSON upload")
+        self.pos += 1
+
+    def _fill_value(self):
+        if len(self.buffer) - self.pos > self.max_value_size:
+            raise MalformedUpload(f"JSON value in upload is invalid or longer than {self.max_value_size} characters")
+        return self._fill()
+
+    def value(self):
+        """Decodes one complete JSON value, reading more input as needed."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill_value():
+                    continue
+                raise MalformedUpload("Invalid JSON in upload")
+            # A value ending exactly at the buffer edge may be truncated (e.g. a number).
+            if end == len(self.buffer) and self._fill_value():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_entries(file):
+    """
+    Yields the entries of a JSON upload one at a time. Accepts a top-level
+    list or an object with an ``"expenses"`` list, like the old endpoint.
+    """
+    stream = _JSONStream(file)
+    start = stream.peek()
+
+    if start == "{":
+        stream.expect("{")
+        while True:
+            if stream.peek() == "}":
+                raise MalformedUpload("JSON object has no 'expenses' list")
+            key = stream.value()
+            stream.expect(":")
+            if key == "expenses" and stream.peek() == "[":
+                break
+            stream.value()
+            if stream.peek() == ",":
+                stream.expect(",")
+    elif start != "[":
+        raise MalformedUpload("Upload must be a JSON list of expenses")
+
+    stream.expect("[")
+    if stream.peek() == "]":
+        return
+    while True:
+        yield stream.value()
+        if stream.peek() == "]":
+            return
+        stream.expect(",")
+
+
+# ==========================================
+# 🔹 Validation
+# ==========================================
+def clean_currency(value, home_currency=None):
+    """
+    "usd " -> "USD". Raises ``ValidationError`` unless the code is
+    ``home_currency`` or money.fx can convert it into ``home_currency``
+    (which needs rates for both, unless one is the base currency).
+    """
+    code = str(value).strip().upper()
+    if code == home_currency:
+        return code
+    if not fx.has_rates(code):
+        raise ValidationError(f"No exchange rates for currency '{code}'")
+    if home_currency and not fx.has_rates(home_currency):
+        raise ValidationError(f"No exchange rates for your currency '{home_currency}'")
+    return code
+
+
+def clean_entry(entry, partial=False, home_currency=None):
+    """
+    Validates one upload entry. Returns ``(values, errors)``: the cleaned
+    field values (category as a normalised name) or a field -> message dict.
+    With ``partial`` only the fields present are cleaned (no defaults).
+    ``currency`` is only set when the entry names one (see clean_currency);
+    writers default it to the user's.
+    """
+    if not isinstance(entry, dict):
+        return None, {"entry": "Each expense must be a JSON object"}
+
+    values, errors = {}, {}
+    for name, field in _FIELDS.items():
+        if partial and name not in entry:
+            continue
+        raw = entry.get(name)
+        if raw is None:
+            raw = ENTRY_DEFAULTS.get(name)
+        if raw is None and name == "expense_date":
+            raw = timezone.now().date()
+        if isinstance(raw, float):
+            # Use the shortest repr (12.5 -> "12.5"), not the binary expansion.
+            raw = str(raw)
+        try:
+            values[name] = field.clean(raw, None)
+        except ValidationError as e:
+            errors[name] = "; ".join(e.messages)
+
+    if entry.get("currency"):
+        try:
+            values["currency"] = clean_currency(entry["currency"], home_currency)
+        except ValidationError as e:
+            errors["currency"] = "; ".join(e.messages)
+
+    if partial and "category" not in entry:
+        return (None, errors) if errors else (values, None)
+    category = entry.get("category") or ENTRY_DEFAULTS["category"]
+    try:
+        values["category"] = _CATEGORY_NAME.clean(str(category).strip(), None)
+    except ValidationError as e:
+        errors["category"] = "; ".join(e.messages)
+
+    return (None, errors) if errors else (values, None)
+
+
+# ==========================================
+# 🔹 Batched writer
+# ==========================================
+def ingest_expenses(user, entries, batch_size=BATCH_SIZE, atomic=True, on_progress=None):
+    """
+    Validates and inserts ``entries`` for ``user``.
+
+    Category names are resolved once per ingest through money.categories
+    (cached ids, plus one query and one bulk insert for new names per batch)
+    and expenses are written with chunked ``bulk_create``. Invalid rows are skipped and reported by index.
+
+    With ``atomic`` (the default) everything happens in one transaction.
+    Background imports pass ``atomic=False`` so each batch commits on its own
+    and ``on_progress(processed_rows, created, error_count, errors)`` reports
+    visible progress. It runs inside the batch's transaction; raising from
+    it undoes the batch.
+    Returns ``{"created": int, "error_count": int, "errors": [...]}``.
+    """
+    created = 0
+    processed = 0
+    error_count = 0
+    errors = []
+    deltas = None
+    batch = []
+
+    with transaction.atomic() if atomic else nullcontext():
+        category_ids = {}
+        home_currency = user.currency
+
+        def flush():
+            nonlocal created, deltas
+            with transaction.atomic():
+                new = {}
+                for values in batch:
+                    name, values["category"] = normalize_category_name(values["category"])
+                    if values["category"] not in category_ids:
+                        new.setdefault(values["category"], name)
+                if new:
+                    category_ids.update(resolve_categories(user.id, new.values()))
+                objs = Expense.objects.bulk_create(
+                    [
+                        Expense(
+                            user_id=user.id,
+                            category_id=category_ids[values.pop("category")],
+                            currency=values.pop("currency", home_currency),
+                            **values,
+                        )
+                        for values in batch
+                    ],
+                    batch_size=batch_size,
+                )
+                if atomic:
+                    deltas = rollups.collect_deltas(objs, deltas)
+                else:
+                    rollups.apply_deltas(rollups.collect_deltas(objs))
+                    bump_data_version(user.id)
+                created += len(objs)
+                if on_progress:
+                    # Same transaction: recorded progress is exactly what got committed.
+                    on_progress(processed, created, error_count, errors)
+            batch.clear()
+
+        for index, entry in enumerate(entries):
+            processed = index + 1
+            values, row_errors = clean_entry(entry, home_currency=home_currency)
+            if row_errors:
+                error_count += 1
+                if len(errors) < MAX_REPORTED_ERRORS:
+                    errors.append({"row": index, "errors": row_errors})
+                continue
+            batch.append(values)
+            if len(batch) >= batch_size:
+                flush()
+
+        if batch:
+            flush()
+        if deltas:
+            rollups.apply_deltas(deltas)
+            bump_data_version(user.id)
+
+    return {"created": created, "error_count": error_count, "errors": errors}
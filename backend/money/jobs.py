@@ -0,0 +1,196 @@
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import ingest
+from .importers import ImportSource
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+# A RUNNING job whose worker has committed nothing for this long is reclaimed.
+STALE_JOB_AFTER = timedelta(minutes=10)
+
+_executor = None
+_sweep_timer = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.IMPORT_WORKER_THREADS, thread_name_prefix="import-job"
+        )
+    return _executor
+
+
+def enqueue_import(job):
+    """
+    Hands a freshly created job to the in-process worker pool once the
+    request's transaction commits. With ``IMPORT_WORKER_THREADS = 0`` jobs
+    simply wait in the table for ``manage.py run_import_worker``.
+    """
+    if settings.IMPORT_WORKER_THREADS:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.id))
+
+
+def _run_in_thread(job_id):
+    try:
+        process_next_job(job_id)
+    except Exception:
+        logger.exception("Import job %s crashed", job_id)
+    finally:
+        connections.close_all()
+
+
+# ==========================================
+# 🔹 Sweeping up orphaned jobs
+# ==========================================
+def start_sweeper():
+    """
+    Makes this process's pool look for jobs nobody is running every
+    ``IMPORT_SWEEP_INTERVAL`` seconds: jobs queued while no pool was up and
+    jobs whose worker died (they resume where it stopped). gunicorn's
+    post_fork hook calls this in every worker.
+    """
+    if settings.IMPORT_WORKER_THREADS and settings.IMPORT_SWEEP_INTERVAL:
+        # Staggered, so freshly forked workers don't all sweep at once.
+        _schedule_sweep(random.uniform(0, settings.IMPORT_SWEEP_INTERVAL))
+
+
+def _schedule_sweep(delay):
+    global _sweep_timer
+    _sweep_timer = threading.Timer(delay, _sweep)
+    _sweep_timer.daemon = True
+    _sweep_timer.start()
+
+
+def _sweep():
+    try:
+        if ImportJob.objects.filter(_claimable()).exists():
+            _get_executor().submit(_drain_in_thread)
+    except Exception:
+        logger.exception("Import job sweep failed")
+    finally:
+        connections.close_all()
+        _schedule_sweep(settings.IMPORT_SWEEP_INTERVAL)
+
+
+def _drain_in_thread():
+    try:
+        while process_next_job() is not None:
+            pass
+    except Exception:
+        logger.exception("Import job drain crashed")
+    finally:
+        connections.close_all()
+
+
+class LeaseLost(Exception):
+    """Another worker reclaimed the job this one was running."""
+
+
+def _claimable():
+    # A silent heartbeat means the worker died (a recycled or timed-out
+    # gunicorn worker takes its threads with it).
+    return Q(status=ImportJob.PENDING) | Q(
+        status=ImportJob.RUNNING, heartbeat_at__lt=timezone.now() - STALE_JOB_AFTER
+    )
+
+
+def claim_job(job_id=None):
+    """
+    Atomically moves one PENDING job (``job_id`` or the oldest), or a stale
+    RUNNING one, to RUNNING, so several workers can share the queue.
+    Returns the job or ``None``.
+    """
+    if job_id is None:
+        candidates = ImportJob.objects.filter(_claimable()).order_by("created_at", "id")
+        candidate_ids = list(candidates.values_list("id", flat=True)[:5])
+    else:
+        candidate_ids = [job_id]
+
+    for candidate_id in candidate_ids:
+        now = timezone.now()
+        claimed = ImportJob.objects.filter(_claimable(), id=candidate_id).update(
+            status=ImportJob.RUNNING, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return ImportJob.objects.select_related("user").get(id=candidate_id)
+    return None
+
+
+def process_next_job(job_id=None):
+    job = claim_job(job_id)
+    if job is not None:
+        run_job(job)
+    return job
+
+
+def run_job(job):
+    """
+    Parses the job's file and writes it through the batched ingest path.
+    A reclaimed job resumes after the rows its last run committed, and its
+    counts and errors carry on from there.
+    """
+    # Every write checks and renews the lease, so a worker whose job was
+    # reclaimed stops at its next batch instead of importing rows twice.
+    jobs = ImportJob.objects.filter(id=job.id, heartbeat_at=job.heartbeat_at)
+    skipped, imported = job.processed_rows, job.created_count
+    earlier_errors, earlier_error_count = job.errors, job.error_count
+
+    def totals(created, error_count, errors):
+        return {
+            "created_count": imported + created,
+            "error_count": earlier_error_count + error_count,
+            "errors": (earlier_errors + [{**error, "row": error["row"] + skipped} for error in errors])
+            [:ingest.MAX_REPORTED_ERRORS],
+        }
+
+    try:
+        with job.file.open("rb") as file:
+            source = ImportSource(file, job.format, job.column_mapping, job.date_format)
+
+            def on_progress(processed, created, error_count, errors):
+                nonlocal jobs
+                now = timezone.now()
+                if not jobs.update(
+                    processed_rows=skipped + processed,
+                    progress=source.progress(),
+                    heartbeat_at=now,
+                    **totals(created, error_count, errors),
+                ):
+                    raise LeaseLost(f"Import job {job.id} was reclaimed by another worker")
+                jobs = ImportJob.objects.filter(id=job.id, heartbeat_at=now)
+
+            result = ingest.ingest_expenses(
+                job.user, islice(source.entries(), skipped, None), atomic=False, on_progress=on_progress
+            )
+    except LeaseLost:
+        logger.warning("Import job %s was reclaimed; stopping", job.id)
+        return
+    except Exception as e:
+        if not isinstance(e, ingest.MalformedUpload):
+            logger.exception("Import job %s failed", job.id)
+        # Batches committed before the failure stay imported (see created_count).
+        jobs.update(status=ImportJob.FAILED, message=str(e), finished_at=timezone.now())
+        return
+
+    counts = totals(result["created"], result["error_count"], result["errors"])
+    jobs.update(
+        status=ImportJob.DONE,
+        progress=100,
+        processed_rows=source.rows_read,
+        message=f'{counts["created_count"]} expenses imported.',
+        finished_at=timezone.now(),
+        **counts,
+    )
+    job.file.delete(save=False)
@@ -0,0 +1,212 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+from .models import normalize_category_name
+from .serializers import ExpenseSerializer
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 2000
+STREAM_FORMATS = ("ndjson", "json")
+
+# Public field name -> columns fetched with values_list().
+FIELD_COLUMNS = {
+    "id": ("id",),
+    "user": ("user_id",),
+    "title": ("title",),
+    "amount": ("amount",),
+    "currency": ("currency",),
+    "category": ("category_id", "category__name"),
+    "payment_mode": ("payment_mode",),
+    "note": ("note",),
+    "expense_date": ("expense_date",),
+    "created_at": ("created_at",),
+}
+
+# Reuse ExpenseSerializer's field formatting (decimal strings, ISO dates in
+# the active timezone) without hydrating model instances.
+_FORMATTERS = {
+    name: field.to_representation
+    for name, field in ExpenseSerializer().fields.items()
+    if name in FIELD_COLUMNS and name not in ("user", "category")
+}
+
+
+def select_fields(params):
+    """Parses ``fields=a,b,c``; defaults to everything ExpenseSerializer returns."""
+    raw = params.get("fields")
+    if not raw:
+        return list(FIELD_COLUMNS)
+    fields = [name.strip() for name in raw.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in FIELD_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return fields
+
+
+def _parse_date(params, key):
+    value = params.get(key)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{key}' must be a date in YYYY-MM-DD format")
+
+
+def _parse_amount(params, key):
+    value = params.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"'{key}' must be a number")
+
+
+def filter_expenses(expenses, params):
+    """
+    Applies the optional query filters: ``date_from``/``date_to``,
+    ``category`` (case-insensitive name), ``category_id``, ``payment_mode``
+    (comma separated) and
+    ``min_amount``/``max_amount``.
+    """
+    date_from = _parse_date(params, "date_from")
+    date_to = _parse_date(params, "date_to")
+    min_amount = _parse_amount(params, "min_amount")
+    max_amount = _parse_amount(params, "max_amount")
+
+    if date_from:
+        expenses = expenses.filter(expense_date__gte=date_from)
+    if date_to:
+        expenses = expenses.filter(expense_date__lte=date_to)
+    if min_amount is not None:
+        expenses = expenses.filter(amount__gte=min_amount)
+    if max_amount is not None:
+        expenses = expenses.filter(amount__lte=max_amount)
+
+    category = params.get("category")
+    if category:
+        expenses = expenses.filter(category__key=normalize_category_name(category)[1])
+    category_id = params.get("category_id")
+    if category_id:
+        try:
+            expenses = expenses.filter(category_id=int(category_id))
+        except ValueError:
+            raise ValueError("'category_id' must be an integer")
+
+    payment_mode = params.get("payment_mode")
+    if payment_mode:
+        expenses = expenses.filter(payment_mode__in=payment_mode.split(","))
+
+    return expenses
+
+
+def encode_cursor(expense_date, expense_id):
+    raw = json.dumps([expense_date.isoformat(), expense_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        expense_date, expense_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(expense_date), int(expense_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def expense_rows(expenses, fields, chunk_size=None):
+    """
+    Yields one dict per expense, shaped like ``ExpenseSerializer`` output but
+    built from ``values_list`` tuples. With ``chunk_size`` the rows are read
+    through a server-side ``iterator()`` so memory stays flat.
+    """
+    columns = []
+    for name in fields:
+        columns.extend(FIELD_COLUMNS[name])
+
+    rows = expenses.values_list(*columns)
+    if chunk_size:
+        rows = rows.iterator(chunk_size=chunk_size)
+
+    for values in rows:
+        item = {}
+        position = 0
+        for name in fields:
+            if name == "category":
+                category_id, category_name = values[position:position + 2]
+                item[name] = (
+                    {"id": category_id, "name": category_name}
+                    if category_id is not None else None
+                )
+                position += 2
+                continue
+            value = values[position]
+            position += 1
+            if value is not None and name in _FORMATTERS:
+                value = _FORMATTERS[name](value)
+            item[name] = value
+        yield item
+
+
+def keyset_order(expenses):
+    return expenses.order_by("expense_date", "id")
+
+
+def paginate_expenses(expenses, fields, params):
+    """
+    Keyset pagination over ``(expense_date, id)``. Returns the page and the
+    cursor for the next one (``None`` on the last page).
+    """
+    try:
+        limit = int(params.get("limit") or DEFAULT_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("'limit' must be an integer")
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    cursor = params.get("cursor")
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        expenses = expenses.filter(
+            Q(expense_date__gt=after_date) | Q(expense_date=after_date, id__gt=after_id)
+        )
+
+    # The cursor needs the sort key even if the caller trimmed it away.
+    page_fields = list(dict.fromkeys([*fields, "expense_date", "id"]))
+    page = list(expense_rows(keyset_order(expenses)[:limit + 1], page_fields))
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        last = page[-1]
+        next_cursor = encode_cursor(date.fromisoformat(last["expense_date"]), last["id"])
+
+    return {
+        "expenses": [{name: item[name] for name in fields} for item in page],
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
+
+
+def stream_expenses(expenses, fields, fmt):
+    """Streams every matching expense as NDJSON or as one JSON array."""
+    rows = expense_rows(keyset_order(expenses), fields, chunk_size=STREAM_CHUNK_SIZE)
+
+    if fmt == "ndjson":
+        body = (json.dumps(row) + "\n" for row in rows)
+        content_type = "application/x-ndjson"
+    else:
+        def body_generator():
+            yield "["
+            for index, row in enumerate(rows):
+                yield ("," if index else "") + json.dumps(row)
+            yield "]"
+        body = body_generator()
+        content_type = "application/json"
+
+    return StreamingHttpResponse(body, content_type=content_type)
@@ -0,0 +1,135 @@
+import calendar
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from money import analytics
+from money.amounts import from_minor, minor_units
+from money.models import Category, Expense, Userdetails
+
+
+def _legacy_monthly(dates, amounts):
+    # The month grouping the PDF report used before money.analytics.
+    import pandas as pd
+
+    df = pd.DataFrame({"expense_date": dates, "amount": amounts})
+    df["month_year"] = pd.to_datetime(df["expense_date"]).dt.strftime("%b %Y")
+    monthly_totals = df.groupby("month_year")["amount"].sum().to_dict()
+    return sorted(
+        monthly_totals.items(),
+        key=lambda x: (
+            int(x[0].split()[1]),
+            list(calendar.month_abbr).index(x[0].split()[0]),
+        ),
+    )
+
+
+def _analytics_all(series):
+    monthly = analytics.monthly_totals(series)
+    analytics.period_deltas(monthly.totals)
+    analytics.rolling_mean(monthly.totals)
+    analytics.weekly_totals(series)
+    analytics.category_totals(series)
+    analytics.payment_mode_totals(series)
+    analytics.percentiles(series.amounts)
+    return monthly
+
+
+def _decimal_stats(amounts):
+    # How totals/means ran before minor units: pandas over Decimal objects.
+    import pandas as pd
+
+    column = pd.Series(amounts, dtype=object)
+    return column.sum(), column.mean()
+
+
+def _minor_stats(amounts):
+    return int(amounts.sum()), amounts.mean()
+
+
+def _timed(run):
+    began = time.perf_counter()
+    result = run()
+    return time.perf_counter() - began, result
+
+
+class Command(BaseCommand):
+    help = "Time money.analytics (int64 minor units) against Decimal/pandas paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--skip-legacy", action="store_true")
+        parser.add_argument("--db-rows", type=int, default=0,
+                            help="Also time loading this many amounts from the database as Decimal vs minor units.")
+
+    def handle(self, *args, rows, skip_legacy, db_rows, **options):
+        names = [label for _, label in Category.DEFAULT_CHOICES]
+        modes = ["CASH", "CARD", "UPI", "BANK_TRANSFER", "WALLET", "OTHER"]
+        start = date.today() - timedelta(days=3 * 365)
+
+        for size in rows:
+            rng = np.random.default_rng(42)
+            offsets = rng.integers(0, 3 * 365, size)
+            dates = [start + timedelta(days=int(d)) for d in offsets]
+            amounts = rng.integers(100, 500_000, size).tolist()
+            categories = [names[i] for i in rng.integers(0, len(names), size)]
+            payment_modes = [modes[i] for i in rng.integers(0, len(modes), size)]
+
+            t0 = time.perf_counter()
+            series = analytics.from_columns(dates, amounts, categories, payment_modes)
+            t1 = time.perf_counter()
+            monthly = _analytics_all(series)
+            t2 = time.perf_counter()
+
+            self.stdout.write(
+                f"{size:>9,} rows  build series {t1 - t0:7.3f}s  "
+                f"all analytics {t2 - t1:7.3f}s"
+            )
+
+            if skip_legacy:
+                continue
+            decimals = [from_minor(amount) for amount in amounts]
+            minor_time, (total, _) = _timed(lambda: _minor_stats(series.amounts))
+            decimal_time, (decimal_total, _) = _timed(lambda: _decimal_stats(decimals))
+            self.stdout.write(
+                f"{'':>9}       sum+mean  Decimal/object {decimal_time:7.3f}s  "
+                f"int64 {minor_time:7.4f}s  ({decimal_time / minor_time:,.0f}x)"
+            )
+            if from_minor(total) != decimal_total:
+                self.stderr.write("  totals differ between Decimal and minor units!")
+
+            elapsed, legacy = _timed(lambda: _legacy_monthly(dates, decimals))
+            self.stdout.write(f"{'':>9}       legacy monthly {elapsed:7.3f}s")
+
+            expected = [from_minor(total) for total in monthly.totals.tolist()]
+            if [total for _, total in legacy] != expected:
+                self.stderr.write("  monthly totals differ from the legacy grouping!")
+
+        if db_rows:
+            self._bench_db(db_rows)
+
+    def _bench_db(self, size):
+        rng = np.random.default_rng(7)
+        # Everything happens in a transaction that is rolled back afterwards.
+        with transaction.atomic():
+            user = Userdetails.objects.create(FullName="Bench", Email="bench-analytics@example.invalid", Password="-")
+            Expense.objects.bulk_create(
+                (Expense(user=user, amount=from_minor(int(m)), expense_date=date.today(), category_id=None)
+                 for m in rng.integers(100, 500_000, size)),
+                batch_size=5000,
+            )
+            expenses = Expense.objects.filter(user=user)
+            as_decimal, _ = _timed(lambda: np.array(
+                [float(a) for a in expenses.values_list("amount", flat=True)]
+            ))
+            as_minor, _ = _timed(lambda: np.fromiter(
+                expenses.values_list(minor_units("amount"), flat=True), dtype=np.int64
+            ))
+            self.stdout.write(
+                f"{size:>9,} rows  load amounts  Decimal {as_decimal:7.3f}s  "
+                f"minor units {as_minor:7.3f}s  ({as_decimal / as_minor:.1f}x)"
+            )
+            transaction.set_rollback(True)
@@ -0,0 +1,72 @@
+import io
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from money.ingest import ingest_expenses, iter_json_entries
+from money.models import Category, Expense, Userdetails
+
+
+def _legacy_upload(user, data):
+    # The pre-batching loop from bulk_upload_expenses (minus its per-row prints).
+    for entry in data:
+        category, _ = Category.objects.get_or_create(name=entry.get("category", "Other"))
+        Expense.objects.create(
+            user=user,
+            title=entry.get("title", "Miscellaneous"),
+            amount=entry.get("amount", 0),
+            category=category,
+            payment_mode=entry.get("payment_mode", "CASH"),
+            note=entry.get("note", ""),
+            expense_date=entry.get("expense_date"),
+        )
+
+
+class Command(BaseCommand):
+    help = "Compare bulk upload throughput (rows/s) of the per-row and batched ingest paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000)
+        parser.add_argument("--skip-legacy", action="store_true",
+                            help="Only time the batched path (the legacy loop is slow on big files).")
+
+    def handle(self, *args, rows, skip_legacy, **options):
+        names = [label for _, label in Category.DEFAULT_CHOICES]
+        modes = [mode for mode, _ in Expense.PAYMENT_MODES]
+        start = date.today() - timedelta(days=3 * 365)
+        rng = random.Random(42)
+        data = [
+            {
+                "title": f"Bench expense {i}",
+                "amount": round(rng.uniform(1, 5000), 2),
+                "category": rng.choice(names),
+                "payment_mode": rng.choice(modes),
+                "note": "",
+                "expense_date": (start + timedelta(days=rng.randrange(3 * 365))).isoformat(),
+            }
+            for i in range(rows)
+        ]
+        payload = json.dumps(data).encode()
+
+        def timed(label, run):
+            # Each run happens in a transaction that is rolled back afterwards.
+            with transaction.atomic():
+                user = Userdetails.objects.create(
+                    FullName="Bench", Email="bench@example.invalid", Password="-"
+                )
+                began = time.perf_counter()
+                run(user)
+                elapsed = time.perf_counter() - began
+                transaction.set_rollback(True)
+            self.stdout.write(f"{label:<10} {rows:>8} rows  {elapsed:8.2f}s  {rows / elapsed:>10.0f} rows/s")
+            return elapsed
+
+        if not skip_legacy:
+            legacy = timed("per-row", lambda user: _legacy_upload(user, json.loads(payload)))
+        batched = timed("batched", lambda user: ingest_expenses(user, iter_json_entries(io.BytesIO(payload))))
+        if not skip_legacy:
+            self.stdout.write(self.style.SUCCESS(f"Speed-up: {legacy / batched:.1f}x"))
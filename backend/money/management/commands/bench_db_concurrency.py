@@ -0,0 +1,145 @@
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.db.models import F, Sum
+
+from money.models import Category, Expense, ExpenseDailyRollup, Userdetails
+
+PROFILES = {
+    # Stock Django/SQLite: rollback journal, deferred transactions.
+    "default": {},
+    "tuned": settings.SQLITE_TUNED_OPTIONS,
+}
+
+
+def _add_alias(alias, path, options):
+    # Same settings as "default", pointed at a scratch file.
+    connections.settings[alias] = dict(
+        connections.settings["default"],
+        ENGINE="django.db.backends.sqlite3",
+        NAME=str(path),
+        OPTIONS=dict(options),
+        TEST={},
+    )
+
+
+def _read(alias, user_id):
+    # Dashboard polling: rollup totals plus the newest page of expenses.
+    ExpenseDailyRollup.objects.using(alias).filter(user_id=user_id).aggregate(total=Sum("total"))
+    list(
+        Expense.objects.using(alias).filter(user_id=user_id)
+        .order_by("-expense_date", "-id").values_list("id", "amount")[:50]
+    )
+
+
+def _write(alias, user_id, category_id, rng):
+    # Adding an expense: the row, its rollup bucket and the data version.
+    day = date.today() - timedelta(days=rng.randrange(60))
+    amount = Decimal(rng.randrange(100, 500000)) / 100
+    with transaction.atomic(using=alias):
+        Expense.objects.using(alias).create(
+            user_id=user_id, category_id=category_id, amount=amount, expense_date=day
+        )
+        bucket = ExpenseDailyRollup.objects.using(alias).filter(
+            user_id=user_id, date=day, category_id=category_id, payment_mode="CASH"
+        )
+        if not bucket.update(total=F("total") + amount, count=F("count") + 1):
+            ExpenseDailyRollup.objects.using(alias).create(
+                user_id=user_id, date=day, category_id=category_id, payment_mode="CASH",
+                total=amount, count=1,
+            )
+        Userdetails.objects.using(alias).filter(id=user_id).update(data_version=F("data_version") + 1)
+
+
+class Command(BaseCommand):
+    help = "Mixed read/write load on scratch SQLite files: stock settings vs the tuned WAL profile."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--write-ratio", type=float, default=0.2)
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--profile", choices=sorted(PROFILES), action="append",
+                            help="Profiles to run (default: all).")
+
+    def handle(self, *args, threads, seconds, write_ratio, users, profile, **options):
+        with tempfile.TemporaryDirectory(prefix="bench-db-") as tmp:
+            for name in profile or PROFILES:
+                alias = f"bench_{name}"
+                _add_alias(alias, Path(tmp) / f"{name}.sqlite3", PROFILES[name])
+                try:
+                    self.run_profile(name, alias, threads, seconds, write_ratio, users)
+                finally:
+                    connections[alias].close()
+                    del connections.settings[alias]
+
+    def run_profile(self, name, alias, threads, seconds, write_ratio, users):
+        call_command("migrate", database=alias, verbosity=0)
+        user_ids = [
+            Userdetails.objects.using(alias).create(
+                FullName=f"Bench {i}", Email=f"bench{i}@example.invalid", Password="-"
+            ).id
+            for i in range(users)
+        ]
+        category_ids = list(Category.objects.using(alias).values_list("id", flat=True))
+
+        latencies = {"read": [], "write": []}
+        errors = {"read": 0, "write": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local = {"read": [], "write": []}
+            local_errors = {"read": 0, "write": 0}
+            try:
+                while time.perf_counter() < deadline:
+                    kind = "write" if rng.random() < write_ratio else "read"
+                    user_id = rng.choice(user_ids)
+                    start = time.perf_counter()
+                    try:
+                        if kind == "write":
+                            _write(alias, user_id, rng.choice(category_ids), rng)
+                        else:
+                            _read(alias, user_id)
+                    except OperationalError:  # "database is locked"
+                        local_errors[kind] += 1
+                        continue
+                    local[kind].append(time.perf_counter() - start)
+            finally:
+                connections[alias].close()
+            with lock:
+                for kind in local:
+                    latencies[kind].extend(local[kind])
+                    errors[kind] += local_errors[kind]
+
+        pool = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+        journal = self.journal_mode(alias)
+        self.stdout.write(f"{name} (journal_mode={journal}, {threads} threads, {seconds:g}s)")
+        for kind in ("read", "write"):
+            done = latencies[kind]
+            p95 = statistics.quantiles(done, n=20)[-1] * 1000 if len(done) >= 20 else float("nan")
+            self.stdout.write(
+                f"  {kind:<5} {len(done) / seconds:8.1f} ops/s   p95 {p95:8.1f} ms   "
+                f"locked errors {errors[kind]}"
+            )
+
+    def journal_mode(self, alias):
+        with connections[alias].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            return cursor.fetchone()[0]
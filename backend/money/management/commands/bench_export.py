@@ -0,0 +1,69 @@
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from money import exports
+from money.ingest import ingest_expenses
+from money.models import Category, Expense, Userdetails
+
+
+def _measure(produce):
+    """(seconds to first chunk, total seconds, bytes, peak traced MiB) of ``produce()``'s chunks."""
+    tracemalloc.start()
+    began = time.perf_counter()
+    first = None
+    size = 0
+    for chunk in produce():
+        if first is None:
+            first = time.perf_counter() - began
+        size += len(chunk)
+    total = time.perf_counter() - began
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return first, total, size, peak / 2**20
+
+
+class Command(BaseCommand):
+    help = "Time-to-first-byte, throughput and peak memory of the streaming CSV/XLSX exports."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000)
+
+    def handle(self, *args, rows, **options):
+        names = [label for _, label in Category.DEFAULT_CHOICES]
+        modes = [mode for mode, _ in Expense.PAYMENT_MODES]
+        start = date.today() - timedelta(days=5 * 365)
+        rng = random.Random(42)
+
+        # Everything happens in a transaction that is rolled back afterwards.
+        with transaction.atomic():
+            user = Userdetails.objects.create(FullName="Bench", Email="bench-export@example.invalid", Password="-")
+            ingest_expenses(user, (
+                {
+                    "title": f"Bench expense {i}",
+                    "amount": round(rng.uniform(1, 5000), 2),
+                    "category": rng.choice(names),
+                    "payment_mode": rng.choice(modes),
+                    "expense_date": (start + timedelta(days=rng.randrange(5 * 365))).isoformat(),
+                }
+                for i in range(rows)
+            ))
+            expenses = Expense.objects.filter(user=user)
+
+            runs = {
+                # What a buffered exporter does: every row in memory, then one body.
+                "buffered": lambda: iter(["".join(exports.iter_csv(list(exports.export_rows(expenses))))]),
+                "csv": lambda: exports.iter_csv(exports.export_rows(expenses)),
+                "xlsx": lambda: exports.iter_xlsx(exports.export_rows(expenses)),
+            }
+            for label, run in runs.items():
+                first, total, size, peak = _measure(run)
+                self.stdout.write(
+                    f"{label:<9} {rows:>8} rows  first chunk {first * 1000:8.1f} ms  "
+                    f"total {total:6.2f}s  {size / 2**20:7.1f} MiB  peak {peak:7.1f} MiB"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,70 @@
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Closed-loop HTTP load against a running server: requests/s, latency and, "
+        "for /api/health/ or /api/ready/, how requests spread over pods."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", nargs="?", default="http://127.0.0.1:8000/api/health/")
+        parser.add_argument("--concurrency", type=int, default=16)
+        parser.add_argument("--seconds", type=float, default=10)
+        parser.add_argument("--timeout", type=float, default=10)
+
+    def handle(self, *args, url, concurrency, seconds, timeout, **options):
+        latencies, statuses, hosts = [], Counter(), Counter()
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def worker():
+            local, local_statuses, local_hosts = [], Counter(), Counter()
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    with urlopen(Request(url), timeout=timeout) as response:
+                        body, code = response.read(), response.status
+                except HTTPError as e:
+                    body, code = e.read(), e.code
+                except URLError as e:
+                    local_statuses[type(e.reason).__name__] += 1
+                    continue
+                local.append(time.perf_counter() - start)
+                local_statuses[code] += 1
+                try:
+                    local_hosts[json.loads(body).get("host", "?")] += 1
+                except (ValueError, AttributeError):
+                    pass
+            with lock:
+                latencies.extend(local)
+                statuses.update(local_statuses)
+                hosts.update(local_hosts)
+
+        pool = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+
+        if not latencies:
+            self.stderr.write(f"No responses: {dict(statuses)}")
+            return
+        ms = sorted(x * 1000 for x in latencies)
+        p95 = statistics.quantiles(ms, n=20)[-1] if len(ms) >= 20 else ms[-1]
+        self.stdout.write(
+            f"{url}  {concurrency} clients, {seconds:g}s\n"
+            f"  {len(ms) / seconds:8.1f} req/s   p50 {statistics.median(ms):7.1f} ms   "
+            f"p95 {p95:7.1f} ms   max {ms[-1]:7.1f} ms"
+        )
+        self.stdout.write("  status " + ", ".join(f"{code}: {n}" for code, n in sorted(statuses.items(), key=str)))
+        for host, n in sorted(hosts.items()):
+            self.stdout.write(f"  {host:<32} {n / seconds:8.1f} req/s")
@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Libraries only the report/chart/import paths need. API workers must boot
+# without them (see StartupTests).
+HEAVY_MODULES = ("numpy", "pandas", "matplotlib", "reportlab", "openpyxl")
+
+# What a fresh web worker does before serving its first request.
+API_BOOT = (
+    "import django; django.setup()\n"
+    "from django.core.wsgi import get_wsgi_application; get_wsgi_application()\n"
+    "from django.urls import resolve; resolve('/api/login/')\n"
+)
+
+SCENARIOS = {
+    "api worker": API_BOOT,
+    "api + report stack": API_BOOT + "import money.reports, money.charts, money.analytics\n",
+    # Roughly what every worker paid when views.py imported these at the top.
+    "eager (old views)": API_BOOT + (
+        "import pandas, matplotlib\n"
+        "matplotlib.use('Agg')\n"
+        "import matplotlib.pyplot, reportlab.platypus\n"
+    ),
+}
+
+_REPORT = (
+    "\nimport sys\n"
+    "try:\n"
+    "    import resource\n"
+    "    print('maxrss', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    "except ImportError:\n"
+    "    pass\n"
+    f"print('heavy', ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+)
+
+
+def run_boot(code, importtime=False):
+    """Runs ``code`` in a fresh interpreter; returns (stdout, stderr)."""
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", code + _REPORT]
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get("DJANGO_SETTINGS_MODULE", "backend.settings"))
+    result = subprocess.run(cmd, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True)
+    return result.stdout, result.stderr
+
+
+def parse_importtime(stderr):
+    """Returns (total_us, {top_level_package: summed self time of its modules})."""
+    total, packages = 0, {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total += int(self_us)
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return total, packages
+
+
+class Command(BaseCommand):
+    help = "Measure worker boot import time (python -X importtime) and memory per scenario."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario (best is kept).")
+        parser.add_argument("--top", type=int, default=8, help="Slowest top-level packages to list.")
+
+    def handle(self, *args, repeat, top, **options):
+        for name, code in SCENARIOS.items():
+            best = None
+            for _ in range(repeat):
+                stdout, stderr = run_boot(code, importtime=True)
+                total, packages = parse_importtime(stderr)
+                if best is None or total < best[0]:
+                    best = (total, packages, stdout)
+
+            total, packages, stdout = best
+            stats = dict(line.split(" ", 1) for line in stdout.splitlines() if " " in line)
+            rss = f"{int(stats['maxrss']) / 1024:6.1f} MB" if "maxrss" in stats else "   n/a"
+            self.stdout.write(f"{name:<20} imports {total / 1000:7.1f} ms   max RSS {rss}")
+            for package, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+                self.stdout.write(f"    {package:<24} {cumulative / 1000:7.1f} ms")
@@ -0,0 +1,105 @@
+import logging
+import random
+import statistics
+import threading
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from money.models import Userdetails
+from money.passwords import hash_password
+
+EMAIL = "bench-login@example.invalid"
+REAL_USERS = 200
+PASSWORD = "correct horse battery staple"
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else float("nan")
+
+
+class Command(BaseCommand):
+    help = (
+        "Login latency per PBKDF2 cost: one hash alone, then a real user's login p50/p99 "
+        "while a credential-stuffing burst hits /api/login/ (with and without rate limits)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, action="append",
+                            help="PBKDF2 iteration counts to compare (default: 100k, 600k, 1M).")
+        parser.add_argument("--attackers", type=int, default=8, help="Concurrent stuffing clients.")
+        parser.add_argument("--seconds", type=float, default=20)
+        parser.add_argument("--source-ips", type=int, default=2, help="Distinct attacker addresses.")
+        parser.add_argument("--budget-ms", type=float, default=1000, help="Login p99 budget to check against.")
+
+    def handle(self, *args, iterations, attackers, seconds, source_ips, budget_ms, **options):
+        # Every refused guess would otherwise log a "Bad Request" warning.
+        logging.getLogger("django.request").setLevel(logging.ERROR)
+        for count in iterations or [100_000, 600_000, 1_000_000]:
+            with override_settings(PASSWORD_HASH_ITERATIONS=count):
+                start = time.perf_counter()
+                make_password(PASSWORD)
+                single = (time.perf_counter() - start) * 1000
+                self.stdout.write(f"{count:>9,} iterations   one hash {single:7.1f} ms")
+                for limited in (False, True):
+                    with override_settings(**({} if limited else {"RATE_LIMITS": {}})):
+                        self.burst(limited, attackers, seconds, source_ips, budget_ms)
+
+    def burst(self, limited, attackers, seconds, source_ips, budget_ms):
+        caches["ratelimit"].clear()
+        # Real users each log in now and then; one shared hash keeps setup fast.
+        encoded = hash_password(PASSWORD)
+        Userdetails.objects.bulk_create([
+            Userdetails(FullName="Bench Login", Email=f"{i}-{EMAIL}", Password=encoded) for i in range(REAL_USERS)
+        ])
+        url = reverse("login")
+        deadline = time.perf_counter() + seconds
+        lock = threading.Lock()
+        attack_codes, legit = {}, []
+
+        def attacker(seed):
+            rng, client, codes = random.Random(seed), Client(), {}
+            while time.perf_counter() < deadline:
+                response = client.post(url, {
+                    "Email": rng.choice([f"{rng.randrange(REAL_USERS)}-{EMAIL}", f"victim{rng.randrange(10_000)}@example.invalid"]),
+                    "Password": f"guess-{rng.random()}",
+                }, REMOTE_ADDR=f"203.0.113.{rng.randrange(source_ips)}")
+                codes[response.status_code] = codes.get(response.status_code, 0) + 1
+            with lock:
+                for code, n in codes.items():
+                    attack_codes[code] = attack_codes.get(code, 0) + n
+
+        def real_users():
+            client, n = Client(), 0
+            while time.perf_counter() < deadline:
+                n += 1
+                start = time.perf_counter()
+                response = client.post(url, {"Email": f"{n % REAL_USERS}-{EMAIL}", "Password": PASSWORD},
+                                       REMOTE_ADDR=f"198.51.100.{n % 250}")
+                if response.status_code == 200:
+                    legit.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.1)
+
+        try:
+            threads = [threading.Thread(target=attacker, args=(seed,)) for seed in range(attackers)]
+            threads.append(threading.Thread(target=real_users))
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            Userdetails.objects.filter(Email__endswith=EMAIL).delete()
+
+        p99 = _percentile(legit, 0.99)
+        verdict = "ok" if p99 <= budget_ms else "OVER BUDGET"
+        attempts = sum(attack_codes.values())
+        self.stdout.write(
+            f"    {'limited' if limited else 'no limits':<10} attack {attempts / seconds:7.1f} req/s "
+            f"({attack_codes.get(429, 0)} throttled)   user login p50 "
+            f"{statistics.median(legit) if legit else float('nan'):7.1f} ms  p99 {p99:7.1f} ms  [{verdict}]"
+        )
@@ -0,0 +1,56 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from money.models import Expense, RecurringExpense, Userdetails
+from money.recurring import BATCH_SIZE, materialize_due
+
+
+class Command(BaseCommand):
+    help = "Time a daily scheduler run over many due recurring expenses (and an idempotent rerun)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--schedules", type=int, default=100000)
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, schedules, users, batch_size, **options):
+        today = date.today()
+        rng = random.Random(42)
+        frequencies = [frequency for frequency, _ in RecurringExpense.FREQUENCIES]
+
+        # Everything happens in a transaction that is rolled back afterwards.
+        with transaction.atomic():
+            owners = Userdetails.objects.bulk_create(
+                [Userdetails(FullName=f"Bench {i}", Email=f"bench-recurring-{i}@example.invalid", Password="-")
+                 for i in range(users)],
+                batch_size=2000,
+            )
+            RecurringExpense.objects.bulk_create(
+                [
+                    RecurringExpense(
+                        user_id=owners[i % users].id,
+                        title=f"Bench subscription {i}",
+                        amount=round(rng.uniform(1, 5000), 2),
+                        frequency=rng.choice(frequencies),
+                        start_date=today - timedelta(days=rng.randrange(28)),
+                        next_run=today,
+                    )
+                    for i in range(schedules)
+                ],
+                batch_size=2000,
+            )
+
+            for label in ("run", "rerun"):
+                began = time.perf_counter()
+                result = materialize_due(today, batch_size=batch_size)
+                elapsed = time.perf_counter() - began
+                self.stdout.write(
+                    f"{label:<6} {result['schedules']:>7} schedules  {result['created']:>7} expenses  "
+                    f"{elapsed:6.2f}s  ({result['schedules'] / elapsed if elapsed else 0:,.0f} schedules/s)"
+                )
+            self.stdout.write(f"expenses written: {Expense.objects.filter(recurring__isnull=False).count()}")
+            transaction.set_rollback(True)
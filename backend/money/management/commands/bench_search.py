@@ -0,0 +1,59 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from money.ingest import ingest_expenses
+from money.models import Userdetails
+from money.search import search_page
+
+WORDS = (
+    "groceries milk eggs bread rent electricity water internet phone taxi train bus fuel parking coffee lunch "
+    "dinner pizza movie concert gym pharmacy doctor insurance books course gift flowers shoes jacket laptop"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Latency of expense search (prefix, multi-word, typo fallback, deep page) for one large history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, rows, repeat, **options):
+        rng = random.Random(42)
+        start = date.today() - timedelta(days=5 * 365)
+
+        # Everything happens in a transaction that is rolled back afterwards.
+        with transaction.atomic():
+            user = Userdetails.objects.create(FullName="Bench", Email="bench-search@example.invalid", Password="-")
+            ingest_expenses(user, (
+                {
+                    "title": " ".join(rng.sample(WORDS, 2)).capitalize(),
+                    "amount": round(rng.uniform(1, 5000), 2),
+                    "note": " ".join(rng.sample(WORDS, 4)),
+                    "expense_date": (start + timedelta(days=rng.randrange(5 * 365))).isoformat(),
+                }
+                for _ in range(rows)
+            ))
+
+            queries = {
+                "prefix": {"q": "gro"},
+                "two words": {"q": "coffee lun"},
+                "typo": {"q": "elecrticity"},
+                "page 50": {"q": "taxi", "offset": "1000"},
+            }
+            for label, params in queries.items():
+                timings = []
+                for _ in range(repeat):
+                    began = time.perf_counter()
+                    page = search_page(user.id, params)
+                    timings.append((time.perf_counter() - began) * 1000)
+                self.stdout.write(
+                    f"{label:<10} {len(page['expenses']):>3} results  fuzzy={page['fuzzy']!s:<5}  "
+                    f"median {statistics.median(timings):7.2f} ms  max {max(timings):7.2f} ms"
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from money.models import Userdetails
+from money.passwords import hash_password, is_hashed
+
+
+class Command(BaseCommand):
+    help = (
+        "Hash any plaintext passwords left from before hashing. Logins upgrade them "
+        "one at a time already; this converts accounts that haven't logged in since."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, dry_run=False, **options):
+        converted = 0
+        for user_id, password in Userdetails.objects.values_list("id", "Password").iterator():
+            if is_hashed(password):
+                continue
+            converted += 1
+            if not dry_run:
+                # Only if unchanged meanwhile (e.g. by a login upgrade).
+                Userdetails.objects.filter(id=user_id, Password=password).update(Password=hash_password(password))
+        self.stdout.write(f"{converted} plaintext passwords {'found' if dry_run else 'hashed'}.")
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from money.fx import read_rates, store_rates
+
+
+class Command(BaseCommand):
+    help = (
+        "Load daily exchange rates from a CSV file (date,currency,rate rows, or the "
+        "ECB's wide eurofxref-hist.csv), quoted as units per FX_BASE_CURRENCY."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+
+    def handle(self, *args, path, **options):
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as file:
+                written = store_rates(read_rates(file))
+        except (OSError, ValueError, IndexError) as e:
+            raise CommandError(f"Could not load {path}: {e}")
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Loaded {written} exchange rates (per {settings.FX_BASE_CURRENCY})."
+        ))
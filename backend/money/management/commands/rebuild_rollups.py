@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from money.rollups import rebuild_rollups, verify_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or verify) the daily expense rollups from the raw Expense table."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user", type=int, action="append", dest="user_ids",
+            help="Limit to this user id (may be repeated).",
+        )
+        parser.add_argument(
+            "--verify", action="store_true",
+            help="Only compare rollups with Expense; exit non-zero on drift.",
+        )
+
+    def handle(self, *args, user_ids=None, verify=False, **options):
+        if verify:
+            mismatches = verify_rollups(user_ids)
+            for bucket, expected, actual in mismatches:
+                self.stdout.write(f"{bucket}: expected {expected}, found {actual}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} rollup bucket(s) out of date.")
+            self.stdout.write(self.style.SUCCESS("✅ Rollups match the Expense table."))
+            return
+
+        written = rebuild_rollups(user_ids)
+        self.stdout.write(self.style.SUCCESS(f"✅ Rebuilt {written} rollup rows."))
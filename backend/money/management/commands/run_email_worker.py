@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from money.outbox import drain
+
+
+class Command(BaseCommand):
+    help = "Deliver queued outbox emails (DB-backed queue) over a reused SMTP connection."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Send everything that is due and exit instead of polling.")
+        parser.add_argument("--poll-interval", type=float, default=2.0,
+                            help="Seconds to sleep when nothing is due.")
+        parser.add_argument("--batch-size", type=int, default=50)
+
+    def handle(self, *args, once=False, poll_interval=2.0, batch_size=50, **options):
+        while True:
+            sent, failed = drain(batch_size)
+            if sent or failed:
+                self.stdout.write(f"Outbox: {sent} sent, {failed} failed")
+            if once:
+                return
+            time.sleep(poll_interval)
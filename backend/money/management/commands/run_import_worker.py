@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from money.jobs import process_next_job
+
+
+class Command(BaseCommand):
+    help = "Process queued expense import jobs (DB-backed queue)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true",
+                            help="Drain the queue and exit instead of polling.")
+        parser.add_argument("--poll-interval", type=float, default=2.0,
+                            help="Seconds to sleep when the queue is empty.")
+
+    def handle(self, *args, once=False, poll_interval=2.0, **options):
+        while True:
+            job = process_next_job()
+            if job is not None:
+                job.refresh_from_db()
+                self.stdout.write(f"Import #{job.id}: {job.status} {job.message}")
+                continue
+            if once:
+                return
+            time.sleep(poll_interval)
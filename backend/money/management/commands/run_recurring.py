@@ -0,0 +1,30 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from money.recurring import BATCH_SIZE, materialize_due
+
+
+class Command(BaseCommand):
+    help = "Create the expenses of every recurring schedule that has come due (run daily, or with --loop)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=date.fromisoformat,
+                            help="Materialize occurrences up to this day (YYYY-MM-DD) instead of today.")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true",
+                            help="Keep running, checking for due schedules every --interval seconds.")
+        parser.add_argument("--interval", type=float, default=3600.0)
+
+    def handle(self, *args, date=None, batch_size=BATCH_SIZE, loop=False, interval=3600.0, **options):
+        while True:
+            began = time.perf_counter()
+            result = materialize_due(date, batch_size=batch_size)
+            self.stdout.write(
+                f"{result['created']} expenses from {result['schedules']} schedules "
+                f"in {time.perf_counter() - began:.2f}s"
+            )
+            if not loop:
+                return
+            time.sleep(interval)
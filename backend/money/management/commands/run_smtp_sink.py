@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from money.smtp_sink import SMTPSink
+
+
+class Command(BaseCommand):
+    help = (
+        "Local SMTP stand-in that prints every message it receives. Point the app at it "
+        "with EMAIL_HOST=127.0.0.1 EMAIL_PORT=1025 EMAIL_USE_TLS=0."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=1025)
+
+    def handle(self, *args, host, port, **options):
+        def show(sender, recipients, message):
+            self.stdout.write(f"From {sender} to {', '.join(recipients)}: {message['Subject']}")
+            body = message.get_body(preferencelist=("plain",))
+            if body is not None:
+                self.stdout.write(body.get_content().strip())
+
+        sink = SMTPSink(host, port, on_message=show)
+        self.stdout.write(f"SMTP sink listening on {sink.host}:{sink.port}")
+        try:
+            sink.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    Expense = apps.get_model('money', 'Expense')
+    ExpenseDailyRollup = apps.get_model('money', 'ExpenseDailyRollup')
+    db_alias = schema_editor.connection.alias
+    rows = (
+        Expense.objects.using(db_alias).values('user_id', 'expense_date', 'category_id', 'payment_mode')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    ExpenseDailyRollup.objects.using(db_alias).bulk_create(
+        [
+            ExpenseDailyRollup(
+                user_id=row['user_id'],
+                date=row['expense_date'],
+                category_id=row['category_id'],
+                payment_mode=row['payment_mode'],
+                total=row['total'],
+                count=row['count'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('money', '0005_alter_userdetails_profile_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_mode', models.CharField(choices=[('CASH', 'Cash'), ('CARD', 'Credit/Debit Card'), ('UPI', 'UPI / Online Payment'), ('BANK_TRANSFER', 'Bank Transfer'), ('WALLET', 'Digital Wallet'), ('OTHER', 'Other')], max_length=50)),
+                ('date', models.DateField()),
+                ('total', models.DecimalField(decimal_places=2, default=0.0, max_digits=14)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='money.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='money.userdetails')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'date', 'category', 'payment_mode'), name='unique_expense_daily_rollup')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
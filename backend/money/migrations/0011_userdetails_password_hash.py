@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('money', '0010_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='userdetails',
+            name='Password',
+            field=models.CharField(max_length=128),
+        ),
+    ]
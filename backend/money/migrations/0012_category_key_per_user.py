@@ -0,0 +1,127 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+# The seeded defaults (Category.DEFAULT_CHOICES) as of this migration; the
+# only categories that stay shared.
+DEFAULT_NAMES = [
+    'Food & Dining', 'Clothing & Fashion', 'Furniture & Home', 'Online Delivery', 'Entertainment',
+    'Transport', 'Utilities & Bills', 'Medical & Health', 'Other',
+]
+
+
+def attribute_legacy_categories(Category, Expense, db_alias, categories):
+    """
+    Hands each pre-existing non-default category without an owner to the
+    users whose expenses use it: the first keeps it, every other one gets
+    its own copy. One nobody uses is deleted. Returns the ids of the users
+    whose expenses moved.
+    """
+    default_keys = {' '.join(name.split()).casefold() for name in DEFAULT_NAMES}
+    moved = set()
+    for category in list(categories):
+        if category.created_by_id is not None or category.key in default_keys:
+            continue
+        user_ids = sorted(set(
+            Expense.objects.using(db_alias).filter(category_id=category.id).values_list('user_id', flat=True)
+        ))
+        if not user_ids:
+            category.delete()
+            categories.remove(category)
+            continue
+        category.created_by_id = user_ids[0]
+        category.is_custom = True
+        for user_id in user_ids[1:]:
+            copy = Category.objects.using(db_alias).create(
+                name=category.name, key=category.key, is_custom=True, created_by_id=user_id,
+            )
+            Expense.objects.using(db_alias).filter(category_id=category.id, user_id=user_id).update(
+                category_id=copy.id
+            )
+            categories.append(copy)
+            moved.add(user_id)
+    return moved
+
+
+def merge_case_duplicates(apps, schema_editor):
+    """
+    Fills ``key``, gives legacy user-created categories (which have no
+    ``created_by``) to the users of them, and folds categories whose names
+    differ only in case or spacing into each owner's oldest one, moving
+    their expenses over and rebuilding the affected users' rollups.
+    """
+    Category = apps.get_model('money', 'Category')
+    Expense = apps.get_model('money', 'Expense')
+    ExpenseDailyRollup = apps.get_model('money', 'ExpenseDailyRollup')
+    db_alias = schema_editor.connection.alias
+
+    categories = list(Category.objects.using(db_alias).order_by('id'))
+    for category in categories:
+        category.name = ' '.join(category.name.split())
+        category.key = category.name.casefold()
+    user_ids = attribute_legacy_categories(Category, Expense, db_alias, categories)
+
+    keep = {}
+    merged = {}
+    for category in categories:
+        owner_key = (category.created_by_id, category.key)
+        if owner_key in keep:
+            merged[category.id] = keep[owner_key]
+        else:
+            keep[owner_key] = category.id
+            category.save(update_fields=['name', 'key', 'created_by', 'is_custom'])
+    if not merged and not user_ids:
+        return
+
+    user_ids |= set(
+        Expense.objects.using(db_alias).filter(category_id__in=merged).values_list('user_id', flat=True)
+    )
+    for old_id, new_id in merged.items():
+        Expense.objects.using(db_alias).filter(category_id=old_id).update(category_id=new_id)
+    Category.objects.using(db_alias).filter(id__in=merged).delete()
+
+    ExpenseDailyRollup.objects.using(db_alias).filter(user_id__in=user_ids).delete()
+    rows = (
+        Expense.objects.using(db_alias).filter(user_id__in=user_ids)
+        .values('user_id', 'expense_date', 'category_id', 'payment_mode')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    ExpenseDailyRollup.objects.using(db_alias).bulk_create(
+        [
+            ExpenseDailyRollup(
+                user_id=row['user_id'],
+                date=row['expense_date'],
+                category_id=row['category_id'],
+                payment_mode=row['payment_mode'],
+                total=row['total'],
+                count=row['count'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('money', '0011_userdetails_password_hash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='key',
+            field=models.CharField(default='', editable=False, max_length=100),
+            preserve_default=False,
+        ),
+        migrations.RunPython(merge_case_duplicates, migrations.RunPython.noop),
+    ]
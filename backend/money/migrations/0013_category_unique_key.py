@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Separate from 0012 so PostgreSQL adds the constraints in a fresh
+    # transaction, not one with pending FK checks from the merge.
+
+    dependencies = [
+        ('money', '0012_category_key_per_user'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(fields=('created_by', 'key'), name='unique_user_category'),
+        ),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(condition=models.Q(('created_by__isnull', True)), fields=('key',), name='unique_default_category'),
+        ),
+    ]
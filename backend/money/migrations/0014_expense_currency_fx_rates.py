@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:24
+
+from django.db import migrations, models
+
+
+def copy_user_currency(apps, schema_editor):
+    """Existing expenses and rollups were entered in their owner's currency (as an upper-case code)."""
+    Userdetails = apps.get_model('money', 'Userdetails')
+    Expense = apps.get_model('money', 'Expense')
+    ExpenseDailyRollup = apps.get_model('money', 'ExpenseDailyRollup')
+    db_alias = schema_editor.connection.alias
+
+    owners = {}
+    for user_id, currency in Userdetails.objects.using(db_alias).exclude(currency='INR').values_list('id', 'currency'):
+        code = (currency or '').strip().upper()
+        if len(code) == 3 and code.isalpha():
+            if code != currency:
+                Userdetails.objects.using(db_alias).filter(id=user_id).update(currency=code)
+            if code != 'INR':
+                owners.setdefault(code, []).append(user_id)
+    for code, user_ids in owners.items():
+        Expense.objects.using(db_alias).filter(user_id__in=user_ids).update(currency=code)
+        ExpenseDailyRollup.objects.using(db_alias).filter(user_id__in=user_ids).update(currency=code)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('money', '0013_category_unique_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FxRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('date', models.DateField()),
+                ('per_base', models.FloatField()),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='expensedailyrollup',
+            name='unique_expense_daily_rollup',
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='currency',
+            field=models.CharField(default='INR', max_length=3),
+        ),
+        migrations.AddField(
+            model_name='expensedailyrollup',
+            name='currency',
+            field=models.CharField(default='INR', max_length=3),
+        ),
+        migrations.AddConstraint(
+            model_name='expensedailyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'date', 'category', 'payment_mode', 'currency'), name='unique_expense_daily_rollup'),
+        ),
+        migrations.AddConstraint(
+            model_name='fxrate',
+            constraint=models.UniqueConstraint(fields=('currency', 'date'), name='unique_fx_rate'),
+        ),
+        # After the schema changes, so PostgreSQL has no pending trigger events
+        # when it alters the tables.
+        migrations.RunPython(copy_user_currency, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def fill_monthly_spend(apps, schema_editor):
+    """
+    Seeds the counters from the daily rollups in each user's own currency.
+    Buckets in other currencies need exchange rates; `manage.py
+    rebuild_rollups` counts them once rates are loaded.
+    """
+    ExpenseDailyRollup = apps.get_model('money', 'ExpenseDailyRollup')
+    MonthlySpend = apps.get_model('money', 'MonthlySpend')
+    db_alias = schema_editor.connection.alias
+
+    totals = {}
+    rows = (
+        ExpenseDailyRollup.objects.using(db_alias).filter(currency=F('user__currency'))
+        .values('user_id', 'date', 'category_id')
+        .annotate(total=Sum('total'))
+        .order_by()
+    )
+    for row in rows.iterator():
+        month = row['date'].replace(day=1)
+        minor = int(round(row['total'] * 100))
+        for category_id in {row['category_id'], None}:
+            key = (row['user_id'], month, category_id)
+            totals[key] = totals.get(key, 0) + minor
+    MonthlySpend.objects.using(db_alias).bulk_create(
+        [
+            MonthlySpend(user_id=user_id, month=month, category_id=category_id, total=total)
+            for (user_id, month, category_id), total in totals.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('money', '0014_expense_currency_fx_rates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Budget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='money.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='money.userdetails')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'category'), name='unique_category_budget')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlySpend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('total', models.BigIntegerField(default=0)),
+                ('alerted', models.PositiveSmallIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='money.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='money.userdetails')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'category'), name='unique_monthly_spend'), models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'month'), name='unique_monthly_total')],
+            },
+        ),
+        migrations.RunPython(fill_monthly_spend, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+from django.db import migrations
+
+# SQLite: a contentless FTS5 table keyed by the expense id. The owner column
+# holds "u<user_id>", so a user's matches are intersected inside the index
+# instead of filtered afterwards. Triggers keep it in step with every write,
+# bulk ones included. Django rebuilds a SQLite table for most ALTERs, which
+# drops its triggers: a later migration that alters money_expense has to
+# create them again (and refill the index).
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE money_expense_search USING fts5(
+        owner, title, note,
+        content='', tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+    """,
+    "CREATE VIRTUAL TABLE money_expense_search_vocab USING fts5vocab(money_expense_search, 'col')",
+    """
+    CREATE TRIGGER money_expense_search_insert AFTER INSERT ON money_expense BEGIN
+        INSERT INTO money_expense_search(rowid, owner, title, note)
+        VALUES (new.id, 'u' || new.user_id, new.title, new.note);
+    END
+    """,
+    """
+    CREATE TRIGGER money_expense_search_delete AFTER DELETE ON money_expense BEGIN
+        INSERT INTO money_expense_search(money_expense_search, rowid, owner, title, note)
+        VALUES ('delete', old.id, 'u' || old.user_id, old.title, old.note);
+    END
+    """,
+    """
+    CREATE TRIGGER money_expense_search_update AFTER UPDATE OF user_id, title, note ON money_expense BEGIN
+        INSERT INTO money_expense_search(money_expense_search, rowid, owner, title, note)
+        VALUES ('delete', old.id, 'u' || old.user_id, old.title, old.note);
+        INSERT INTO money_expense_search(rowid, owner, title, note)
+        VALUES (new.id, 'u' || new.user_id, new.title, new.note);
+    END
+    """,
+    """
+    INSERT INTO money_expense_search(rowid, owner, title, note)
+    SELECT id, 'u' || user_id, title, note FROM money_expense
+    """,
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS money_expense_search_update",
+    "DROP TRIGGER IF EXISTS money_expense_search_delete",
+    "DROP TRIGGER IF EXISTS money_expense_search_insert",
+    "DROP TABLE IF EXISTS money_expense_search_vocab",
+    "DROP TABLE IF EXISTS money_expense_search",
+]
+
+# PostgreSQL: expression indexes, which the database maintains itself. The
+# document expression must match money.search.PG_DOCUMENT exactly.
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS btree_gin",
+    """
+    CREATE INDEX money_expense_search_idx ON money_expense USING gin (
+        user_id,
+        (setweight(to_tsvector('simple', coalesce(title, '')), 'A')
+         || setweight(to_tsvector('simple', coalesce(note, '')), 'B'))
+    )
+    """,
+    """
+    CREATE INDEX money_expense_search_trgm_idx ON money_expense USING gin (
+        user_id, (coalesce(title, '') || ' ' || coalesce(note, '')) gin_trgm_ops
+    )
+    """,
+]
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS money_expense_search_trgm_idx",
+    "DROP INDEX IF EXISTS money_expense_search_idx",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for_vendor = statements.get(schema_editor.connection.vendor, [])
+        for statement in for_vendor:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('money', '0016_recurring_expenses'),
+    ]
+
+    # Other backends (MySQL) search with LIKE and need nothing here.
+    operations = [
+        migrations.RunPython(
+            _run({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRES_FORWARD}),
+            _run({'sqlite': SQLITE_REVERSE, 'postgresql': POSTGRES_REVERSE}),
+        ),
+    ]
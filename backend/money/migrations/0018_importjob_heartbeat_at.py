@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:54
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_heartbeats(apps, schema_editor):
+    """Jobs already RUNNING count their lease from when they were claimed."""
+    ImportJob = apps.get_model('money', 'ImportJob')
+    ImportJob.objects.using(schema_editor.connection.alias).filter(status='RUNNING').update(
+        heartbeat_at=F('started_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('money', '0017_expense_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
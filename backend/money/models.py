@@ -1,12 +1,14 @@
+from django.core.validators import MinValueValidator
 from django.db import models
 from django.utils import timezone
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.apps import apps
 
 class Userdetails(models.Model):
     FullName = models.CharField(max_length=255)
     Email = models.EmailField(max_length=255, unique=True)
-    Password = models.CharField(max_length=50)
+    # 🔐 A Django password hash (money.passwords); older rows may still hold plaintext
+    Password = models.CharField(max_length=128)
     RegDate = models.DateTimeField(auto_now_add=True)
     otp = models.CharField(max_length=6, null=True, blank=True)
     monthly_income = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
@@ -16,6 +18,8 @@ class Userdetails(models.Model):
     monthly_budget = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     savings_goal = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     otp_created_at = models.DateTimeField(null=True, blank=True)
+    # 🔄 Bumped on every expense/profile write; keys caches of derived data.
+    data_version = models.PositiveIntegerField(default=0)
     profile_image = models.ImageField(
         upload_to='profile_images/',
         null=True,
@@ -25,6 +29,11 @@ class Userdetails(models.Model):
 
 
 
+    # 🔑 Userdetails is the API's principal (money.authentication); DRF's
+    # IsAuthenticated only asks for these two flags.
+    is_authenticated = True
+    is_anonymous = False
+
     def __str__(self):
         return self.FullName
 
@@ -42,14 +51,37 @@ class Category(models.Model):
         ("OTHER", "Other"),
     ]
 
-    name = models.CharField(max_length=100, unique=True)
+    name = models.CharField(max_length=100)
+    # 🔤 The name casefolded with whitespace collapsed; what uniqueness and
+    # lookups go by (see normalize_category_name).
+    key = models.CharField(max_length=100, editable=False)
     is_custom = models.BooleanField(default=False)
+    # Null for the shared defaults; set for a user's own categories.
     created_by = models.ForeignKey('Userdetails', on_delete=models.CASCADE, null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['created_by', 'key'], name='unique_user_category'),
+            # NULL created_by never conflicts above, so defaults need their own.
+            models.UniqueConstraint(
+                fields=['key'], condition=models.Q(created_by__isnull=True), name='unique_default_category',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.name, self.key = normalize_category_name(self.name)
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
 
+def normalize_category_name(name):
+    """``(display name, key)``: "  food  &  DINING " -> ("food & DINING", "food & dining")."""
+    name = " ".join(str(name).split())
+    return name, name.casefold()
+
+
 class Expense(models.Model):
     PAYMENT_MODES = [
         ("CASH", "Cash"),
@@ -66,28 +98,316 @@ class Expense(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     expense_date = models.DateField(default=timezone.now)
     payment_mode = models.CharField(max_length=50, choices=PAYMENT_MODES, default="CASH")
+    # 💱 ISO 4217 code the amount is in; writers default it to the user's currency.
+    currency = models.CharField(max_length=3, default="INR")
     note = models.TextField(blank=True, null=True, default="")
     created_at = models.DateTimeField(default=timezone.now)
+    # 🔁 Set on expenses materialized from a RecurringExpense: the schedule
+    # and the occurrence date, which together identify it (see money.recurring).
+    recurring = models.ForeignKey('RecurringExpense', on_delete=models.SET_NULL, null=True, blank=True)
+    occurrence = models.DateField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recurring', 'occurrence'], condition=models.Q(recurring__isnull=False),
+                name='unique_recurring_occurrence',
+            ),
+        ]
+        indexes = [
+            # 🔎 Per-user date windows, keyset pages and streams, which order by
+            # (expense_date, id), so id is part of the key.
+            models.Index(fields=['user', 'expense_date', 'id'], name='expense_user_date_idx'),
+            # 🔎 The same access pattern narrowed to one category (reports, filters).
+            models.Index(fields=['user', 'category', 'expense_date', 'id'], name='expense_user_cat_date_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         # ✅ If no category is chosen, use 'Other' by default
-        if not self.category:
-            try:
-                other_category = Category.objects.get(name="Other")
-                self.category = other_category
-            except Category.DoesNotExist:
-                self.category = None  # fallback
+        # (a cached id, so saving doesn't query the category table)
+        if self.category_id is None:
+            from .categories import default_category_id
+            self.category_id = default_category_id(kwargs.get("using") or self._state.db or "default")
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.title} - ₹{self.amount} ({self.get_payment_mode_display()})"
+        return f"{self.title} - {self.currency} {self.amount} ({self.get_payment_mode_display()})"
+
+
+class RecurringExpense(models.Model):
+    # 🔁 An expense that repeats: every ``interval`` days/weeks/months/years
+    # from ``start_date`` (an RRULE FREQ/INTERVAL/UNTIL subset), until
+    # ``end_date`` if set. money.recurring materializes due occurrences as
+    # Expense rows; ``next_run`` is the first one not yet created.
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+    YEARLY = "YEARLY"
+    FREQUENCIES = [
+        (DAILY, "Daily"),
+        (WEEKLY, "Weekly"),
+        (MONTHLY, "Monthly"),
+        (YEARLY, "Yearly"),
+    ]
+
+    user = models.ForeignKey('Userdetails', on_delete=models.CASCADE)
+    title = models.CharField(max_length=255, default="Miscellaneous Expense")
+    amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    currency = models.CharField(max_length=3, default="INR")
+    category = models.ForeignKey('Category', on_delete=models.SET_NULL, null=True, blank=True)
+    payment_mode = models.CharField(max_length=50, choices=Expense.PAYMENT_MODES, default="CASH")
+    note = models.TextField(blank=True, default="")
+    frequency = models.CharField(max_length=10, choices=FREQUENCIES, default=MONTHLY)
+    interval = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
+    start_date = models.DateField(default=timezone.now)
+    end_date = models.DateField(null=True, blank=True)
+    next_run = models.DateField()
+    active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # 🔎 The scheduler's scan: active schedules by due date.
+            models.Index(fields=['active', 'next_run', 'id'], name='recurring_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.title} every {self.interval} {self.get_frequency_display().lower()} from {self.start_date}"
+
+
+class ExpenseDailyRollup(models.Model):
+    # 📊 Materialized daily totals per user × category × payment mode × currency.
+    # Maintained by money.rollups; rebuild with `manage.py rebuild_rollups`.
+    user = models.ForeignKey('Userdetails', on_delete=models.CASCADE)
+    category = models.ForeignKey('Category', on_delete=models.SET_NULL, null=True, blank=True)
+    payment_mode = models.CharField(max_length=50, choices=Expense.PAYMENT_MODES)
+    currency = models.CharField(max_length=3, default="INR")
+    date = models.DateField()
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0.00)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date', 'category', 'payment_mode', 'currency'],
+                name='unique_expense_daily_rollup',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.date} {self.category_id} {self.payment_mode}: {self.currency} {self.total}"
+
+
+class Budget(models.Model):
+    # 🎯 A monthly spending limit for one of the user's categories, in the
+    # user's currency. The overall limit is Userdetails.monthly_budget.
+    user = models.ForeignKey('Userdetails', on_delete=models.CASCADE)
+    category = models.ForeignKey('Category', on_delete=models.CASCADE)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'category'], name='unique_category_budget'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.category_id}: {self.amount}"
+
+
+class MonthlySpend(models.Model):
+    # 🧮 Running spend per user × month × category, in integer minor units of
+    # the user's currency, kept current by money.budgets on every expense
+    # write. The row with no category is the month's overall total.
+    user = models.ForeignKey('Userdetails', on_delete=models.CASCADE)
+    month = models.DateField()  # first day of the month
+    category = models.ForeignKey('Category', on_delete=models.CASCADE, null=True, blank=True)
+    total = models.BigIntegerField(default=0)
+    # The highest alert threshold (percent) already sent for this month.
+    alerted = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'category'], name='unique_monthly_spend'),
+            # NULL category never conflicts above, so the overall row needs its own.
+            models.UniqueConstraint(
+                fields=['user', 'month'], condition=models.Q(category__isnull=True), name='unique_monthly_total',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m} {self.category_id or 'total'}: {self.total}"
+
+
+class FxRate(models.Model):
+    # 💱 A daily exchange rate: ``per_base`` units of ``currency`` buy one unit
+    # of settings.FX_BASE_CURRENCY. Loaded with `manage.py load_fx_rates`;
+    # conversions read it through money.fx's in-memory table.
+    currency = models.CharField(max_length=3)
+    date = models.DateField()
+    per_base = models.FloatField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['currency', 'date'], name='unique_fx_rate'),
+        ]
 
-def create_default_categories(sender, **kwargs):
-    Category = apps.get_model('money', 'Category')
+    def __str__(self):
+        return f"{self.currency} {self.date}: {self.per_base}"
+
+
+class ImportJob(models.Model):
+    # 📥 A background expense import (CSV / XLSX / bank statement / JSON).
+    # Queued by the import endpoint and processed by money.jobs.
+    FORMATS = [
+        ("csv", "CSV"),
+        ("xlsx", "Excel (XLSX)"),
+        ("bank", "Bank statement (CSV)"),
+        ("json", "JSON"),
+    ]
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey('Userdetails', on_delete=models.CASCADE)
+    file = models.FileField(upload_to='imports/')
+    format = models.CharField(max_length=10, choices=FORMATS)
+    column_mapping = models.JSONField(default=dict, blank=True)
+    date_format = models.CharField(max_length=50, blank=True, default="")
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    progress = models.FloatField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    created_count = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+    message = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # The running worker's lease: renewed with every committed batch.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import #{self.id} ({self.format}) - {self.status}"
+
+
+class ReportJob(models.Model):
+    # 📄 A queued PDF report render. The PDF itself lives in the report cache,
+    # content-addressed by cache_key (user, category filter, data version).
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    user = models.ForeignKey('Userdetails', on_delete=models.CASCADE)
+    category_filter = models.PositiveBigIntegerField(null=True, blank=True)
+    cache_key = models.CharField(max_length=64, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    message = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Report #{self.id} ({self.cache_key[:12]}) - {self.status}"
+
+
+class OutboundEmail(models.Model):
+    # ✉️ An email waiting in the outbox. Requests only insert rows; money.outbox
+    # delivers them in the background over a reused SMTP connection, with retries.
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    to = models.JSONField(default=list)
+    from_email = models.CharField(max_length=255, blank=True, default="")
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, default="")
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When the row is next due: a retry's backoff, or the lease of a claimed
+    # SENDING row, after which a crashed sender's message is picked up again.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"Email #{self.id} to {', '.join(self.to)} - {self.status}"
+
+
+def create_default_categories(sender, using='default', **kwargs):
+    # The migrated state, which predates Category.key when migrating partway.
+    try:
+        MigratedCategory = kwargs.get('apps', apps).get_model('money', 'Category')
+    except LookupError:
+        return
+    if 'key' not in {field.name for field in MigratedCategory._meta.fields}:
+        return
     defaults = [choice[1] for choice in Category.DEFAULT_CHOICES]
     for cat in defaults:
-        Category.objects.get_or_create(name=cat, is_custom=False)
+        name, key = normalize_category_name(cat)
+        MigratedCategory.objects.using(using).get_or_create(
+            key=key, created_by=None, defaults={"name": name, "is_custom": False}
+        )
+    # 🔥 Expense writes resolve the defaults from memory from the start.
+    from .categories import warm_default_categories
+    warm_default_categories(using)
 
 
 post_migrate.connect(create_default_categories)
+
+
+def forget_cached_version_of_new_user(sender, instance, created, **kwargs):
+    # A reused id (e.g. a reset database behind a persistent cache) must not
+    # inherit the previous owner's cached data version.
+    if created:
+        from .versions import forget_cached_version
+        forget_cached_version(instance.id)
+
+
+post_save.connect(forget_cached_version_of_new_user, sender=Userdetails)
+
+
+def forget_principal_of_changed_user(sender, instance, **kwargs):
+    # Password changes and deletions take effect for tokens in this process
+    # right away (other processes catch up within the principal cache TTL).
+    from .authentication import forget_principal
+    forget_principal(instance.id)
+
+
+post_save.connect(forget_principal_of_changed_user, sender=Userdetails)
+post_delete.connect(forget_principal_of_changed_user, sender=Userdetails)
+
+
+def forget_cached_category(sender, instance, **kwargs):
+    from .categories import forget_category
+    forget_category(kwargs.get("using") or instance._state.db, instance.created_by_id, instance.key)
+
+
+post_save.connect(forget_cached_category, sender=Category)
+post_delete.connect(forget_cached_category, sender=Category)
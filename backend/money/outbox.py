@@ -0,0 +1,188 @@
+"""
+DB-backed email outbox.
+
+Requests call ``queue_email``, which only inserts a row, so a slow or
+unreachable SMTP server never holds up a response. Delivery happens in a
+background thread of the web process (``EMAIL_OUTBOX_THREADS``) or in
+``manage.py run_email_worker``. Each drain sends every due message over one
+SMTP connection. A failed message is retried with exponential backoff and
+marked FAILED after ``EMAIL_OUTBOX_MAX_ATTEMPTS`` attempts.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_RETRY_DELAY = 3600
+
+_executor = None
+_retry_timer = None
+_retry_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.EMAIL_OUTBOX_THREADS, thread_name_prefix="email-outbox"
+        )
+    return _executor
+
+
+def queue_email(to, subject, body, html_body="", from_email=None):
+    """
+    Stores a message for delivery and, once the surrounding transaction
+    commits, wakes the in-process sender. Returns the ``OutboundEmail``.
+    """
+    email = OutboundEmail.objects.create(
+        to=list(to),
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+    )
+    if settings.EMAIL_OUTBOX_THREADS:
+        transaction.on_commit(_wake_sender)
+    return email
+
+
+def _wake_sender():
+    _get_executor().submit(_drain_in_thread)
+
+
+def _drain_in_thread():
+    try:
+        drain()
+        _schedule_retry()
+    except Exception:
+        logger.exception("Email outbox drain crashed")
+    finally:
+        connections.close_all()
+
+
+def _schedule_retry():
+    # Nothing else wakes the sender when a backoff expires, so set a timer
+    # for the earliest pending retry.
+    global _retry_timer
+    due = OutboundEmail.objects.filter(
+        status__in=(OutboundEmail.PENDING, OutboundEmail.SENDING)
+    ).aggregate(at=Min("next_attempt_at"))["at"]
+    if due is None:
+        return
+    with _retry_lock:
+        if _retry_timer is not None:
+            _retry_timer.cancel()
+        _retry_timer = threading.Timer(max((due - timezone.now()).total_seconds(), 0) + 0.5, _wake_sender)
+        _retry_timer.daemon = True
+        _retry_timer.start()
+
+
+def claim_due(limit=50):
+    """
+    Atomically leases up to ``limit`` due messages to this sender and counts
+    the attempt. A SENDING row whose lease ran out (its sender died) is due
+    again.
+    """
+    now = timezone.now()
+    due = OutboundEmail.objects.filter(
+        status__in=(OutboundEmail.PENDING, OutboundEmail.SENDING), next_attempt_at__lte=now
+    )
+    claimed = []
+    for email_id in due.order_by("next_attempt_at", "id").values_list("id", flat=True)[:limit]:
+        if due.filter(id=email_id).update(
+            status=OutboundEmail.SENDING,
+            attempts=F("attempts") + 1,
+            next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE),
+        ):
+            claimed.append(email_id)
+    return list(OutboundEmail.objects.filter(id__in=claimed).order_by("id"))
+
+
+def _message(email, connection):
+    message = EmailMultiAlternatives(
+        email.subject, email.body, email.from_email, email.to, connection=connection
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+    return message
+
+
+def _record_failure(email, error):
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        logger.error("Giving up on email %s after %s attempts: %s", email.id, email.attempts, error)
+        OutboundEmail.objects.filter(id=email.id).update(status=OutboundEmail.FAILED, last_error=str(error))
+        return
+    delay = min(settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (email.attempts - 1), MAX_RETRY_DELAY)
+    OutboundEmail.objects.filter(id=email.id).update(
+        status=OutboundEmail.PENDING,
+        last_error=str(error),
+        next_attempt_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def deliver_due(limit=50, connection=None):
+    """
+    Sends one batch of due messages over a single SMTP connection (``connection``
+    or a new one from EMAIL_BACKEND). Returns (sent, failed).
+    """
+    emails = claim_due(limit)
+    if not emails:
+        return 0, 0
+
+    owns_connection = connection is None
+    if owns_connection:
+        connection = get_connection(fail_silently=False)
+    sent = failed = 0
+    try:
+        for index, email in enumerate(emails):
+            try:
+                # A no-op while connected; send_messages alone would open and
+                # close a connection per message.
+                connection.open()
+            except Exception as e:
+                # Server unreachable: back off the whole batch at once.
+                for pending in emails[index:]:
+                    _record_failure(pending, e)
+                failed += len(emails) - index
+                break
+            try:
+                connection.send_messages([_message(email, connection)])
+            except Exception as e:
+                failed += 1
+                _record_failure(email, e)
+                # The server may have dropped us; reconnect for the next one.
+                connection.close()
+            else:
+                sent += 1
+                OutboundEmail.objects.filter(id=email.id).update(
+                    status=OutboundEmail.SENT, last_error="", sent_at=timezone.now()
+                )
+    finally:
+        if owns_connection:
+            connection.close()
+    return sent, failed
+
+
+def drain(limit=50):
+    """Delivers batches over one connection until nothing is due. Returns (sent, failed)."""
+    totals = [0, 0]
+    connection = get_connection(fail_silently=False)
+    try:
+        while True:
+            sent, failed = deliver_due(limit, connection=connection)
+            totals[0] += sent
+            totals[1] += failed
+            if sent + failed < limit or not sent:
+                return tuple(totals)
+    finally:
+        connection.close()
@@ -0,0 +1,64 @@
+"""
+Password storage for ``Userdetails.Password``.
+
+New passwords are stored as Django hashes. Rows from before hashing still
+hold plaintext, and ``check_user_password`` upgrades them on the user's next
+successful login. It also rehashes whenever the hasher's cost changes, so
+PASSWORD_HASH_ITERATIONS can be raised or lowered without a migration.
+(``manage.py hash_legacy_passwords`` converts the rest in bulk.)
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    PBKDF2PasswordHasher as DjangoPBKDF2PasswordHasher,
+    check_password,
+    identify_hasher,
+    make_password,
+)
+from django.utils.crypto import constant_time_compare
+
+
+class PBKDF2PasswordHasher(DjangoPBKDF2PasswordHasher):
+    """Django's PBKDF2-SHA256 with the work factor taken from settings."""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_HASH_ITERATIONS
+
+
+def hash_password(raw_password):
+    return make_password(raw_password)
+
+
+def is_hashed(encoded):
+    try:
+        identify_hasher(encoded)
+    except ValueError:
+        return False
+    return True
+
+
+def check_user_password(user, raw_password):
+    """
+    True if ``raw_password`` is the user's password. Legacy plaintext and
+    outdated hashes are replaced with a current hash on success.
+    """
+    def upgrade(raw):
+        user.Password = hash_password(raw)
+        user.save(update_fields=["Password"])
+
+    if raw_password is None:
+        return False
+    if not is_hashed(user.Password):
+        if not constant_time_compare(raw_password, user.Password):
+            return False
+        upgrade(raw_password)
+        return True
+    return check_password(raw_password, user.Password, setter=upgrade)
+
+
+def burn_hash_time(raw_password):
+    """
+    Spends one hash on a login for an unknown email so its response time
+    doesn't reveal that no such account exists.
+    """
+    make_password(raw_password or "")
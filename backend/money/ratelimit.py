@@ -0,0 +1,70 @@
+"""
+Token-bucket rate limits for the credential endpoints (login, password
+reset OTPs).
+
+Each (scope, identity) pair has a bucket of N tokens that refills at N per
+period, from a RATE_LIMITS entry such as "10/min". Each request spends one
+token. When the bucket is empty the request is refused with the number of
+seconds until the next token. Bursts up to N go through, and the sustained
+rate is held at N per period.
+
+Buckets live in the "ratelimit" cache. locmem keeps them per process; redis
+shares them across workers and pods. The cache read-modify-write is not
+atomic, so a few concurrent requests may spend the same token. That is
+acceptable slack when the goal is to throttle password guessing.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+
+
+def parse_rate(rate):
+    """``"10/min"`` -> (10, 60). Empty or ``None`` means unlimited (``None``)."""
+    if not rate:
+        return None
+    count, _, period = rate.partition("/")
+    return int(count), PERIODS[period]
+
+
+def take(scope, identity, now=None):
+    """Spends a token from the bucket. Returns 0 if allowed, else seconds to wait."""
+    rate = parse_rate(settings.RATE_LIMITS.get(scope))
+    if rate is None:
+        return 0
+    capacity, period = rate
+    now = time.time() if now is None else now
+
+    cache = caches["ratelimit"]
+    key = "ratelimit:" + hashlib.sha256(f"{scope}|{identity}".encode()).hexdigest()[:32]
+    tokens, updated = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * capacity / period)
+    if tokens < 1:
+        return (1 - tokens) * period / capacity
+    # After `period` idle seconds the bucket is full again, same as a missing key.
+    cache.set(key, (tokens - 1, now), timeout=period)
+    return 0
+
+
+def throttle(*buckets):
+    """
+    Spends from every ``(scope, identity)`` bucket; returns the longest
+    wait (0 if all allowed).
+    """
+    return max((take(scope, identity) for scope, identity in buckets), default=0)
+
+
+def client_ip(request):
+    """
+    The caller's address. Behind RATE_LIMIT_PROXY_COUNT trusted proxies it
+    comes from X-Forwarded-For, counting from the right; clients can forge
+    anything to the left of that.
+    """
+    proxies = settings.RATE_LIMIT_PROXY_COUNT
+    forwarded = [part.strip() for part in request.META.get("HTTP_X_FORWARDED_FOR", "").split(",") if part.strip()]
+    if proxies and len(forwarded) >= proxies:
+        return forwarded[-proxies]
+    return request.META.get("REMOTE_ADDR", "")
@@ -0,0 +1,164 @@
+"""
+Materializing recurring expenses.
+
+A ``RecurringExpense`` repeats every ``interval`` days, weeks, months or
+years from ``start_date``. Monthly and yearly occurrences keep the start
+date's day of the month, falling back to the last day of shorter months
+(a schedule from Jan 31 gives Feb 28, then Mar 31).
+
+``materialize_due`` turns every occurrence up to today into an Expense row
+for all users at once. It walks active schedules due by ``next_run`` in id
+order, ``batch_size`` at a time. Each batch is one transaction:
+
+- one locked read of the schedules (other runners skip locked rows);
+- one read of occurrences that already exist;
+- one ``bulk_create`` of the new expenses;
+- one rollup/budget write and one data-version bump for the batch's users;
+- one UPDATE per distinct new ``next_run`` of the schedules.
+
+Every expense carries its ``(recurring, occurrence)`` key, which is unique,
+so a rerun (or a crash between batches) never creates an occurrence twice.
+"""
+import calendar
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import rollups
+from .categories import default_category_id
+from .models import Expense, RecurringExpense
+from .versions import bump_data_versions
+
+BATCH_SIZE = 1000
+# At most this many occurrences per schedule per run (a daily schedule
+# started years ago catches up over several runs instead of one huge batch).
+MAX_CATCH_UP = 366
+
+
+# ==========================================
+# 🔹 Schedule arithmetic
+# ==========================================
+def _add_months(start, months):
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    return start.replace(year=year, month=month, day=min(start.day, calendar.monthrange(year, month)[1]))
+
+
+def next_occurrence(schedule, day):
+    """The occurrence after ``day`` (itself an occurrence of ``schedule``)."""
+    if schedule.frequency == RecurringExpense.DAILY:
+        return day + timedelta(days=schedule.interval)
+    if schedule.frequency == RecurringExpense.WEEKLY:
+        return day + timedelta(weeks=schedule.interval)
+    # Counted from the start date, so clamped month ends don't drift.
+    months = schedule.interval * (12 if schedule.frequency == RecurringExpense.YEARLY else 1)
+    elapsed = (day.year - schedule.start_date.year) * 12 + day.month - schedule.start_date.month
+    return _add_months(schedule.start_date, elapsed + months)
+
+
+def first_occurrence_from(schedule, day):
+    """The first occurrence of ``schedule`` on or after ``day``."""
+    occurrence = schedule.start_date
+    while occurrence < day:
+        occurrence = next_occurrence(schedule, occurrence)
+    return occurrence
+
+
+def reschedule(schedule):
+    """
+    Points ``next_run`` at the first occurrence after the ones already
+    created (after the schedule's timing changed), and reactivates an ended
+    schedule whose end date moved past it. Not saved.
+    """
+    last = Expense.objects.filter(recurring=schedule).aggregate(last=Max("occurrence"))["last"]
+    schedule.next_run = first_occurrence_from(schedule, last + timedelta(days=1) if last else schedule.start_date)
+    schedule.active = not (schedule.end_date and schedule.next_run > schedule.end_date)
+
+
+def _due(schedule, today):
+    """``(occurrences to create, next_run after them)`` as of ``today``."""
+    last = min(today, schedule.end_date) if schedule.end_date else today
+    day, dates = schedule.next_run, []
+    while day <= last and len(dates) < MAX_CATCH_UP:
+        dates.append(day)
+        day = next_occurrence(schedule, day)
+    return dates, day
+
+
+# ==========================================
+# 🔹 Materialization
+# ==========================================
+def materialize_due(today=None, batch_size=BATCH_SIZE, schedules=None):
+    """
+    Creates the expenses of every occurrence due on or before ``today``
+    (default: today), optionally only for the ``schedules`` queryset.
+    Returns ``{"schedules": processed, "created": expenses}``.
+    """
+    today = today or timezone.now().date()
+    schedules = RecurringExpense.objects.all() if schedules is None else schedules
+    due = schedules.filter(active=True, next_run__lte=today).order_by("id")
+    # Concurrent runners share the work instead of queueing behind each other's locks.
+    if connection.features.has_select_for_update_skip_locked:
+        due = due.select_for_update(skip_locked=True)
+
+    processed = created = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            batch = list(due.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            processed += len(batch)
+            created += _materialize(batch, today)
+    return {"schedules": processed, "created": created}
+
+
+def _materialize(batch, today):
+    occurrences = {}
+    for schedule in batch:
+        dates, schedule.next_run = _due(schedule, today)
+        occurrences[schedule.id] = dates
+        if schedule.end_date and schedule.next_run > schedule.end_date:
+            schedule.active = False
+
+    earliest = min((dates[0] for dates in occurrences.values() if dates), default=None)
+    existing = set()
+    if earliest is not None:
+        existing = set(
+            Expense.objects.filter(recurring_id__in=occurrences, occurrence__gte=earliest)
+            .values_list("recurring_id", "occurrence")
+        )
+
+    default_category = default_category_id()
+    expenses = [
+        Expense(
+            user_id=schedule.user_id,
+            title=schedule.title,
+            amount=schedule.amount,
+            currency=schedule.currency,
+            category_id=schedule.category_id or default_category,
+            payment_mode=schedule.payment_mode,
+            note=schedule.note,
+            expense_date=day,
+            recurring_id=schedule.id,
+            occurrence=day,
+        )
+        for schedule in batch
+        for day in occurrences[schedule.id]
+        if (schedule.id, day) not in existing
+    ]
+    if expenses:
+        Expense.objects.bulk_create(expenses, batch_size=BATCH_SIZE)
+        rollups.apply_deltas(rollups.collect_deltas(expenses))
+        bump_data_versions({expense.user_id for expense in expenses})
+    # Schedules due together mostly move to the same few dates: one UPDATE per date.
+    by_next_run = defaultdict(list)
+    for schedule in batch:
+        by_next_run[schedule.next_run, schedule.active].append(schedule.id)
+    for (next_run, active), ids in by_next_run.items():
+        RecurringExpense.objects.filter(id__in=ids).update(next_run=next_run, active=active)
+    return len(expenses)
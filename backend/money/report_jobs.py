@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import report_worker
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the PDF layout changes so old cache entries stop matching.
+REPORT_FORMAT_VERSION = 1
+
+# Pending/running jobs older than this are assumed lost (e.g. worker restart).
+STALE_JOB_AFTER = timedelta(minutes=10)
+
+_pool = None
+
+
+# ==========================================
+# 🔹 Content-addressed cache
+# ==========================================
+def report_cache_key(user_id, category_id, data_version):
+    raw = f"{REPORT_FORMAT_VERSION}:{user_id}:{category_id or 'all'}:{data_version}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def cache_path(cache_key):
+    return Path(settings.REPORT_CACHE_DIR) / cache_key[:2] / f"{cache_key}.pdf"
+
+
+def cached_report(cache_key):
+    path = cache_path(cache_key)
+    return path if path.exists() else None
+
+
+def store_report(cache_key, pdf_bytes):
+    path = cache_path(cache_key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write-then-rename so readers never see a half-written PDF.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".part")
+    # mkstemp makes it 0600; the nginx sidecar serving it runs as another user.
+    os.fchmod(fd, 0o644)
+    with os.fdopen(fd, "wb") as out:
+        out.write(pdf_bytes)
+    os.replace(tmp, path)
+    return path
+
+
+def render_to_cache(user, category_id, cache_key):
+    """Renders the report into the cache; ``None`` if there is nothing to report."""
+    from .reports import build_expense_report
+
+    pdf_bytes = build_expense_report(user, category_id)
+    if pdf_bytes is None:
+        return None
+    return store_report(cache_key, pdf_bytes)
+
+
+def current_report(user, category_id=None):
+    """
+    The PDF for the user's current data, rendered now if it isn't cached
+    (``None`` if there is nothing to report). A fresh render is recorded as
+    a finished job, so the next one prunes it like any queued render.
+    """
+    cache_key = report_cache_key(user.id, category_id, user.data_version)
+    path = cached_report(cache_key)
+    if path is None:
+        path = render_to_cache(user, category_id, cache_key)
+        if path is not None:
+            job = ReportJob.objects.create(
+                user=user, category_filter=category_id, cache_key=cache_key,
+                status=ReportJob.DONE, finished_at=timezone.now(),
+            )
+            _prune_superseded(job)
+    return path
+
+
+def _prune_superseded(job):
+    # Older renders of the same report can never be requested again once the
+    # data version moved on; drop their files.
+    stale_keys = (
+        ReportJob.objects.filter(user_id=job.user_id, category_filter=job.category_filter)
+        .exclude(cache_key=job.cache_key)
+        .values_list("cache_key", flat=True)
+        .distinct()
+    )
+    for key in stale_keys:
+        cache_path(key).unlink(missing_ok=True)
+
+
+# ==========================================
+# 🔹 Queue
+# ==========================================
+def _get_pool():
+    global _pool
+    if _pool is None:
+        # "spawn" gives each renderer a clean interpreter (no inherited DB
+        # sockets or matplotlib state from the web worker).
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.REPORT_WORKER_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=report_worker.init_worker,
+        )
+    return _pool
+
+
+def request_report(user, category_id=None):
+    """
+    Returns a ReportJob for the user's current data. Unchanged data maps to
+    the same cache key, so repeat requests reuse the existing job or file.
+    """
+    cache_key = report_cache_key(user.id, category_id, user.data_version)
+
+    job = (
+        ReportJob.objects.filter(cache_key=cache_key)
+        .exclude(status=ReportJob.FAILED)
+        .exclude(
+            status__in=[ReportJob.PENDING, ReportJob.RUNNING],
+            created_at__lt=timezone.now() - STALE_JOB_AFTER,
+        )
+        .order_by("-id")
+        .first()
+    )
+    if job and (job.status != ReportJob.DONE or cached_report(cache_key)):
+        return job
+
+    if cached_report(cache_key):
+        return ReportJob.objects.create(
+            user=user, category_filter=category_id, cache_key=cache_key,
+            status=ReportJob.DONE, finished_at=timezone.now(),
+        )
+
+    job = ReportJob.objects.create(user=user, category_filter=category_id, cache_key=cache_key)
+    if settings.REPORT_WORKER_PROCESSES:
+        transaction.on_commit(lambda: _get_pool().submit(report_worker.run, job.id))
+    else:
+        run_report_job(job.id)
+        job.refresh_from_db()
+    return job
+
+
+def run_report_job(job_id):
+    """Renders one queued report. Runs inside a pool process (or inline)."""
+    claimed = ReportJob.objects.filter(id=job_id, status=ReportJob.PENDING).update(
+        status=ReportJob.RUNNING
+    )
+    if not claimed:
+        return
+    job = ReportJob.objects.select_related("user").get(id=job_id)
+    jobs = ReportJob.objects.filter(id=job_id)
+    try:
+        path = render_to_cache(job.user, job.category_filter, job.cache_key)
+    except Exception as e:
+        logger.exception("Report job %s failed", job_id)
+        jobs.update(status=ReportJob.FAILED, message=str(e), finished_at=timezone.now())
+        return
+
+    if path is None:
+        jobs.update(
+            status=ReportJob.FAILED,
+            message="No expenses found for this user/category.",
+            finished_at=timezone.now(),
+        )
+        return
+    jobs.update(status=ReportJob.DONE, finished_at=timezone.now())
+    _prune_superseded(job)
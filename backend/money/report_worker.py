@@ -0,0 +1,27 @@
+"""
+Entry points for report pool processes. Kept free of model imports so a
+freshly spawned interpreter can unpickle them before Django is set up.
+"""
+import os
+
+
+def init_worker():
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    django.setup()
+    # Pool processes exist to render, so load the report stack up front
+    # instead of on the first job (web workers never import it).
+    from . import reports  # noqa: F401
+
+
+def run(job_id):
+    from django.db import close_old_connections
+
+    from .report_jobs import run_report_job
+
+    close_old_connections()
+    try:
+        run_report_job(job_id)
+    finally:
+        close_old_connections()
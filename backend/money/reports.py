@@ -0,0 +1,234 @@
+# ==========================================
+# 🔹 Python Standard Library
+# ==========================================
+from collections import namedtuple
+from io import BytesIO
+
+# ==========================================
+# 🔹 ReportLab (PDF Generation)
+# ==========================================
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
+    PageBreak, Image
+)
+
+from .amounts import currency_label, format_money, minor_units
+from .models import Expense
+from . import analytics, charts
+
+# Rows per detail-table flowable (see build_expense_report).
+DETAIL_CHUNK_ROWS = 200
+
+# Column-oriented expense data: one list per field, index-aligned; amounts
+# are integer minor units of the matching currency.
+ReportRows = namedtuple("ReportRows", ["titles", "categories", "dates", "amounts", "currencies"])
+
+
+def fetch_report_rows(user, category_id=None):
+    """
+    Loads every expense the report needs in a single query (category name
+    joined in) and returns it column-wise. Feeds both the statistics and
+    the detail table, so no model instances are hydrated.
+    """
+    expenses = Expense.objects.filter(user=user)
+    if category_id:
+        expenses = expenses.filter(category_id=category_id)
+    # Chronological, so the (user[, category], expense_date, id) indexes
+    # serve both the filter and the sort.
+    expenses = expenses.order_by("expense_date", "id").values_list(
+        "title", "category__name", "expense_date", minor_units("amount"), "currency"
+    )
+
+    rows = ReportRows([], [], [], [], [])
+    for title, category, date, amount, currency in expenses.iterator(chunk_size=2000):
+        rows.titles.append(title)
+        rows.categories.append(category)
+        rows.dates.append(date)
+        rows.amounts.append(amount)
+        rows.currencies.append(currency)
+    return rows
+
+
+def _detail_table(data, style, header=False):
+    if header:
+        style = [
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#154360")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ] + style
+    table = Table(data, colWidths=[220, 140, 100, 90])
+    table.setStyle(TableStyle(style))
+    return table
+
+
+def build_expense_report(user, category_id=None):
+    """
+    Renders the PDF expense report for ``user`` (optionally one category) and
+    returns the PDF bytes, or ``None`` when there are no matching expenses.
+    """
+    # 🔹 Fetch expenses (one query)
+    rows = fetch_report_rows(user, category_id)
+    if not rows.amounts:
+        return None
+
+    # 🔹 Prepare PDF
+    buffer = BytesIO()
+    pdf = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=50,
+        rightMargin=50,
+        topMargin=70,
+        bottomMargin=50
+    )
+
+    # 🔹 Styles
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name="ReportTitleCustom", fontSize=22, leading=28, alignment=1,
+                              spaceAfter=15, textColor=colors.HexColor("#1F4E79")))
+    styles.add(ParagraphStyle(name="SectionHeaderCustom", fontSize=14, leading=18, spaceAfter=10,
+                              textColor=colors.HexColor("#154360")))
+    styles.add(ParagraphStyle(name="BulletCustom", fontSize=11.5, leading=15, leftIndent=25, spaceAfter=6))
+    styles.add(ParagraphStyle(name="NormalTextCustom", fontSize=11.5, leading=14, spaceAfter=10))
+
+    content = []
+
+    # 🧾 Title
+    report_title = f"Expense Report — {user.FullName}"
+    if category_id:
+        cat_name = rows.categories[0]
+        report_title += f" ({cat_name})"
+    content.append(Paragraph(report_title, styles["ReportTitleCustom"]))
+    content.append(Spacer(1, 5))
+    content.append(Paragraph("<hr width='100%' color='#1F4E79'/>", styles["NormalTextCustom"]))
+    content.append(Spacer(1, 20))
+
+    # 🧮 Data prep (every amount converted into the user's currency in one pass)
+    currency = user.currency
+    label = currency_label(currency)
+    series = analytics.from_columns(
+        rows.dates, rows.amounts, rows.categories, currencies=rows.currencies, currency=currency,
+    )
+    stats = analytics.describe(series)
+    median_expense = analytics.percentiles(series.amounts, q=(50,))[50]
+
+    # 📘 Summary
+    content.append(Paragraph("📘 Executive Summary", styles["SectionHeaderCustom"]))
+    summary_points = [
+        f"• Total Spending Recorded: <b>{format_money(stats['total'], currency)}</b>",
+        f"• Average Expense per Entry: <b>{format_money(stats['mean'], currency)}</b>",
+        f"• Median Expense: <b>{format_money(median_expense, currency)}</b>",
+        f"• Highest Single Expense: <b>{format_money(stats['max'], currency)}</b>",
+        f"• Lowest Expense Recorded: <b>{format_money(stats['min'], currency)}</b>",
+        f"• Total Transactions: <b>{stats['count']}</b>",
+    ]
+    if category_id:
+        summary_points.append(f"• Report focused on Category: <b>{cat_name}</b>")
+    else:
+        summary_points.append("• Report includes all categories.")
+    for line in summary_points:
+        content.append(Paragraph(line, styles["BulletCustom"]))
+    content.append(Spacer(1, 25))
+
+    # 📅 Monthly summary table (integer month keys, so already in calendar order)
+    monthly = analytics.monthly_totals(series)
+    sorted_months = [
+        (analytics.month_label(key), total)
+        for key, total in zip(monthly.keys, monthly.totals.tolist())
+    ]
+
+    content.append(Paragraph("📅 Monthly Expense Summary", styles["SectionHeaderCustom"]))
+    month_data = [["Month", f"Total ({label})"]]
+    for month, total in sorted_months:
+        month_data.append([month, format_money(total, currency)])
+
+    month_table = Table(month_data, colWidths=[260, 230])
+    month_table.setStyle(TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1F618D")),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("FONTSIZE", (0, 0), (-1, -1), 11),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
+        ("TOPPADDING", (0, 0), (-1, 0), 8),
+    ]))
+    content.append(month_table)
+    content.append(Spacer(1, 25))
+
+    # 📊 Bar Chart (centered & larger)
+    _, monthly_png = charts.get_chart(charts.chart_data("monthly", series))
+    chart = Image(BytesIO(monthly_png), width=500, height=300)  # ✅ Wider chart for visual balance
+    content.append(chart)
+    content.append(Spacer(1, 20))
+
+    # 🔹 Monthly difference analysis (below graph)
+    content.append(Paragraph("📈 Month-over-Month Analysis", styles["SectionHeaderCustom"]))
+    diff_texts = []
+    deltas = analytics.period_deltas(monthly.totals).tolist()
+    for i, diff in enumerate(deltas, start=1):
+        prev_month, curr_month = sorted_months[i - 1][0], sorted_months[i][0]
+        direction = "increased" if diff > 0 else "decreased"
+        diff_texts.append(
+            f"• From <b>{prev_month}</b> to <b>{curr_month}</b>, expenses {direction} by <b>{format_money(abs(diff), currency)}</b>."
+        )
+    if not diff_texts:
+        diff_texts.append("• Only one month of data available, no comparison possible.")
+    for line in diff_texts:
+        content.append(Paragraph(line, styles["BulletCustom"]))
+    content.append(Spacer(1, 25))
+
+    # 🥧 Pie Chart — only if NOT category-filtered
+    pie_data = None if category_id else charts.chart_data("category", series)
+    if pie_data:
+        _, pie_png = charts.get_chart(pie_data)
+        pie_chart = Image(BytesIO(pie_png), width=350, height=350)
+        content.append(pie_chart)
+        content.append(Spacer(1, 25))
+
+    # 📑 Detailed Expense Records (start new page)
+    content.append(PageBreak())
+    content.append(Paragraph("📑 Detailed Expense Records", styles["SectionHeaderCustom"]))
+
+    # Emitted as a run of short tables: ReportLab re-measures a table every
+    # time it splits one across pages, which is quadratic on a single
+    # 50k-row table. Only the first chunk carries the header row.
+    detail_style = [
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+        ("FONTSIZE", (0, 0), (-1, -1), 10.5),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 7),
+        ("TOPPADDING", (0, 0), (-1, -1), 7),
+    ]
+
+    # Amounts in the user's currency; foreign ones also show what was entered.
+    detail_data = [["Title", "Category", "Date", f"Amount ({label})"]]
+    first_chunk = True
+    converted = series.amounts.tolist()
+    for title, category, date, amount, expense_currency, value in zip(*rows, converted):
+        if expense_currency == currency:
+            shown = format_money(amount, currency)
+        else:
+            shown = f"{format_money(value, currency)}\n({format_money(amount, expense_currency)})"
+        detail_data.append([
+            title,
+            category or "N/A",
+            date.strftime("%d-%b-%Y"),
+            shown,
+        ])
+        if len(detail_data) == DETAIL_CHUNK_ROWS:
+            content.append(_detail_table(detail_data, detail_style, header=first_chunk))
+            detail_data, first_chunk = [], False
+    if detail_data:
+        content.append(_detail_table(detail_data, detail_style, header=first_chunk))
+
+    # 🔹 Footer
+    def footer(canvas, doc):
+        canvas.saveState()
+        canvas.setFont("Helvetica-Oblique", 8)
+        canvas.drawCentredString(A4[0] / 2, 30, "@Expense Tracker — Confidential Report")
+        canvas.restoreState()
+
+    pdf.build(content, onFirstPage=footer, onLaterPages=footer)
+    return buffer.getvalue()
@@ -0,0 +1,106 @@
+"""
+Per-user response cache for the dashboard's polling endpoints.
+
+Entries are keyed by (view, user, data version, query string), so a write
+that bumps the user's data version (see money.versions) makes every older
+entry unreachable; nothing has to be deleted. The ETag is that same key,
+which lets an unchanged dashboard revalidate with a 304 from the cache
+alone.
+"""
+import functools
+import hashlib
+import threading
+from collections import Counter
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.http import HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .versions import cached_version_token
+
+# "hit" / "miss" count cached bodies, "not_modified" 304s and "bypass"
+# requests the cache stepped aside for (streams, unknown users).
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def cache_stats():
+    """Counters for this process since start (or the last reset)."""
+    with _stats_lock:
+        stats = dict.fromkeys(("hit", "miss", "not_modified", "bypass"), 0)
+        stats.update(_stats)
+    served = stats["hit"] + stats["miss"] + stats["not_modified"]
+    stats["hit_ratio"] = round((stats["hit"] + stats["not_modified"]) / served, 4) if served else None
+    return stats
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _finish(response, etag, outcome):
+    response["ETag"] = etag
+    # Browsers keep the body but revalidate on every poll.
+    response["Cache-Control"] = "private, no-cache"
+    response["X-Cache"] = outcome
+    return response
+
+
+def cached_user_response(user_kwarg="user_id", per_day=False, bypass=None, cache_if=None):
+    """
+    Caches a GET view's 200 ``Response`` data per user and data version.
+
+    ``per_day`` adds today's date to the key for views whose output moves
+    with the calendar (summary windows). ``bypass(request)`` skips the cache
+    for a request; ``cache_if(data)`` vetoes storing a body (the ETag is
+    still sent). Apply below ``@api_view``.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != "GET" or (bypass and bypass(request)):
+                _record("bypass")
+                return view(request, *args, **kwargs)
+
+            user_id = kwargs[user_kwarg]
+            version = cached_version_token(user_id)
+            if version is None:
+                _record("bypass")
+                return view(request, *args, **kwargs)
+
+            query = urlencode(sorted(request.query_params.lists()), doseq=True)
+            day = timezone.localdate().isoformat() if per_day else ""
+            raw = f"{view.__name__}|{user_id}|{version}|{day}|{request.get_host()}|{query}"
+            key = hashlib.sha256(raw.encode()).hexdigest()[:40]
+            etag = quote_etag(key)
+
+            if etag in parse_etags(request.headers.get("If-None-Match", "")):
+                _record("not_modified")
+                return _finish(HttpResponseNotModified(), etag, "REVALIDATED")
+
+            cache = caches["responses"]
+            data = cache.get(f"response:{key}")
+            if data is not None:
+                _record("hit")
+                return _finish(Response(data, status=status.HTTP_200_OK), etag, "HIT")
+
+            _record("miss")
+            response = view(request, *args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != status.HTTP_200_OK:
+                return response
+            if cache_if is None or cache_if(response.data):
+                cache.set(f"response:{key}", response.data)
+            return _finish(response, etag, "MISS")
+
+        return wrapper
+    return decorator
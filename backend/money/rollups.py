@@ -0,0 +1,218 @@
+from collections import defaultdict, namedtuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+
+from . import budgets
+from .amounts import from_minor, to_minor
+from .models import Expense, ExpenseDailyRollup
+from .upserts import save_rows
+
+_AMOUNT = Expense._meta.get_field("amount")
+_DATE = Expense._meta.get_field("expense_date")
+
+# One expense's contribution to a rollup bucket (amount in integer minor
+# units). Snapshot it *before* editing an expense so the old bucket can be
+# debited after the save.
+RollupEntry = namedtuple(
+    "RollupEntry", ["user_id", "date", "category_id", "payment_mode", "currency", "amount"]
+)
+
+
+def rollup_entry(expense):
+    # Views assign raw request values (strings) to the model, so normalise
+    # them the same way the database would before bucketing.
+    return RollupEntry(
+        expense.user_id,
+        _DATE.to_python(expense.expense_date),
+        expense.category_id,
+        expense.payment_mode,
+        expense.currency,
+        to_minor(_AMOUNT.to_python(expense.amount)),
+    )
+
+
+def record_expenses(expenses):
+    """Credits newly created expenses to their daily buckets."""
+    _apply(_deltas(rollup_entry(e) for e in expenses))
+
+
+def retract_expenses(expenses):
+    """Debits expenses that are about to be (or were) deleted."""
+    _apply(_deltas((rollup_entry(e) for e in expenses), sign=-1))
+
+
+def move_expense(previous, expense):
+    """
+    Moves an edited expense from the bucket captured in ``previous`` (a
+    ``RollupEntry``) to its current bucket. Amount-only edits touch one row.
+    """
+    deltas = _deltas([previous], sign=-1)
+    _deltas([rollup_entry(expense)], into=deltas)
+    _apply(deltas)
+
+
+def collect_deltas(expenses, deltas=None, sign=1):
+    """
+    Accumulates the bucket deltas for ``expenses`` without writing them, so
+    batch writers can fold many chunks together and call ``apply_deltas`` once.
+    ``expenses`` may also be ``RollupEntry`` snapshots; ``sign=-1`` debits.
+    """
+    entries = (e if isinstance(e, RollupEntry) else rollup_entry(e) for e in expenses)
+    return _deltas(entries, sign=sign, into=deltas)
+
+
+def apply_deltas(deltas):
+    """Writes accumulated deltas with one read and a few bulk statements."""
+    _apply_bulk(deltas)
+
+
+def _deltas(entries, sign=1, into=None):
+    deltas = into if into is not None else defaultdict(lambda: [0, 0])
+    for entry in entries:
+        delta = deltas[entry[:5]]
+        delta[0] += sign * entry.amount
+        delta[1] += sign
+    return deltas
+
+
+def _apply(deltas):
+    with transaction.atomic():
+        for (user_id, date, category_id, payment_mode, currency), (amount, count) in deltas.items():
+            if not amount and not count:
+                continue
+            amount = from_minor(amount)
+
+            bucket = ExpenseDailyRollup.objects.filter(
+                user_id=user_id,
+                date=date,
+                category_id=category_id,
+                payment_mode=payment_mode,
+                currency=currency,
+            )
+            # Buckets that would drop to zero expenses are removed outright.
+            if count < 0 and bucket.filter(count__lte=-count).delete()[0]:
+                continue
+            if bucket.update(total=F("total") + amount, count=F("count") + count):
+                continue
+            if count <= 0:
+                continue
+
+            try:
+                with transaction.atomic():
+                    ExpenseDailyRollup.objects.create(
+                        user_id=user_id,
+                        date=date,
+                        category_id=category_id,
+                        payment_mode=payment_mode,
+                        currency=currency,
+                        total=amount,
+                        count=count,
+                    )
+            except IntegrityError:
+                # Another writer created the bucket first.
+                bucket.update(total=F("total") + amount, count=F("count") + count)
+
+        budgets.apply_spend(deltas)
+
+
+def _apply_bulk(deltas):
+    user_ids = {key[0] for key in deltas}
+    dates = [key[1] for key in deltas]
+    with transaction.atomic():
+        existing = {
+            (r.user_id, r.date, r.category_id, r.payment_mode, r.currency): r
+            for r in ExpenseDailyRollup.objects.select_for_update().filter(
+                user_id__in=user_ids, date__gte=min(dates), date__lte=max(dates)
+            )
+        }
+        to_create, to_update, to_delete = [], [], []
+        for key, (minor, count) in deltas.items():
+            amount = from_minor(minor)
+            rollup = existing.get(key)
+            if rollup is None:
+                if count > 0:
+                    user_id, date, category_id, payment_mode, currency = key
+                    to_create.append(ExpenseDailyRollup(
+                        user_id=user_id, date=date, category_id=category_id,
+                        payment_mode=payment_mode, currency=currency, total=amount, count=count,
+                    ))
+            elif rollup.count + count <= 0:
+                to_delete.append(rollup.id)
+            elif amount or count:
+                rollup.total += amount
+                rollup.count += count
+                to_update.append(rollup)
+
+        ExpenseDailyRollup.objects.bulk_create(to_create, batch_size=1000)
+        save_rows(ExpenseDailyRollup, to_update, ["total", "count"])
+        if to_delete:
+            ExpenseDailyRollup.objects.filter(id__in=to_delete).delete()
+
+        budgets.apply_spend(deltas)
+
+
+# ==========================================
+# 🔹 Rebuild / verification
+# ==========================================
+def _expected_rows(user_ids=None):
+    expenses = Expense.objects.all()
+    if user_ids:
+        expenses = expenses.filter(user_id__in=user_ids)
+    return (
+        expenses.values("user_id", "expense_date", "category_id", "payment_mode", "currency")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+
+
+def _rollups(user_ids=None):
+    rollups = ExpenseDailyRollup.objects.all()
+    if user_ids:
+        rollups = rollups.filter(user_id__in=user_ids)
+    return rollups
+
+
+def rebuild_rollups(user_ids=None, batch_size=1000):
+    """Recomputes rollups from the raw Expense table. Returns rows written."""
+    with transaction.atomic():
+        _rollups(user_ids).delete()
+        rows = [
+            ExpenseDailyRollup(
+                user_id=row["user_id"],
+                date=row["expense_date"],
+                category_id=row["category_id"],
+                payment_mode=row["payment_mode"],
+                currency=row["currency"],
+                total=row["total"],
+                count=row["count"],
+            )
+            for row in _expected_rows(user_ids).iterator()
+        ]
+        ExpenseDailyRollup.objects.bulk_create(rows, batch_size=batch_size)
+        # The monthly budget counters are derived from the same buckets.
+        budgets.rebuild_spend(user_ids or None)
+    return len(rows)
+
+
+def verify_rollups(user_ids=None):
+    """
+    Compares rollups against the raw Expense table and returns a list of
+    ``(bucket, expected, actual)`` mismatches, each side ``(total, count)``.
+    """
+    expected = {
+        (r["user_id"], r["expense_date"], r["category_id"], r["payment_mode"], r["currency"]):
+            (r["total"], r["count"])
+        for r in _expected_rows(user_ids).iterator()
+    }
+    actual = {
+        (user_id, date, category_id, payment_mode, currency): (total, count)
+        for user_id, date, category_id, payment_mode, currency, total, count in _rollups(user_ids)
+        .values_list("user_id", "date", "category_id", "payment_mode", "currency", "total", "count")
+        .iterator()
+    }
+    return [
+        (key, expected.get(key), actual.get(key))
+        for key in sorted(set(expected) | set(actual), key=str)
+        if expected.get(key) != actual.get(key)
+    ]
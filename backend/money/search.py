@@ -0,0 +1,209 @@
+"""
+Full-text search over expense titles and notes.
+
+The query is split into words; every word must match the start of a word in
+the title or note ("gro milk" finds "Groceries: milk, eggs"). Results are
+ranked with title matches above note matches, then most recently added
+first. When no
+expense matches, each word is widened to the indexed words within one or
+two typos of it ("grocereis" finds "groceries") and the search runs again.
+
+Each backend searches its own index (migration 0017):
+
+- SQLite: an FTS5 table kept in sync by triggers, ranked by bm25. Typo
+  candidates come from the index's vocabulary and share the word's first
+  letter.
+- PostgreSQL: a GIN index on a weighted ``tsvector``, ranked by ``ts_rank``;
+  the typo fallback uses ``pg_trgm`` word similarity over its own GIN index.
+- Anything else: ``LIKE`` on both columns, newest first, with no fallback.
+
+Only ids are read from the index; the page itself goes through
+``listing.expense_rows`` like every other expense read.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from . import listing
+from .models import Expense
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_TERMS = 8
+# Typo candidates kept per word, closest first.
+MAX_EXPANSIONS = 10
+
+# Keep in sync with the index expression in migration 0017.
+PG_DOCUMENT = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A')"
+    " || setweight(to_tsvector('simple', coalesce(note, '')), 'B')"
+)
+PG_TEXT = "coalesce(title, '') || ' ' || coalesce(note, '')"
+
+_WORD = re.compile(r"\w+")
+
+
+def search_terms(query):
+    """The query's words, lowercased, at most ``MAX_TERMS``."""
+    return _WORD.findall(query.lower())[:MAX_TERMS]
+
+
+def _max_typos(term):
+    return 1 if len(term) <= 5 else 2
+
+
+def _within(a, b, limit):
+    """Whether the edit distance between ``a`` and ``b`` is at most ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+def _distance_rank(term, candidate):
+    return (abs(len(term) - len(candidate)), candidate)
+
+
+# ==========================================
+# 🔹 SQLite (FTS5)
+# ==========================================
+def _fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _sqlite_match(user_id, groups, prefix):
+    """``owner:uN AND {title note}: ((a OR b) AND c*)`` for word ``groups``."""
+    star = "*" if prefix else ""
+    words = " AND ".join(
+        "(" + " OR ".join(_fts_phrase(term) + star for term in group) + ")" for group in groups
+    )
+    return f"owner:u{int(user_id)} AND {{title note}}: ({words})"
+
+
+def _sqlite_ids(cursor, match, limit, offset):
+    cursor.execute(
+        "SELECT rowid FROM money_expense_search WHERE money_expense_search MATCH %s "
+        "ORDER BY bm25(money_expense_search, 0.0, 10.0, 1.0), rowid DESC LIMIT %s OFFSET %s",
+        [match, limit, offset],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _sqlite_candidates(cursor, term):
+    """Indexed title/note words within ``_max_typos`` of ``term``."""
+    limit = _max_typos(term)
+    cursor.execute(
+        "SELECT DISTINCT term FROM money_expense_search_vocab "
+        "WHERE term >= %s AND term < %s AND col IN ('title', 'note') AND length(term) BETWEEN %s AND %s",
+        [term[0], chr(ord(term[0]) + 1), len(term) - limit, len(term) + limit],
+    )
+    close = [candidate for (candidate,) in cursor.fetchall() if _within(term, candidate, limit)]
+    return sorted(close, key=lambda candidate: _distance_rank(term, candidate))[:MAX_EXPANSIONS]
+
+
+def _sqlite_search(user_id, terms, limit, offset):
+    with connection.cursor() as cursor:
+        exact = _sqlite_match(user_id, [[term] for term in terms], prefix=True)
+        ids = _sqlite_ids(cursor, exact, limit, offset)
+        if ids or (offset and _sqlite_ids(cursor, exact, 1, 0)):
+            return ids, False
+
+        groups = [_sqlite_candidates(cursor, term) for term in terms]
+        if not all(groups):
+            return [], True
+        return _sqlite_ids(cursor, _sqlite_match(user_id, groups, prefix=False), limit, offset), True
+
+
+# ==========================================
+# 🔹 PostgreSQL (tsvector + pg_trgm)
+# ==========================================
+def _postgres_ids(cursor, user_id, query, limit, offset):
+    cursor.execute(
+        f"SELECT id FROM money_expense WHERE user_id = %s AND ({PG_DOCUMENT}) @@ to_tsquery('simple', %s) "
+        f"ORDER BY ts_rank({PG_DOCUMENT}, to_tsquery('simple', %s)) DESC, id DESC LIMIT %s OFFSET %s",
+        [user_id, query, query, limit, offset],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _postgres_search(user_id, terms, limit, offset):
+    query = " & ".join(f"{term}:*" for term in terms)
+    with connection.cursor() as cursor:
+        ids = _postgres_ids(cursor, user_id, query, limit, offset)
+        if ids or (offset and _postgres_ids(cursor, user_id, query, 1, 0)):
+            return ids, False
+
+        # <% is "word_similarity() above pg_trgm.word_similarity_threshold" and can use the trigram index.
+        text = " ".join(terms)
+        cursor.execute(
+            f"SELECT id FROM money_expense WHERE user_id = %s AND %s <%% ({PG_TEXT}) "
+            f"ORDER BY word_similarity(%s, {PG_TEXT}) DESC, id DESC LIMIT %s OFFSET %s",
+            [user_id, text, text, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()], True
+
+
+# ==========================================
+# 🔹 Other backends
+# ==========================================
+def _like_search(user_id, terms, limit, offset):
+    expenses = Expense.objects.filter(user_id=user_id)
+    for term in terms:
+        expenses = expenses.filter(Q(title__icontains=term) | Q(note__icontains=term))
+    ids = expenses.order_by("-expense_date", "-id").values_list("id", flat=True)[offset:offset + limit]
+    return list(ids), False
+
+
+_BACKENDS = {"sqlite": _sqlite_search, "postgresql": _postgres_search}
+
+
+def search_ids(user_id, query, limit=DEFAULT_LIMIT, offset=0):
+    """
+    Ids of ``user_id``'s expenses matching ``query``, best match first,
+    and whether the typo fallback produced them.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return [], False
+    return _BACKENDS.get(connection.vendor, _like_search)(user_id, terms, limit, offset)
+
+
+def search_page(user_id, params):
+    """
+    One page of ``search_ids`` results for the ``q``, ``limit``, ``offset``
+    and ``fields`` query parameters, shaped like ``listing.paginate_expenses``.
+    """
+    query = (params.get("q") or "").strip()
+    if not search_terms(query):
+        raise ValueError("'q' must contain at least one word")
+    try:
+        limit = int(params.get("limit") or DEFAULT_LIMIT)
+        offset = int(params.get("offset") or 0)
+    except ValueError:
+        raise ValueError("'limit' and 'offset' must be integers")
+    limit = max(1, min(limit, MAX_LIMIT))
+    offset = max(0, offset)
+    fields = listing.select_fields(params)
+
+    # One extra id tells whether another page exists.
+    ids, fuzzy = search_ids(user_id, query, limit + 1, offset)
+    has_more = len(ids) > limit
+    ids = ids[:limit]
+
+    page_fields = list(dict.fromkeys([*fields, "id"]))
+    expenses = Expense.objects.filter(user_id=user_id, id__in=ids)
+    rows = {row["id"]: row for row in listing.expense_rows(expenses, page_fields)}
+    return {
+        "expenses": [{name: rows[expense_id][name] for name in fields} for expense_id in ids if expense_id in rows],
+        "fuzzy": fuzzy,
+        "next_offset": offset + limit if has_more else None,
+        "has_more": has_more,
+    }
@@ -0,0 +1,36 @@
+"""
+File downloads that the front proxy can serve instead of the worker.
+
+With SENDFILE_HEADER set (``X-Accel-Redirect`` for nginx), a file under one
+of SENDFILE_ROOTS is answered with an empty response naming the file's
+internal URL, and the proxy streams it, so a large PDF doesn't pin a worker
+for the length of the download. Otherwise Django streams the file itself.
+"""
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
+
+
+def _internal_url(path):
+    path = os.path.realpath(path)
+    for root, prefix in settings.SENDFILE_ROOTS.items():
+        root = os.path.realpath(root)
+        if os.path.commonpath([root, path]) == root:
+            relative = os.path.relpath(path, root).replace(os.sep, "/")
+            return prefix.rstrip("/") + "/" + quote(relative)
+    return None
+
+
+def send_file(path, filename, content_type="application/pdf"):
+    """An attachment response for ``path``, offloaded when configured."""
+    url = settings.SENDFILE_HEADER and _internal_url(path)
+    if not url:
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=filename, content_type=content_type)
+
+    response = HttpResponse(content_type=content_type)
+    response[settings.SENDFILE_HEADER] = url
+    response["Content-Disposition"] = content_disposition_header(True, filename)
+    return response
@@ -1,10 +1,13 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Userdetails, Expense, Category
+from .models import Userdetails, Expense, Category, ImportJob, RecurringExpense
+from . import fx, ingest
 
 class UserdetailsSerializer(serializers.ModelSerializer):
     class Meta:
         model = Userdetails
         fields = ['id', 'FullName', 'Email', 'Password', 'RegDate']
+        extra_kwargs = {'Password': {'write_only': True}}
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -20,10 +23,36 @@ class ExpenseSerializer(serializers.ModelSerializer):
     class Meta:
         model = Expense
         fields = [
-            'id', 'user', 'title', 'amount', 'category', 'category_name',
+            'id', 'user', 'title', 'amount', 'currency', 'category', 'category_name',
             'payment_mode', 'note', 'expense_date', 'created_at'
         ]
 
+class RecurringExpenseSerializer(serializers.ModelSerializer):
+    category = CategorySerializer(read_only=True)
+    category_name = serializers.CharField(write_only=True, required=False)
+
+    class Meta:
+        model = RecurringExpense
+        fields = [
+            'id', 'title', 'amount', 'currency', 'category', 'category_name', 'payment_mode', 'note',
+            'frequency', 'interval', 'start_date', 'end_date', 'next_run', 'active', 'created_at'
+        ]
+        read_only_fields = ['next_run', 'created_at']
+
+    def validate_currency(self, value):
+        try:
+            return ingest.clean_currency(value, self.context['user'].currency)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+    def validate(self, attrs):
+        start_date = attrs.get('start_date', getattr(self.instance, 'start_date', None))
+        end_date = attrs.get('end_date', getattr(self.instance, 'end_date', None))
+        if start_date and end_date and end_date < start_date:
+            raise serializers.ValidationError({'end_date': "Must not be before start_date"})
+        return attrs
+
+
 class UserProfileSerializer(serializers.ModelSerializer):
     profile_image_url = serializers.SerializerMethodField()
 
@@ -43,8 +72,28 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'profile_image_url',
         ]
 
+    def validate_currency(self, value):
+        # 💱 Reports convert every expense into this, so it needs exchange rates
+        # (unless it is unchanged).
+        code = value.strip().upper()
+        if self.instance is not None and code == self.instance.currency:
+            return code
+        if not fx.has_rates(code):
+            raise serializers.ValidationError(f"No exchange rates for currency '{code}'")
+        return code
+
     def get_profile_image_url(self, obj):
         request = self.context.get('request')
         if obj.profile_image:
             return request.build_absolute_uri(obj.profile_image.url)
         return request.build_absolute_uri('/media/profile_images/default.png')
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'user', 'format', 'column_mapping', 'date_format', 'status',
+            'progress', 'processed_rows', 'created_count', 'error_count',
+            'errors', 'message', 'created_at', 'started_at', 'finished_at',
+        ]
@@ -0,0 +1,133 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db.models import Case, DateField, F, Q, Sum, Value, When
+from django.utils import timezone
+
+from . import fx
+from .amounts import from_minor, minor_units
+from .models import ExpenseDailyRollup
+
+
+def summary_periods(today, field="expense_date"):
+    """
+    Returns the dashboard windows as (summary_key, breakdown_key, condition).
+
+    ``condition`` is a ``Q`` on ``field`` (``None`` means all rows).
+    Adding a window here costs no extra queries: every window becomes two
+    more conditional aggregates in the same SELECT.
+    """
+    start_of_week = today - timedelta(days=today.weekday())
+    start_of_month = today.replace(day=1)
+    start_of_year = today.replace(month=1, day=1)
+
+    return [
+        ("today", "today", Q(**{field: today})),
+        ("yesterday", "yesterday", Q(**{field: today - timedelta(days=1)})),
+        ("weekly", "weekly", Q(**{f"{field}__gte": start_of_week})),
+        ("monthly", "monthly", Q(**{f"{field}__gte": start_of_month})),
+        ("yearly", "yearly", Q(**{f"{field}__gte": start_of_year})),
+        ("total", "overall", None),
+    ]
+
+
+def _convert_foreign_rows(rows, keys, currency):
+    """Converts the window totals of rows in other currencies into ``currency``, in place."""
+    cells = [
+        (row, f"{key}_total")
+        for row in rows if row["currency"] != currency
+        for key in keys if row[f"{key}_count"]
+    ]
+    if not cells:
+        return
+    converted = fx.convert_minor(
+        [row[name] for row, name in cells],
+        [row["currency"] for row, _ in cells],
+        [row["day"] for row, _ in cells],
+        currency,
+    )
+    for (row, name), total in zip(cells, converted.tolist()):
+        row[name] = total
+
+
+def build_expense_summary(user, today=None):
+    """
+    Computes totals, per-category and per-payment-mode breakdowns for every
+    dashboard window in a single grouped query.
+
+    The daily rollups are grouped by (category, payment_mode, currency) with
+    one conditional SUM pair per window; the per-window category and
+    payment-mode lists are then folded together in Python from that (small)
+    result set. Sums are integer minor units until the response is built.
+
+    Everything is reported in the user's currency, which the same query
+    joins in. Buckets in other currencies are grouped per day as well, and
+    their sums are converted in one batch (money.fx) at each day's rate.
+    """
+    today = today or timezone.now().date()
+    periods = summary_periods(today, field="date")
+
+    annotations = {}
+    for _, key, condition in periods:
+        annotations[f"{key}_total"] = Sum(minor_units("total"), filter=condition)
+        annotations[f"{key}_count"] = Sum("count", filter=condition)
+
+    # Home-currency buckets collapse across days; foreign ones keep theirs.
+    day = Case(When(currency=F("user__currency"), then=Value(None)), default=F("date"), output_field=DateField())
+    rows = list(
+        ExpenseDailyRollup.objects.filter(user=user)
+        .values("category__name", "payment_mode", "currency", home=F("user__currency"), day=day)
+        .annotate(**annotations)
+        .order_by()
+    )
+    currency = rows[0]["home"] if rows else user.currency
+    _convert_foreign_rows(rows, [key for _, key, _ in periods], currency)
+
+    totals = {key: 0 for _, key, _ in periods}
+    by_category = {key: defaultdict(int) for _, key, _ in periods}
+    by_payment = {key: {} for _, key, _ in periods}
+
+    for row in rows:
+        for _, key, _ in periods:
+            count = row[f"{key}_count"]
+            if not count:
+                continue
+            total = row[f"{key}_total"]
+            totals[key] += total
+            by_category[key][row["category__name"]] += total
+
+            payment = by_payment[key].setdefault(
+                row["payment_mode"], {"total_amount": 0, "count": 0}
+            )
+            payment["total_amount"] += total
+            payment["count"] += count
+
+    return {
+        "currency": currency,
+        "summary": {
+            summary_key: from_minor(totals[key]) for summary_key, key, _ in periods
+        },
+        "by_category": {
+            key: sorted(
+                (
+                    {"category__name": name, "total": from_minor(total)}
+                    for name, total in by_category[key].items()
+                ),
+                key=lambda item: item["total"],
+                reverse=True,
+            )
+            for _, key, _ in periods
+        },
+        "by_payment_mode": {
+            key: sorted(
+                (
+                    {"payment_mode": mode, "total_amount": from_minor(values["total_amount"]),
+                     "count": values["count"]}
+                    for mode, values in by_payment[key].items()
+                ),
+                key=lambda item: item["total_amount"],
+                reverse=True,
+            )
+            for _, key, _ in periods
+        },
+    }
@@ -1,3 +1,1706 @@
-from django.test import TestCase
+import csv
+import gzip
+import importlib.util
+import json
+import os
+import runpy
+import shutil
+import tempfile
+import tracemalloc
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.hashers import check_password
+from django.core import mail
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError, connection
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    analytics, batch, budgets, categories, charts, exports, fx, ingest, jobs, listing, outbox, ratelimit, recurring,
+    report_jobs, reports,
+)
+from .management.commands import bench_import_time
+from .models import (
+    Budget, Category, Expense, ExpenseDailyRollup, FxRate, ImportJob, MonthlySpend, OutboundEmail, RecurringExpense,
+    ReportJob, Userdetails,
+)
+from .amounts import format_minor, from_minor, minor_units, to_minor
+from .passwords import hash_password
+from .response_cache import cache_stats, reset_cache_stats
+from .rollups import record_expenses, verify_rollups
+from .sendfile import send_file
+from .smtp_sink import SMTPSink
+from .serializers import ExpenseSerializer
+from .summary import build_expense_summary, summary_periods
+from .tokens import issue_token
+
+
+def authorize(client, user):
+    """Sends ``user``'s API token with every request ``client`` makes."""
+    client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {issue_token(user)}"
+
+
+def use_temporary_dirs(cls, **prefixes):
+    """
+    Points each setting named in ``prefixes`` at a fresh temporary
+    directory for the rest of test class ``cls``; call from setUpClass.
+    The directories are removed when the class finishes.
+    """
+    paths = {}
+    for name, prefix in prefixes.items():
+        directory = tempfile.TemporaryDirectory(prefix=prefix)
+        cls.addClassCleanup(directory.cleanup)
+        paths[name] = directory.name
+    settings_override = override_settings(**paths)
+    settings_override.enable()
+    cls.addClassCleanup(settings_override.disable)
+
+
+class ExpenseSummaryTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(
+            FullName="Test User", Email="test@example.com", Password="secret"
+        )
+        authorize(self.client, self.user)
+        self.food = Category.objects.get(name="Food & Dining")
+        self.transport = Category.objects.get(name="Transport")
+        self.today = timezone.now().date()
+
+    def add(self, amount, days_ago=0, category=None, payment_mode="CASH"):
+        expense = Expense.objects.create(
+            user=self.user,
+            amount=Decimal(amount),
+            category=category or self.food,
+            payment_mode=payment_mode,
+            expense_date=self.today - timedelta(days=days_ago),
+        )
+        record_expenses([expense])
+        return expense
+
+    def test_summary_matches_per_window_aggregates(self):
+        self.add("100.00")
+        self.add("40.50", category=self.transport, payment_mode="UPI")
+        self.add("10.00", days_ago=1)
+        self.add("999.00", days_ago=800, payment_mode="CARD")
+
+        data = build_expense_summary(self.user, today=self.today)
+
+        self.assertEqual(data["summary"]["today"], Decimal("140.50"))
+        self.assertEqual(data["summary"]["yesterday"], Decimal("10.00"))
+        self.assertEqual(data["summary"]["total"], Decimal("1149.50"))
+        self.assertEqual(
+            data["by_category"]["today"],
+            [
+                {"category__name": "Food & Dining", "total": Decimal("100.00")},
+                {"category__name": "Transport", "total": Decimal("40.50")},
+            ],
+        )
+        self.assertEqual(
+            data["by_payment_mode"]["overall"][0],
+            {"payment_mode": "CARD", "total_amount": Decimal("999.00"), "count": 1},
+        )
+        self.assertEqual(
+            data["by_payment_mode"]["today"],
+            [
+                {"payment_mode": "CASH", "total_amount": Decimal("100.00"), "count": 1},
+                {"payment_mode": "UPI", "total_amount": Decimal("40.50"), "count": 1},
+            ],
+        )
+
+    def test_empty_windows_report_zero(self):
+        self.add("5.00", days_ago=800)
+
+        data = build_expense_summary(self.user, today=self.today)
+
+        self.assertEqual(data["summary"]["today"], 0)
+        self.assertEqual(data["by_category"]["today"], [])
+        self.assertEqual(data["by_payment_mode"]["yearly"], [])
+        self.assertEqual(
+            set(data["summary"]), {key for key, _, _ in summary_periods(self.today)}
+        )
+
+    def test_summary_endpoint_query_count_is_constant(self):
+        for i in range(30):
+            self.add("1.00", days_ago=i * 20, payment_mode=("CASH", "UPI", "CARD")[i % 3])
+
+        url = reverse("expense_summary", args=[self.user.id])
+        # Data version (cold response cache), the user, and one query for
+        # every window/category/payment bucket.
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["success"])
+
+
+class ExpenseRollupTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        use_temporary_dirs(cls, REPORT_CACHE_DIR="money-test-reports-", CHART_CACHE_DIR="money-test-charts-")
+
+    def setUp(self):
+        self.user = Userdetails.objects.create(
+            FullName="Rollup User", Email="rollup@example.com", Password="secret"
+        )
+        authorize(self.client, self.user)
+
+    def post_expense(self, **data):
+        payload = {
+            "userId": self.user.id,
+            "title": "Lunch",
+            "amount": "10.00",
+            "category": "Food & Dining",
+            "payment_mode": "CASH",
+            "expense_date": "2025-01-15",
+            **data,
+        }
+        response = self.client.post(reverse("expense"), payload, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["expense"]["id"]
+
+    def buckets(self):
+        return sorted(
+            ExpenseDailyRollup.objects.filter(user=self.user).values_list(
+                "date", "category__name", "payment_mode", "total", "count"
+            ),
+            key=str,
+        )
+
+    def test_views_keep_rollups_current(self):
+        first = self.post_expense()
+        self.post_expense(amount="5.50")
+        self.assertEqual(len(self.buckets()), 1)
+        self.assertEqual(self.buckets()[0][3:], (Decimal("15.50"), 2))
+
+        # Moving an expense to another day and category debits the old bucket.
+        self.post_expense(expenseId=first, expense_date="2025-02-01", category="Transport", amount="7.00")
+        self.assertEqual(
+            [bucket[1:] for bucket in self.buckets()],
+            [
+                ("Food & Dining", "CASH", Decimal("5.50"), 1),
+                ("Transport", "CASH", Decimal("7.00"), 1),
+            ],
+        )
+
+        response = self.client.delete(reverse("delete_expense", args=[first]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.buckets()), 1)
+        self.assertEqual(verify_rollups([self.user.id]), [])
+
+    def test_rebuild_command_repairs_drift(self):
+        self.post_expense()
+        Expense.objects.filter(user=self.user).update(amount=Decimal("99.00"))
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_rollups", "--verify", stdout=StringIO())
+
+        call_command("rebuild_rollups", "--user", str(self.user.id), stdout=StringIO())
+        call_command("rebuild_rollups", "--verify", stdout=StringIO())
+        self.assertEqual(self.buckets()[0][3], Decimal("99.00"))
+
+    def test_report_spans_months_across_years(self):
+        self.post_expense()
+        self.post_expense(expense_date="2024-12-31", category="Transport")
+
+        response = self.client.get(reverse("download_expense_report_by_category", args=[self.user.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/pdf")
+
+
+class AnalyticsTests(TestCase):
+    def series(self):
+        d = datetime.fromisoformat
+        return analytics.from_columns(
+            [d("2024-12-30").date(), d("2025-01-05").date(), d("2025-01-06").date(), d("2025-03-10").date()],
+            [to_minor(Decimal(v)) for v in ("10.50", "4.50", "20.00", "5.00")],
+            ["Food", "Transport", "Food", None],
+            ["CASH", "UPI", "CASH", "CARD"],
+        )
+
+    def test_monthly_totals_are_in_calendar_order(self):
+        monthly = analytics.monthly_totals(self.series())
+
+        self.assertEqual([analytics.month_label(k) for k in monthly.keys], ["Dec 2024", "Jan 2025", "Mar 2025"])
+        # Integer minor units (paise) throughout.
+        self.assertEqual(monthly.totals.dtype, np.int64)
+        self.assertEqual(monthly.totals.tolist(), [1050, 2450, 500])
+        self.assertEqual(analytics.period_deltas(monthly.totals).tolist(), [1400, -1950])
+
+        filled = analytics.monthly_totals(self.series(), fill_gaps=True)
+        self.assertEqual(filled.totals.tolist(), [1050, 2450, 0, 500])
+        self.assertEqual(analytics.rolling_mean(filled.totals, window=2).tolist(), [1050, 1750, 1225, 250])
+
+    def test_weekly_and_label_totals(self):
+        series = self.series()
+        weekly = analytics.weekly_totals(series)
+
+        # 2024-12-30 and 2025-01-05 share the week starting Monday 30 Dec.
+        self.assertEqual([str(analytics.week_start(k)) for k in weekly.keys],
+                         ["2024-12-30", "2025-01-06", "2025-03-10"])
+        self.assertEqual(weekly.totals.tolist(), [1500, 2000, 500])
+        self.assertEqual(analytics.category_totals(series),
+                         [("Food", 3050, 2), (None, 500, 1), ("Transport", 450, 1)])
+        self.assertEqual(analytics.payment_mode_totals(series)[0], ("CASH", 3050, 2))
+        self.assertEqual(analytics.percentiles(series.amounts, q=(50,)), {50: 775})
+        self.assertEqual(analytics.describe(series)["total"], 4000)
+
+    def test_minor_units_round_trip(self):
+        user = Userdetails.objects.create(FullName="M", Email="minor@example.com", Password="x")
+        for amount in ("0.29", "1.10", "99999999.99"):
+            Expense.objects.create(user=user, amount=Decimal(amount), expense_date="2025-01-01")
+
+        minor = list(Expense.objects.filter(user=user).order_by("id").values_list(minor_units("amount"), flat=True))
+        self.assertEqual(minor, [29, 110, 9999999999])
+        self.assertEqual([to_minor(Decimal("0.29")), to_minor("1.1"), to_minor(3)], [29, 110, 300])
+        self.assertEqual(from_minor(29), Decimal("0.29"))
+        self.assertEqual(format_minor(1234550.4), "12,345.50")
+
+    def test_rollup_series_matches_expense_rows(self):
+        user = Userdetails.objects.create(FullName="A", Email="analytics@example.com", Password="x")
+        food = Category.objects.get(name="Food & Dining")
+        expenses = [
+            Expense.objects.create(user=user, amount=Decimal("3.00"), expense_date="2025-02-01", category=food),
+            Expense.objects.create(user=user, amount=Decimal("7.00"), expense_date="2025-02-01", category=food),
+            Expense.objects.create(user=user, amount=Decimal("1.00"), expense_date="2025-04-02", category=food),
+        ]
+        record_expenses(expenses)
+
+        with self.assertNumQueries(1):
+            series = analytics.load_rollup_series(user)
+
+        self.assertEqual(analytics.describe(series)["count"], 3)
+        self.assertEqual(analytics.monthly_totals(series).totals.tolist(), [1000, 100])
+        self.assertEqual(analytics.category_totals(series), [("Food & Dining", 1100, 3)])
+
+
+class QueryPlanTests(TestCase):
+    """EXPLAIN the SQL the hot paths actually run: index range scans, never full scans."""
+
+    def setUp(self):
+        self.user = Userdetails.objects.create(FullName="Plan", Email="plan@example.com", Password="x")
+        authorize(self.client, self.user)
+        self.food = Category.objects.get(name="Food & Dining")
+        expense = Expense.objects.create(user=self.user, amount=Decimal("5.00"),
+                                         expense_date="2025-03-01", category=self.food)
+        record_expenses([expense])
+
+    def explain(self, run):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            self.skipTest(f"No plan assertions for {connection.vendor}")
+        with CaptureQueriesContext(connection) as ctx:
+            run()
+
+        plans = []
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                # Test tables are tiny, so a seq scan would win on cost alone.
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                prefix = "EXPLAIN "
+            else:
+                prefix = "EXPLAIN QUERY PLAN "
+            for query in ctx.captured_queries:
+                if query["sql"].lstrip().upper().startswith("SELECT"):
+                    cursor.execute(prefix + query["sql"])
+                    plans.append("\n".join(str(row[-1]) for row in cursor.fetchall()))
+        return "\n".join(plans)
+
+    def assertIndexScan(self, plan, table, index=None):
+        if connection.vendor == "sqlite":
+            self.assertRegex(plan, rf"SEARCH {table} USING (COVERING )?INDEX {index or ''}")
+            self.assertNotRegex(plan, rf"SCAN {table}\b")
+        else:
+            self.assertRegex(plan, rf"(Index (Only )?Scan using \w+ on|Bitmap Heap Scan on) {table}\b")
+            self.assertNotIn(f"Seq Scan on {table}", plan)
+            if index:
+                self.assertIn(index, plan)
+
+    def test_summary_windows_read_rollups_by_user(self):
+        plan = self.explain(lambda: build_expense_summary(self.user))
+        self.assertIndexScan(plan, "money_expensedailyrollup")
+
+    def test_report_fetch_uses_composite_indexes(self):
+        plan = self.explain(lambda: reports.fetch_report_rows(self.user))
+        self.assertIndexScan(plan, "money_expense", "expense_user_date_idx")
+
+        plan = self.explain(lambda: reports.fetch_report_rows(self.user, self.food.id))
+        self.assertIndexScan(plan, "money_expense", "expense_user_cat_date_idx")
+
+    def test_date_window_pages_use_user_date_index(self):
+        params = {"date_from": "2025-01-01", "date_to": "2025-12-31", "limit": "10"}
+
+        def page():
+            expenses = listing.filter_expenses(Expense.objects.filter(user=self.user), params)
+            return listing.paginate_expenses(expenses, ["id", "amount"], params)
+
+        first = self.explain(page)
+        self.assertIndexScan(first, "money_expense", "expense_user_date_idx")
+
+        params["cursor"] = listing.encode_cursor(datetime(2025, 3, 1).date(), 0)
+        self.assertIndexScan(self.explain(page), "money_expense", "expense_user_date_idx")
+
+
+class GetExpenseTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(
+            FullName="List User", Email="list@example.com", Password="secret"
+        )
+        authorize(self.client, self.user)
+        food = Category.objects.get(name="Food & Dining")
+        transport = Category.objects.get(name="Transport")
+        start = timezone.now().date() - timedelta(days=30)
+        self.expenses = [
+            Expense.objects.create(
+                user=self.user,
+                title=f"Expense {i}",
+                amount=Decimal(i + 1),
+                category=(food, transport)[i % 2],
+                payment_mode=("CASH", "UPI")[i % 2],
+                # Several expenses per day so the cursor must break ties on id.
+                expense_date=start + timedelta(days=i // 3),
+            )
+            for i in range(25)
+        ]
+        self.url = reverse("getexpense", args=[self.user.id])
+
+    def test_default_response_matches_serializer(self):
+        response = self.client.get(self.url)
+
+        expected = ExpenseSerializer(Expense.objects.filter(user=self.user).order_by("id"), many=True).data
+        self.assertEqual(response.json()["expenses"], json.loads(json.dumps(expected)))
+
+    def test_cursor_pagination_walks_every_row_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 7, "fields": "id"}
+            if cursor:
+                params["cursor"] = cursor
+            body = self.client.get(self.url, params).json()
+            seen.extend(item["id"] for item in body["expenses"])
+            self.assertEqual(set(body["expenses"][0]), {"id"})
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+
+        self.assertEqual(seen, sorted(e.id for e in self.expenses))
+
+    def test_filters(self):
+        body = self.client.get(self.url, {
+            "limit": 100, "category": "Transport", "payment_mode": "UPI", "min_amount": "10",
+        }).json()
+
+        self.assertEqual(
+            [Decimal(item["amount"]) for item in body["expenses"]],
+            [Decimal(n) for n in range(10, 26, 2)],
+        )
+        self.assertFalse(body["has_more"])
+
+    def test_category_names_and_ids_filter_separately(self):
+        numeric = Category.objects.create(name=str(self.expenses[0].category_id), is_custom=True, created_by=self.user)
+        Expense.objects.create(user=self.user, title="Numeric", amount=1, category=numeric, expense_date="2025-01-01")
+
+        def titles(params):
+            return {item["title"] for item in self.client.get(self.url, {"limit": 100, **params}).json()["expenses"]}
+
+        self.assertEqual(titles({"category": numeric.name}), {"Numeric"})
+        self.assertEqual(len(titles({"category_id": self.expenses[0].category_id})), 13)
+        self.assertEqual(self.client.get(self.url, {"category_id": "food"}).status_code, 400)
+
+    def test_invalid_params_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {"fields": "password"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"cursor": "not-a-cursor"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"date_from": "yesterday"}).status_code, 400)
+
+    def test_ndjson_stream(self):
+        response = self.client.get(self.url, {"stream": "ndjson", "fields": "id,amount"})
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 25)
+        self.assertEqual(json.loads(lines[0]), {"id": self.expenses[0].id, "amount": "1.00"})
+
+    def test_json_array_stream(self):
+        response = self.client.get(self.url, {"stream": "json", "date_to": str(self.expenses[2].expense_date)})
+
+        self.assertEqual(len(json.loads(b"".join(response.streaming_content))), 3)
+
+
+class BulkUploadTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(
+            FullName="Bulk User", Email="bulk@example.com", Password="secret"
+        )
+        authorize(self.client, self.user)
+
+    def upload(self, payload):
+        file = SimpleUploadedFile("expenses.json", json.dumps(payload).encode(), "application/json")
+        return self.client.post(reverse("bulk_upload_expenses_json"), {"file": file, "userId": self.user.id})
+
+    def test_streaming_reader_handles_small_chunks_and_wrapped_lists(self):
+        entries = [{"title": f"t{i}", "amount": i * 1.5, "note": "ü ,]}"} for i in range(50)]
+        payload = json.dumps({"meta": {"source": ["x", 1]}, "expenses": entries}).encode()
+
+        stream = ingest._JSONStream(BytesIO(payload), chunk_size=7)
+        self.assertEqual(stream.peek(), "{")
+        self.assertEqual(list(ingest.iter_json_entries(BytesIO(payload))), entries)
+
+        with self.assertRaises(ingest.MalformedUpload):
+            list(ingest.iter_json_entries(BytesIO(b'[{"title": "a"}, {"tit')))
+
+    def test_upload_reports_row_errors_and_inserts_valid_rows(self):
+        response = self.upload([
+            {"title": "Rent", "amount": 100.1, "category": "Utilities & Bills", "expense_date": "2025-03-01"},
+            {"title": "Bad amount", "amount": "abc"},
+            {"title": "Bad mode", "payment_mode": "CHEQUE", "expense_date": "2025-03-01"},
+            {"title": "New category", "amount": "2.50", "category": "Pets", "expense_date": "2025-03-02"},
+            "not an object",
+        ])
+
+        body = response.json()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(body["created"], 2)
+        self.assertEqual([error["row"] for error in body["errors"]], [1, 2, 4])
+        self.assertIn("amount", body["errors"][0]["errors"])
+        self.assertTrue(Category.objects.filter(name="Pets").exists())
+        self.assertEqual(verify_rollups([self.user.id]), [])
+
+    def test_ingest_uses_set_based_queries(self):
+        entries = [
+            {"title": f"Row {i}", "amount": 1, "category": f"Bulk {i % 3}", "expense_date": "2025-01-01"}
+            for i in range(500)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            result = ingest.ingest_expenses(self.user, iter(entries), batch_size=250)
+
+        self.assertEqual(result["created"], 500)
+        # Category lookup/insert/re-read, multi-row expense inserts and the
+        # rollup read + bulk write, the budget counters' savepoint; nothing
+        # per row.
+        self.assertLess(len(queries), 30)
+        self.assertEqual(
+            sum("money_category" in q["sql"] for q in queries.captured_queries), 3
+        )
+
+    def test_malformed_upload_is_rejected(self):
+        file = SimpleUploadedFile("expenses.json", b'{"items": []}', "application/json")
+        response = self.client.post(reverse("bulk_upload_expenses_json"), {"file": file, "userId": self.user.id})
+
+        self.assertEqual(response.status_code, 400)
+
+
+    def test_invalid_json_stops_reading_after_one_value(self):
+        upload = BytesIO(b'[{"title": oops ' + b"x" * (4 * ingest.MAX_VALUE_SIZE) + b"}]")
+
+        with self.assertRaises(ingest.MalformedUpload):
+            list(ingest.iter_json_entries(upload))
+        self.assertLess(upload.tell(), 2 * ingest.MAX_VALUE_SIZE)
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(FullName="Batch User", Email="batch@example.com", Password="x")
+        authorize(self.client, self.user)
+        self.expenses = [
+            Expense.objects.create(user=self.user, title=f"e{i}", amount=Decimal("10.00"), expense_date="2025-01-01")
+            for i in range(4)
+        ]
+        record_expenses(self.expenses)
+
+    def batch(self, operations, **extra):
+        return self.client.post(
+            reverse("batch_expenses"), {"operations": operations, **extra}, content_type="application/json"
+        )
+
+    def test_mixed_operations_apply_together(self):
+        first, second = self.expenses[:2]
+        response = self.batch([
+            {"op": "create", "title": "New", "amount": "5.25", "category": "pets", "expense_date": "2025-01-02"},
+            {"op": "update", "id": first.id, "amount": "1.50", "category": "Transport"},
+            {"op": "delete", "id": str(second.id)},
+        ])
+
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((body["created"], body["updated"], body["deleted"]), (1, 1, 1))
+        self.assertTrue(all(result["success"] for result in body["results"]))
+        first.refresh_from_db()
+        self.assertEqual((first.amount, first.title, first.category.name), (Decimal("1.50"), "e0", "Transport"))
+        self.assertFalse(Expense.objects.filter(id=second.id).exists())
+        self.assertEqual(Expense.objects.get(id=body["results"][0]["id"]).category.name, "pets")
+        self.assertEqual(verify_rollups([self.user.id]), [])
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def queries_for(expenses):
+            operations = [{"op": "update", "id": e.id, "amount": "2.00"} for e in expenses]
+            operations += [{"op": "create", "title": "x", "amount": 1, "expense_date": "2025-01-03"}] * len(expenses)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.batch(operations).status_code, 200)
+            return len(queries)
+
+        queries_for(self.expenses[:1])  # warms the principal cache and creates the new bucket
+        self.assertEqual(queries_for(self.expenses[:1]), queries_for(self.expenses))
+
+    def test_invalid_operations_block_an_atomic_batch(self):
+        other = Userdetails.objects.create(FullName="Other", Email="batch2@example.com", Password="x")
+        theirs = Expense.objects.create(user=other, amount=Decimal("3.00"), expense_date="2025-01-01")
+        operations = [
+            {"op": "delete", "id": self.expenses[0].id},
+            {"op": "update", "id": self.expenses[1].id, "amount": "abc"},
+            {"op": "delete", "id": theirs.id},
+            {"op": "rename"},
+        ]
+
+        response = self.batch(operations)
+        self.assertEqual(response.status_code, 400)
+        results = response.json()["results"]
+        self.assertEqual(results[0]["errors"], batch.NOT_APPLIED)
+        self.assertIn("amount", results[1]["errors"])
+        self.assertEqual(results[2]["errors"], {"id": "Expense not found"})
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 4)
+
+        partial = self.batch(operations, atomic=False).json()
+        self.assertEqual([r["success"] for r in partial["results"]], [True, False, False, False])
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 3)
+        self.assertTrue(Expense.objects.filter(id=theirs.id).exists())
+
+
+class BudgetTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(
+            FullName="Budget", Email="budget@example.com", Password="-", monthly_budget=Decimal("100.00"),
+        )
+        authorize(self.client, self.user)
+        self.food = Category.objects.get(name="Food & Dining")
+        self.today = timezone.now().date()
+        Budget.objects.create(user=self.user, category=self.food, amount=Decimal("50.00"))
+
+    def add(self, amount, category=None, day=None):
+        response = self.client.post(reverse("expense"), {
+            "title": "Spend", "amount": amount, "category": (category or self.food).name,
+            "expense_date": (day or self.today).isoformat(),
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["expense"]["id"]
+
+    def spent(self, category=None, month=None):
+        return MonthlySpend.objects.get(
+            user=self.user, month=(month or self.today).replace(day=1), category=category,
+        ).total
+
+    def test_counters_follow_every_write(self):
+        first = self.add("30.00")
+        self.add("5.00", category=Category.objects.get(name="Transport"))
+        last_year = self.today.replace(day=1) - timedelta(days=365)
+        self.add("7.00", day=last_year)
+        batch.apply_operations(self.user, [{"op": "update", "id": first, "amount": "20.00"}])
+
+        self.assertEqual(self.spent(self.food), 2000)
+        self.assertEqual(self.spent(), 2500)
+        self.assertEqual(self.spent(month=last_year), 700)
+
+        self.client.delete(reverse("delete_expense", args=[first]))
+        self.assertEqual(self.spent(self.food), 0)
+        def counters():
+            return sorted(MonthlySpend.objects.exclude(total=0).values_list("month", "category_id", "total"), key=str)
+
+        before = counters()
+        budgets.rebuild_spend([self.user.id])
+        self.assertEqual(counters(), before)
+
+    def test_counter_created_concurrently_is_added_to(self):
+        self.add("10.00")
+        # Another writer's insert lands between this writer's locking read
+        # (which found nothing) and its own insert.
+        real = budgets._locked_counters
+        calls = []
+
+        def racing(changes):
+            calls.append(changes)
+            return {} if len(calls) == 1 else real(changes)
+
+        with mock.patch.object(budgets, "_locked_counters", side_effect=racing):
+            self.add("5.00")
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.spent(self.food), 1500)
+        self.assertEqual(self.spent(), 1500)
+
+    def test_thresholds_alert_once_per_month_in_one_email(self):
+        self.add("45.00")
+        self.assertEqual(
+            list(OutboundEmail.objects.values_list("subject", flat=True)),
+            ["Budget alert: 80% of your Food & Dining budget"],
+        )
+
+        self.add("40.00")
+        alert = OutboundEmail.objects.latest("id")
+        self.assertEqual(alert.subject, f"Budget alerts for {self.today:%B %Y}")
+        self.assertIn("Food & Dining: 100% of your monthly budget reached (Rs 85.00 of Rs 50.00).", alert.body)
+        self.assertIn("Overall: 80%", alert.body)
+
+        self.add("1.00")
+        self.assertEqual(OutboundEmail.objects.count(), 2)
+
+    def test_endpoint_reads_counters_not_expenses(self):
+        self.add("40.00")
+        self.add("10.00", category=Category.objects.get(name="Transport"))
+        url = reverse("budget", args=[self.user.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertFalse(any('"money_expense"' in query["sql"] for query in queries))
+
+        data = response.json()
+        self.assertEqual(data["overall"]["utilization"], 50.0)
+        self.assertEqual(data["categories"][0]["category"], "Food & Dining")
+        self.assertEqual(data["categories"][0]["utilization"], 80.0)
+        self.assertIsNone(data["categories"][1]["utilization"])
+
+        response = self.client.post(url, {"category": "Transport", "amount": "20"}, content_type="application/json")
+        self.assertEqual(response.json()["categories"][1]["utilization"], 50.0)
+        self.assertEqual(self.client.post(url, {"amount": "20"}, content_type="application/json").status_code, 400)
+        self.assertEqual(self.client.get(url, {"month": "May"}).status_code, 400)
+
+
+class RecurringTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(FullName="Recurring", Email="recurring@example.com", Password="-")
+        authorize(self.client, self.user)
+
+    def schedule(self, **fields):
+        fields = {"user": self.user, "title": "Rent", "amount": Decimal("500.00"), **fields}
+        fields.setdefault("next_run", fields["start_date"])
+        return RecurringExpense.objects.create(**fields)
+
+    def test_month_ends_clamp_without_drifting(self):
+        rent = self.schedule(start_date=date(2025, 1, 31))
+        result = recurring.materialize_due(date(2025, 4, 30))
+
+        self.assertEqual(result, {"schedules": 1, "created": 4})
+        self.assertEqual(
+            list(rent.expense_set.order_by("occurrence").values_list("occurrence", flat=True)),
+            [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30)],
+        )
+        rent.refresh_from_db()
+        self.assertEqual(rent.next_run, date(2025, 5, 31))
+
+    def test_runs_are_idempotent_and_stop_at_the_end_date(self):
+        gym = self.schedule(
+            start_date=date(2025, 3, 1), end_date=date(2025, 3, 20), frequency=RecurringExpense.WEEKLY, interval=2,
+        )
+        recurring.materialize_due(date(2025, 3, 10))
+        # A crashed run that created the occurrence but never moved next_run.
+        RecurringExpense.objects.filter(id=gym.id).update(next_run=date(2025, 3, 1))
+        recurring.materialize_due(date(2025, 4, 30))
+        recurring.materialize_due(date(2025, 4, 30))
+
+        self.assertEqual(
+            sorted(gym.expense_set.values_list("occurrence", flat=True)), [date(2025, 3, 1), date(2025, 3, 15)],
+        )
+        gym.refresh_from_db()
+        self.assertFalse(gym.active)
+        self.assertEqual(verify_rollups([self.user.id]), [])
+
+    def test_backends_without_conflict_targets_update_in_place(self):
+        # MySQL: no ON CONFLICT (id), so existing rollups and counters go through bulk_update().
+        self.schedule(start_date=date(2025, 1, 1), frequency=RecurringExpense.DAILY)
+        self.schedule(start_date=date(2025, 1, 1), frequency=RecurringExpense.DAILY, title="Coffee")
+        with mock.patch.object(connection.features, "supports_update_conflicts_with_target", False):
+            recurring.materialize_due(date(2025, 1, 3), batch_size=1)
+
+        self.assertEqual(verify_rollups([self.user.id]), [])
+        self.assertEqual(
+            MonthlySpend.objects.get(user=self.user, month=date(2025, 1, 1), category=None).total, 6 * 50000,
+        )
+
+    def test_endpoint_catches_up_past_occurrences(self):
+        start = timezone.now().date() - timedelta(days=2)
+        response = self.client.post(reverse("recurring_expenses", args=[self.user.id]), {
+            "title": "Coffee", "amount": "3.50", "frequency": "DAILY", "category_name": "Food & Dining",
+            "start_date": start.isoformat(),
+        }, content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        schedule = response.json()["recurring"]
+        self.assertEqual(schedule["next_run"], (start + timedelta(days=3)).isoformat())
+        self.assertEqual(Expense.objects.filter(recurring_id=schedule["id"], category__name="Food & Dining").count(), 3)
+        self.assertEqual(MonthlySpend.objects.filter(user=self.user, category=None).aggregate(total=Sum("total"))["total"], 1050)
+
+        url = reverse("recurring_expense", args=[self.user.id, schedule["id"]])
+        self.assertEqual(
+            self.client.post(url, {"end_date": (start - timedelta(days=1)).isoformat()},
+                             content_type="application/json").status_code,
+            400,
+        )
+        self.assertEqual(self.client.delete(url).status_code, 200)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 3)
+
+    def test_extending_the_end_date_reactivates_the_schedule(self):
+        start = timezone.now().date() - timedelta(days=10)
+        gym = self.schedule(start_date=start, end_date=start + timedelta(days=1), frequency=RecurringExpense.DAILY)
+        recurring.materialize_due()
+        gym.refresh_from_db()
+        self.assertFalse(gym.active)
+
+        url = reverse("recurring_expense", args=[self.user.id, gym.id])
+        response = self.client.post(url, {"end_date": None}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["recurring"]["active"])
+        self.assertEqual(gym.expense_set.count(), 11)
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(FullName="Search", Email="search@example.com", Password="-")
+        authorize(self.client, self.user)
+        other = Userdetails.objects.create(FullName="Other", Email="other-search@example.com", Password="-")
+        ingest.ingest_expenses(self.user, [
+            {"title": "Weekly groceries", "amount": "40", "expense_date": "2025-01-01", "note": "milk, eggs"},
+            {"title": "Dinner out", "amount": "25", "expense_date": "2025-01-02", "note": "groceries were closed"},
+            {"title": "Bus pass", "amount": "15", "expense_date": "2025-01-03"},
+        ])
+        ingest.ingest_expenses(other, [{"title": "Groceries", "amount": "9", "expense_date": "2025-01-01"}])
+
+    def search(self, q, **params):
+        response = self.client.get(reverse("search_expenses", args=[self.user.id]), {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def titles(self, q, **params):
+        return [expense["title"] for expense in self.search(q, **params)["expenses"]]
+
+    def test_prefix_matches_rank_titles_first_and_page(self):
+        self.assertEqual(self.titles("groc"), ["Weekly groceries", "Dinner out"])
+        self.assertEqual(self.titles("gro milk"), ["Weekly groceries"])
+
+        first = self.search("groc", limit=1, fields="title")
+        self.assertEqual((first["expenses"], first["next_offset"]), ([{"title": "Weekly groceries"}], 1))
+        last = self.search("groc", limit=1, offset=1)
+        self.assertEqual(([e["title"] for e in last["expenses"]], last["has_more"]), (["Dinner out"], False))
+        self.assertEqual(self.client.get(reverse("search_expenses", args=[self.user.id]), {"q": " ?"}).status_code, 400)
+
+    def test_typos_fall_back_to_fuzzy_matches(self):
+        result = self.search("grocereis")
+        self.assertTrue(result["fuzzy"])
+        self.assertEqual([e["title"] for e in result["expenses"]], ["Weekly groceries", "Dinner out"])
+        self.assertEqual(self.titles("xylophone"), [])
+
+    def test_index_follows_writes(self):
+        bus = Expense.objects.get(user=self.user, title="Bus pass")
+        batch.apply_operations(self.user, [{"op": "update", "id": bus.id, "title": "Train ticket"}])
+        self.assertEqual(self.titles("bus"), [])
+        self.assertEqual(self.titles("train"), ["Train ticket"])
+
+        self.client.delete(reverse("delete_expense", args=[bus.id]))
+        self.assertEqual(self.titles("train"), [])
+
+
+class CategoryTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(FullName="Cat User", Email="cat@example.com", Password="x")
+        self.other = Userdetails.objects.create(FullName="Other Cat", Email="cat2@example.com", Password="x")
+
+    def test_names_resolve_case_insensitively_per_user(self):
+        food = Category.objects.get(name="Food & Dining")
+        self.assertEqual(categories.resolve_category(self.user.id, "  food &  DINING "), food.id)
+
+        pets = categories.resolve_category(self.user.id, "Pets")
+        self.assertEqual(categories.resolve_category(self.user.id, "PETS"), pets)
+        self.assertNotEqual(categories.resolve_category(self.other.id, "pets"), pets)
+        self.assertEqual(
+            list(Category.objects.filter(key="pets").values_list("name", "created_by", "is_custom")),
+            [("Pets", self.user.id, True), ("pets", self.other.id, True)],
+        )
+
+    def test_uploads_with_mixed_case_share_one_category(self):
+        ingest.ingest_expenses(self.user, iter([
+            {"title": "a", "amount": 1, "category": "Gym", "expense_date": "2025-01-01"},
+            {"title": "b", "amount": 2, "category": "gym ", "expense_date": "2025-01-02"},
+        ]))
+        self.assertEqual(Expense.objects.filter(user=self.user).values("category").distinct().count(), 1)
+
+    def test_committed_ids_are_served_from_memory(self):
+        other = Category.objects.get(name="Other").id
+        with self.captureOnCommitCallbacks(execute=True):
+            gym = categories.resolve_category(self.user.id, "Gym")
+        # The test transaction still rolls back; don't leak the id to other tests.
+        self.addCleanup(categories.forget_category, "default", self.user.id, "gym")
+        with self.assertNumQueries(0):
+            self.assertEqual(categories.resolve_category(self.user.id, "gym"), gym)
+            self.assertEqual(categories.default_category_id(), other)
+
+        # An uncommitted insert is never cached, so a rollback can't leave it behind.
+        categories.resolve_category(self.user.id, "Books")
+        with self.assertNumQueries(1):
+            categories.resolve_category(self.user.id, "Books")
+
+        # Deleting a category drops its entry.
+        Category.objects.get(id=gym).delete()
+        self.assertNotEqual(categories.resolve_category(self.user.id, "Gym"), gym)
+
+
+@override_settings(IMPORT_WORKER_THREADS=0)
+class ImportJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        use_temporary_dirs(cls, MEDIA_ROOT="money-test-media-")
+
+    def setUp(self):
+        self.user = Userdetails.objects.create(
+            FullName="Import User", Email="import@example.com", Password="secret"
+        )
+        authorize(self.client, self.user)
+
+    def submit(self, name, content, **data):
+        file = SimpleUploadedFile(name, content)
+        response = self.client.post(reverse("import_expenses"), {"file": file, "userId": self.user.id, **data})
+        self.assertEqual(response.status_code, 202)
+        return response.json()["job_id"]
+
+    def test_csv_import_runs_in_background_worker(self):
+        job_id = self.submit("expenses.csv", (
+            "Title,Amount,Category,Payment_Mode,Expense_Date\n"
+            "Rent,\"1,200.00\",Utilities & Bills,bank transfer,2025-03-01\n"
+            "Coffee,abc,Food & Dining,CASH,2025-03-02\n"
+            "Taxi,150,Transport,upi,2025-03-03\n"
+        ).encode())
+
+        self.assertEqual(ImportJob.objects.get(id=job_id).status, ImportJob.PENDING)
+        call_command("run_import_worker", "--once", stdout=StringIO())
+
+        job = self.client.get(reverse("import_status", args=[job_id])).json()["job"]
+        self.assertEqual(job["status"], ImportJob.DONE)
+        self.assertEqual((job["created_count"], job["error_count"]), (2, 1))
+        self.assertEqual(job["errors"][0]["row"], 1)
+        self.assertEqual(
+            sorted(Expense.objects.filter(user=self.user).values_list("amount", "payment_mode")),
+            [(Decimal("150.00"), "UPI"), (Decimal("1200.00"), "BANK_TRANSFER")],
+        )
+        self.assertEqual(verify_rollups([self.user.id]), [])
+
+        progress = self.client.get(reverse("import_progress", args=[job_id])).json()
+        self.assertEqual((progress["status"], progress["progress"]), (ImportJob.DONE, 100))
+
+    def stale_job(self):
+        """A job whose worker died after committing the first batch (rows 0-1)."""
+        job_id = self.submit("expenses.csv", (
+            "Title,Amount,Expense_Date\n"
+            "Rent,1200,2025-03-01\n"
+            "Coffee,abc,2025-03-02\n"
+            "Taxi,150,2025-03-03\n"
+            "Tea,xyz,2025-03-04\n"
+        ).encode())
+        Expense.objects.create(user=self.user, title="Rent", amount=Decimal("1200"), expense_date="2025-03-01")
+        ImportJob.objects.filter(id=job_id).update(
+            status=ImportJob.RUNNING, started_at=timezone.now(), heartbeat_at=timezone.now(),
+            processed_rows=2, created_count=1, error_count=1, errors=[{"row": 1, "errors": {"amount": "x"}}],
+        )
+        return job_id
+
+    def test_stale_running_job_is_reclaimed_and_resumes(self):
+        job_id = self.stale_job()
+        self.assertIsNone(jobs.claim_job())
+        ImportJob.objects.filter(id=job_id).update(
+            heartbeat_at=timezone.now() - jobs.STALE_JOB_AFTER - timedelta(seconds=1),
+        )
+        call_command("run_import_worker", "--once", stdout=StringIO())
+
+        job = ImportJob.objects.get(id=job_id)
+        self.assertEqual((job.status, job.created_count, job.error_count), (ImportJob.DONE, 2, 2))
+        self.assertEqual([error["row"] for error in job.errors], [1, 3])
+        self.assertEqual(
+            sorted(Expense.objects.filter(user=self.user).values_list("title", flat=True)), ["Rent", "Taxi"],
+        )
+
+    def test_progress_renews_the_lease(self):
+        job_id = self.submit("expenses.csv", b"Title,Amount,Expense_Date\nRent,1200,2025-03-01\n")
+        claimed = jobs.claim_job(job_id)
+        jobs.run_job(claimed)
+
+        job = ImportJob.objects.get(id=job_id)
+        self.assertEqual(job.status, ImportJob.DONE)
+        self.assertGreater(job.heartbeat_at, claimed.heartbeat_at)
+
+    def test_worker_stops_when_its_job_is_reclaimed(self):
+        job_id = self.submit("expenses.csv", b"Title,Amount,Expense_Date\nRent,1200,2025-03-01\n")
+        job = jobs.claim_job(job_id)
+        ImportJob.objects.filter(id=job_id).update(heartbeat_at=timezone.now() + timedelta(seconds=1))
+
+        with self.assertLogs("money.jobs", "WARNING"):
+            jobs.run_job(job)
+
+        self.assertFalse(Expense.objects.filter(user=self.user).exists())
+        self.assertEqual(ImportJob.objects.get(id=job_id).status, ImportJob.RUNNING)
+
+    @override_settings(IMPORT_WORKER_THREADS=1, IMPORT_SWEEP_INTERVAL=60)
+    def test_in_process_sweep_picks_up_orphaned_jobs(self):
+        job_id = self.stale_job()
+        ImportJob.objects.filter(id=job_id).update(heartbeat_at=timezone.now() - jobs.STALE_JOB_AFTER * 2)
+        pool = mock.Mock(submit=lambda task: task())
+
+        with mock.patch.object(jobs, "_get_executor", return_value=pool), \
+                mock.patch.object(jobs, "_schedule_sweep") as next_sweep, \
+                mock.patch.object(jobs.connections, "close_all"):
+            jobs._sweep()
+
+        self.assertEqual(ImportJob.objects.get(id=job_id).status, ImportJob.DONE)
+        next_sweep.assert_called_once_with(60)
+
+    def test_bank_statement_import_skips_credits(self):
+        job_id = self.submit("statement.csv", (
+            "Date,Description,Reference,Debit,Credit\n"
+            "01/04/2025,GROCERY MART,TX1,\"2,500.50\",\n"
+            "02/04/2025,SALARY,TX2,,50000\n"
+            "03/04/2025,ELECTRICITY,TX3,1800,\n"
+        ).encode(), format="bank")
+
+        jobs.process_next_job(job_id)
+
+        self.assertEqual(ImportJob.objects.get(id=job_id).created_count, 2)
+        expense = Expense.objects.get(user=self.user, title="GROCERY MART")
+        self.assertEqual(
+            (expense.amount, expense.expense_date.isoformat(), expense.payment_mode, expense.note),
+            (Decimal("2500.50"), "2025-04-01", "BANK_TRANSFER", "TX1"),
+        )
+
+    def test_column_mapping_and_missing_columns(self):
+        ok = self.submit("custom.csv", b"When,What,Cost\n2025-01-02,Book,12\n", mapping=json.dumps({
+            "expense_date": "When", "title": "What", "amount": "Cost",
+        }))
+        broken = self.submit("broken.csv", b"Title,Total\nLunch,5\n", mapping=json.dumps({"amount": "Cost"}))
+
+        jobs.process_next_job(ok)
+        jobs.process_next_job(broken)
+
+        self.assertEqual(ImportJob.objects.get(id=ok).created_count, 1)
+        self.assertTrue(Expense.objects.filter(user=self.user, title="Book", amount=12).exists())
+        failed = ImportJob.objects.get(id=broken)
+        self.assertEqual(failed.status, ImportJob.FAILED)
+        self.assertIn("Cost", failed.message)
+
+    @skipUnless(importlib.util.find_spec("openpyxl"), "openpyxl not installed")
+    def test_xlsx_import(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(["title", "amount", "expense_date"])
+        sheet.append(["Books", 499.99, datetime(2025, 5, 1)])
+        buffer = BytesIO()
+        workbook.save(buffer)
+
+        job_id = self.submit("expenses.xlsx", buffer.getvalue())
+        jobs.process_next_job(job_id)
+
+        job = ImportJob.objects.get(id=job_id)
+        self.assertEqual(job.created_count, 1, job.message)
+        self.assertEqual(Expense.objects.get(user=self.user).amount, Decimal("499.99"))
+
+    def test_unsupported_format_is_rejected(self):
+        file = SimpleUploadedFile("expenses.pdf", b"%PDF")
+        response = self.client.post(reverse("import_expenses"), {"file": file, "userId": self.user.id})
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(REPORT_WORKER_PROCESSES=0)
+class ReportJobTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        use_temporary_dirs(cls, REPORT_CACHE_DIR="money-test-reports-", CHART_CACHE_DIR="money-test-charts-")
+
+    def setUp(self):
+        self.user = Userdetails.objects.create(
+            FullName="Report User", Email="report@example.com", Password="secret"
+        )
+        authorize(self.client, self.user)
+        self.expense = Expense.objects.create(
+            user=self.user, amount=Decimal("42.00"), expense_date="2025-06-01",
+            category=Category.objects.get(name="Transport"),
+        )
+        record_expenses([self.expense])
+
+    def request_report(self, **data):
+        return self.client.post(reverse("request_expense_report", args=[self.user.id]), data)
+
+    def test_request_poll_and_fetch(self):
+        response = self.request_report()
+        job_id = response.json()["job_id"]
+
+        status_body = self.client.get(reverse("expense_report_status", args=[job_id])).json()
+        self.assertEqual(status_body["status"], ReportJob.DONE)
+
+        pdf = self.client.get(reverse("fetch_expense_report", args=[job_id]))
+        self.assertEqual(pdf["Content-Type"], "application/pdf")
+        self.assertTrue(b"".join(pdf.streaming_content).startswith(b"%PDF"))
+        # Readable by the nginx sidecar, which runs as a different user.
+        path = report_jobs.cache_path(ReportJob.objects.get(id=job_id).cache_key)
+        self.assertEqual(path.stat().st_mode & 0o777, 0o644)
+
+    def test_unchanged_data_is_served_from_cache(self):
+        first = self.request_report().json()["job_id"]
+
+        with mock.patch("money.reports.build_expense_report") as render:
+            again = self.request_report().json()
+            download = self.client.get(reverse("download_expense_report_by_category", args=[self.user.id]))
+
+        render.assert_not_called()
+        self.assertEqual(again["job_id"], first)
+        self.assertEqual(download.status_code, 200)
+
+    def test_expense_write_invalidates_cached_report(self):
+        first = self.request_report().json()["job_id"]
+        first_key = ReportJob.objects.get(id=first).cache_key
+
+        self.client.delete(reverse("delete_expense", args=[self.expense.id]))
+        self.client.post(reverse("expense"), {
+            "userId": self.user.id, "amount": "5", "expense_date": "2025-06-02",
+        }, content_type="application/json")
+
+        second = self.request_report().json()["job_id"]
+        self.assertNotEqual(second, first)
+        self.assertIsNone(report_jobs.cached_report(first_key))
+        self.assertEqual(self.client.get(reverse("fetch_expense_report", args=[first])).status_code, 410)
+
+    def test_direct_downloads_prune_superseded_renders(self):
+        download = reverse("download_expense_report_by_category", args=[self.user.id])
+        self.assertEqual(self.client.get(download).status_code, 200)
+        first_key = ReportJob.objects.get().cache_key
+        self.assertIsNotNone(report_jobs.cached_report(first_key))
+
+        self.client.post(reverse("expense"), {
+            "userId": self.user.id, "amount": "5", "expense_date": "2025-06-02",
+        }, content_type="application/json")
+        self.assertEqual(self.client.get(download).status_code, 200)
+        self.assertIsNone(report_jobs.cached_report(first_key))
+
+    def test_category_without_expenses_fails_cleanly(self):
+        other = Category.objects.get(name="Medical & Health")
+        job_id = self.request_report(category_id=other.id).json()["job_id"]
+
+        job = ReportJob.objects.get(id=job_id)
+        self.assertEqual(job.status, ReportJob.FAILED)
+        self.assertEqual(self.client.get(reverse("fetch_expense_report", args=[job_id])).status_code, 409)
+
+
+    def test_category_must_be_one_the_user_can_see(self):
+        stranger = Userdetails.objects.create(FullName="Other", Email="other@example.com", Password="-")
+        theirs = Category.objects.create(name="Secret", is_custom=True, created_by=stranger)
+        download = reverse("download_expense_report_by_category", args=[self.user.id])
+
+        for category_id in ["abc", theirs.id, 10 ** 9]:
+            self.assertEqual(self.request_report(category_id=category_id).status_code, 400)
+            self.assertEqual(self.client.get(download, {"category_id": category_id}).status_code, 400)
+        self.assertFalse(ReportJob.objects.exists())
+        transport = Category.objects.get(name="Transport")
+        self.assertEqual(self.client.get(download, {"category_id": transport.id}).status_code, 200)
+
+class ExpenseReportQueryTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        use_temporary_dirs(cls, CHART_CACHE_DIR="money-test-charts-")
+
+    def setUp(self):
+        self.user = Userdetails.objects.create(
+            FullName="Bulk Report", Email="bulkreport@example.com", Password="secret"
+        )
+        authorize(self.client, self.user)
+        self.categories = list(Category.objects.order_by("id"))
+
+    def add_expenses(self, count):
+        start = datetime(2024, 1, 1).date()
+        Expense.objects.bulk_create(
+            [
+                Expense(
+                    user=self.user, title=f"Expense {i}", amount=Decimal(i % 500) + Decimal("0.25"),
+                    expense_date=start + timedelta(days=i % 400),
+                    category=self.categories[i % len(self.categories)],
+                )
+                for i in range(count)
+            ],
+            batch_size=2000,
+        )
+
+    def test_report_uses_constant_number_of_queries(self):
+        self.add_expenses(30)
+        call_command("rebuild_rollups", stdout=StringIO())
+
+        # Statistics, charts and the detail table all come from one fetch.
+        with self.assertNumQueries(1):
+            pdf = reports.build_expense_report(self.user)
+        self.assertTrue(pdf.startswith(b"%PDF"))
+
+        category = self.categories[0]
+        with self.assertNumQueries(1):
+            reports.build_expense_report(self.user, category.id)
+
+    def test_report_rows_for_50k_expenses_in_one_query(self):
+        self.add_expenses(50_000)
+
+        tracemalloc.start()
+        try:
+            with self.assertNumQueries(1):
+                rows = reports.fetch_report_rows(self.user)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        self.assertEqual(len(rows.amounts), 50_000)
+        self.assertEqual(rows.categories[0], self.categories[0].name)
+        self.assertEqual(rows.dates, sorted(rows.dates))
+        # ~15 MB measured; hydrating Expense instances costs several times that.
+        self.assertLess(peak, 32 * 1024 * 1024)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(FullName="Export User", Email="export@example.com", Password="x")
+        authorize(self.client, self.user)
+        self.food = Category.objects.get(name="Food & Dining")
+        Expense.objects.create(user=self.user, title="Lunch", amount=Decimal("12.50"),
+                               expense_date="2025-01-02", category=self.food, note="=HYPERLINK(1)")
+        Expense.objects.create(user=self.user, title="Bus, return", amount=Decimal("3.00"),
+                               expense_date="2025-01-01", category=Category.objects.get(name="Transport"))
+
+    def export(self, fmt, **extra):
+        response = self.client.get(reverse("export_expenses", args=[self.user.id, fmt]), **extra)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv_streams_rows_in_date_order(self):
+        response, body = self.export("csv")
+        self.assertIn("Expenses_Export User.csv", response["Content-Disposition"])
+        rows = list(csv.reader(StringIO(body.decode("utf-8-sig"))))
+        self.assertEqual(rows[0], list(exports.HEADER))
+        self.assertEqual(rows[1][:5], ["2025-01-01", "Bus, return", "Transport", "CASH", "3.00"])
+        self.assertEqual(rows[2][5], "'=HYPERLINK(1)")
+
+        _, filtered = self.export("csv", QUERY_STRING=f"category_id={self.food.id}")
+        self.assertEqual(len(filtered.decode("utf-8-sig").splitlines()), 2)
+        self.assertEqual(self.client.get(reverse("export_expenses", args=[self.user.id, "ods"])).status_code, 400)
+
+    def test_csv_is_gzipped_when_accepted(self):
+        _, plain = self.export("csv")
+        response, body = self.export("csv", HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(body), plain)
+
+    def test_csv_is_chunked(self):
+        rows = [(datetime(2025, 1, 1).date(), f"t{i}", "Other", "CASH", Decimal("1.00"), "", "INR") for i in range(5)]
+        self.assertEqual(len(list(exports.iter_csv(iter(rows), chunk_rows=2))), 4)
+
+    @skipUnless(importlib.util.find_spec("openpyxl"), "openpyxl not installed")
+    def test_xlsx_opens_as_a_workbook(self):
+        from openpyxl import load_workbook
+
+        _, body = self.export("xlsx")
+        sheet = load_workbook(BytesIO(body)).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(rows[0], exports.HEADER)
+        self.assertEqual(rows[1][:5], (datetime(2025, 1, 1), "Bus, return", "Transport", "CASH", 3))
+        self.assertEqual(rows[2][5], "=HYPERLINK(1)")
+
+
+@override_settings(FX_BASE_CURRENCY="EUR")
+class CurrencyTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(FullName="FX", Email="fx@example.com", Password="-")
+        authorize(self.client, self.user)
+        self.food = Category.objects.get(name="Food & Dining")
+        self.addCleanup(fx.clear_rates_cache)
+        # Per euro: 1 USD = 81.8181.. INR on the 1st, 90 INR on the 3rd.
+        fx.store_rates([
+            ("USD", datetime(2025, 1, 1).date(), 1.10),
+            ("INR", datetime(2025, 1, 1).date(), 90.0),
+            ("USD", datetime(2025, 1, 3).date(), 1.00),
+        ])
+
+    def add(self, amount, currency, day):
+        expense = Expense.objects.create(
+            user=self.user, amount=Decimal(amount), currency=currency,
+            category=self.food, expense_date=f"2025-01-{day:02d}",
+        )
+        record_expenses([expense])
+        return expense
+
+    def test_rates_carry_forward_between_fixings(self):
+        day = datetime(2025, 1, 1).date()
+        self.assertEqual(fx.rate("USD", day), 1.10)
+        self.assertEqual(fx.rate("USD", day + timedelta(days=1)), 1.10)
+        self.assertEqual(fx.rate("USD", day + timedelta(days=30)), 1.00)
+        self.assertEqual(fx.rate("USD", day - timedelta(days=30)), 1.10)
+        self.assertEqual(fx.rate("EUR", day), 1.0)
+        with self.assertRaises(fx.MissingRate):
+            fx.rate("JPY", day)
+
+        dates = [day, day, day + timedelta(days=2)]
+        converted = fx.convert_minor([1000, 1000, 1000], ["USD", "INR", "USD"], dates, "INR")
+        self.assertEqual(converted.tolist(), [81818, 1000, 90000])
+
+    def test_read_rates_accepts_long_and_ecb_layouts(self):
+        wide = StringIO("Date,USD,JPY,\n2025-01-02,1.0321,N/A,\n")
+        self.assertEqual(list(fx.read_rates(wide)), [("USD", datetime(2025, 1, 2).date(), 1.0321)])
+        long = StringIO("currency,date,rate\nusd,2025-01-02,1.03\n")
+        self.assertEqual(list(fx.read_rates(long)), [("USD", datetime(2025, 1, 2).date(), 1.03)])
+
+    def test_load_fx_rates_command_invalidates_cached_responses(self):
+        self.add("10.00", "USD", 1)
+        version = Userdetails.objects.get(id=self.user.id).data_version
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write("date,currency,rate\n2025-01-01,USD,1.20\n")
+        self.addCleanup(os.remove, file.name)
+
+        call_command("load_fx_rates", file.name, stdout=StringIO())
+
+        self.assertEqual(FxRate.objects.get(currency="USD", date="2025-01-01").per_base, 1.20)
+        self.assertEqual(fx.rate("USD", datetime(2025, 1, 1).date()), 1.20)
+        self.assertGreater(Userdetails.objects.get(id=self.user.id).data_version, version)
+
+    def test_summary_converts_into_the_users_currency(self):
+        self.add("100.00", "INR", 1)
+        self.add("10.00", "USD", 1)
+        self.add("10.00", "USD", 3)
+
+        data = build_expense_summary(self.user, today=datetime(2025, 1, 3).date())
+
+        self.assertEqual(data["currency"], "INR")
+        self.assertEqual(data["summary"]["total"], Decimal("100.00") + Decimal("818.18") + Decimal("900.00"))
+        self.assertEqual(data["summary"]["today"], Decimal("900.00"))
+        self.assertEqual(data["by_payment_mode"]["overall"][0]["count"], 3)
+
+    def test_reports_and_charts_convert_in_one_pass(self):
+        self.add("100.00", "INR", 1)
+        self.add("10.00", "USD", 3)
+
+        series = analytics.load_rollup_series(self.user)
+        self.assertEqual(series.currency, "INR")
+        self.assertEqual(analytics.describe(series)["total"], 100000)
+        self.assertEqual(charts.chart_data("category", series).currency, "INR")
+        self.assertTrue(reports.build_expense_report(self.user).startswith(b"%PDF"))
+
+    def test_writes_default_to_and_validate_the_currency(self):
+        def post(**payload):
+            return self.client.post(reverse("expense"), {"amount": "5.00", **payload}, content_type="application/json")
+
+        self.assertEqual(post(title="Lunch").json()["expense"]["currency"], "INR")
+        self.assertEqual(post(title="Taxi", currency="usd").json()["expense"]["currency"], "USD")
+        self.assertEqual(post(title="Ramen", currency="JPY").status_code, 400)
+
+        result = batch.apply_operations(self.user, [{"op": "create", "amount": "1.00", "currency": "XYZ"}])
+        self.assertEqual(result["results"][0]["errors"], {"currency": "No exchange rates for currency 'XYZ'"})
+        self.assertEqual(verify_rollups([self.user.id]), [])
+
+    def test_home_currency_without_rates_rejects_foreign_amounts(self):
+        self.add("5.00", "EUR", 1)
+        Userdetails.objects.filter(id=self.user.id).update(currency="GBP")
+        response = self.client.post(
+            reverse("expense"), {"title": "Pasta", "amount": "5.00", "currency": "EUR"}, content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "No exchange rates for your currency 'GBP'")
+
+        # Data that got in anyway (an earlier currency) is a 400, not a crash.
+        response = self.client.get(reverse("expense_summary", args=[self.user.id]))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["message"], "No exchange rates for GBP")
+
+
+class ChartTests(TestCase):
+    def setUp(self):
+        # Fresh memory and disk cache per test.
+        charts.clear_memory_cache()
+        cache_dir = tempfile.TemporaryDirectory(prefix="money-test-charts-")
+        self.addCleanup(cache_dir.cleanup)
+        settings_override = override_settings(CHART_CACHE_DIR=cache_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = Userdetails.objects.create(FullName="Chart User", Email="chart@example.com", Password="x")
+        authorize(self.client, self.user)
+        food = Category.objects.get(name="Food & Dining")
+        transport = Category.objects.get(name="Transport")
+        expenses = [
+            Expense.objects.create(user=self.user, amount=Decimal("12.10"), expense_date="2025-01-03", category=food),
+            Expense.objects.create(user=self.user, amount=Decimal("0.20"), expense_date="2025-01-09", category=food),
+            Expense.objects.create(user=self.user, amount=Decimal("30.00"), expense_date="2025-02-14",
+                                   category=transport, payment_mode="UPI"),
+        ]
+        record_expenses(expenses)
+
+    def get_chart(self, kind, **params):
+        headers = params.pop("headers", {})
+        return self.client.get(reverse("expense_chart", args=[self.user.id, kind]), params, headers=headers)
+
+    def test_chart_endpoint_formats_and_etag(self):
+        png = self.get_chart("monthly")
+        self.assertEqual(png["Content-Type"], "image/png")
+        self.assertTrue(png.content.startswith(b"\x89PNG"))
+
+        not_modified = self.get_chart("monthly", headers={"If-None-Match": png["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+
+        svg = self.get_chart("payment", fmt="svg")
+        self.assertEqual(svg["Content-Type"], "image/svg+xml")
+        self.assertEqual(self.get_chart("weekly").status_code, 200)
+        self.assertEqual(self.get_chart("histogram").status_code, 400)
+
+    def test_report_and_endpoint_share_rendered_charts(self):
+        with mock.patch("money.charts.render", wraps=charts.render) as render:
+            reports.build_expense_report(self.user)
+            self.assertEqual(render.call_count, 2)  # monthly bar + category pie
+
+            # Same totals from the rollups hash to the same cached images.
+            self.get_chart("monthly")
+            self.get_chart("category")
+            charts.clear_memory_cache()
+            self.get_chart("monthly")  # disk hit
+        self.assertEqual(render.call_count, 2)
+
+
+class StartupTests(SimpleTestCase):
+    def heavy_modules_after(self, code):
+        stdout, _ = bench_import_time.run_boot(code)
+        loaded = dict(line.split(" ", 1) for line in stdout.splitlines() if " " in line)
+        return set(filter(None, loaded.get("heavy", "").split(",")))
+
+    def test_api_worker_boots_without_heavy_libraries(self):
+        self.assertEqual(self.heavy_modules_after(bench_import_time.API_BOOT), set())
+
+    def test_report_stack_loads_them_on_demand(self):
+        heavy = self.heavy_modules_after(
+            bench_import_time.API_BOOT + "import money.reports\n"
+        )
+        self.assertEqual(heavy, {"numpy", "matplotlib", "reportlab"})
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        caches["responses"].clear()
+        reset_cache_stats()
+        self.user = Userdetails.objects.create(FullName="Cache User", Email="cache@example.com", Password="x")
+        authorize(self.client, self.user)
+        self.summary_url = reverse("expense_summary", args=[self.user.id])
+        self.add_expense("10.00")
+
+    def add_expense(self, amount):
+        return self.client.post(reverse("expense"), {
+            "userId": self.user.id, "amount": amount, "expense_date": str(timezone.localdate()),
+        }, content_type="application/json")
+
+    def test_unchanged_dashboard_revalidates_without_db_work(self):
+        first = self.client.get(self.summary_url)
+        self.assertEqual(first["X-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            revalidated = self.client.get(self.summary_url, headers={"If-None-Match": first["ETag"]})
+            cached = self.client.get(self.summary_url)
+
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(cached["X-Cache"], "HIT")
+        self.assertEqual(cached.json(), first.json())
+        self.assertEqual(cache_stats()["not_modified"], 1)
+
+    def test_writes_change_the_etag(self):
+        first = self.client.get(self.summary_url)
+        self.add_expense("5.00")
+
+        second = self.client.get(self.summary_url, headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertEqual(Decimal(str(second.json()["summary"]["total"])), Decimal("15.00"))
+
+        profile_url = reverse("view_profile", args=[self.user.id])
+        before = self.client.get(profile_url)
+        self.client.post(reverse("edit_profile"), {"userId": self.user.id, "bio": "Saving up"})
+        after = self.client.get(profile_url, headers={"If-None-Match": before["ETag"]})
+        self.assertEqual(after.json()["profile"]["bio"], "Saving up")
+
+    def test_expense_listing_is_keyed_by_query_and_skips_streams(self):
+        url = reverse("getexpense", args=[self.user.id])
+        full = self.client.get(url)
+        page = self.client.get(url, {"limit": "1"})
+        self.assertNotEqual(full["ETag"], page["ETag"])
+
+        stream = self.client.get(url, {"stream": "ndjson"})
+        self.assertFalse(stream.has_header("ETag"))
+
+        metrics = self.client.get(reverse("response_cache_metrics")).json()["response_cache"]
+        self.assertEqual((metrics["miss"], metrics["bypass"]), (2, 1))
+
+    def test_deleted_user_is_not_served_from_cache(self):
+        profile_url = reverse("view_profile", args=[self.user.id])
+        self.client.get(profile_url)
+        self.client.delete(reverse("delete_user", args=[self.user.id]))
+
+        # The account is gone, so its token no longer authenticates anything.
+        self.assertEqual(self.client.get(profile_url).status_code, 401)
+
+
+
+class ServingTests(TestCase):
+    def test_health_and_readiness(self):
+        health = self.client.get(reverse("health"))
+        self.assertEqual(health.status_code, 200)
+        self.assertEqual(health.json()["status"], "ok")
+
+        ready = self.client.get(reverse("readiness"))
+        self.assertEqual(ready.status_code, 200)
+        self.assertEqual(ready.json()["checks"], {"database": "ok", "cache": "ok"})
+
+    def test_not_ready_without_database(self):
+        with mock.patch.object(connection, "cursor", side_effect=OperationalError("unable to open database file")):
+            ready = self.client.get(reverse("readiness"))
+        self.assertEqual(ready.status_code, 503)
+        self.assertEqual(ready.json()["checks"]["database"], "unable to open database file")
+
+    def test_reports_offload_to_the_proxy_when_configured(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        path = os.path.join(root, "ab", "report 1.pdf")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(b"%PDF-")
+
+        streamed = send_file(path, "Expense_Report.pdf")
+        self.assertEqual(b"".join(streamed.streaming_content), b"%PDF-")
+        streamed.close()
+
+        with override_settings(SENDFILE_HEADER="X-Accel-Redirect", SENDFILE_ROOTS={root: "/internal/reports/"}):
+            offloaded = send_file(path, "Expense_Report.pdf")
+            outside = send_file(__file__, "tests.py", content_type="text/plain")
+        self.assertEqual(offloaded["X-Accel-Redirect"], "/internal/reports/ab/report%201.pdf")
+        self.assertEqual(offloaded.content, b"")
+        self.assertIn('attachment; filename="Expense_Report.pdf"', offloaded["Content-Disposition"])
+        self.assertFalse(outside.has_header("X-Accel-Redirect"))
+        outside.close()
+
+    def test_gunicorn_workers_follow_the_cpu_limit(self):
+        conf = os.path.join(settings.BASE_DIR, "gunicorn.conf.py")
+        with mock.patch.dict(os.environ, {"GUNICORN_CPUS": "2"}):
+            os.environ.pop("WEB_CONCURRENCY", None)
+            self.assertEqual(runpy.run_path(conf)["workers"], 5)
+        with mock.patch.dict(os.environ, {"GUNICORN_CPUS": "2", "WEB_CONCURRENCY": "3", "SERVER_MODE": "asgi"}):
+            loaded = runpy.run_path(conf)
+        self.assertEqual((loaded["workers"], loaded["wsgi_app"]), (3, "backend.asgi:application"))
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.user = Userdetails.objects.create(FullName="Mail User", Email="mail@example.com", Password="x")
+        authorize(self.client, self.user)
+
+    def test_forget_password_queues_instead_of_sending(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(
+                reverse("forget_password"), {"email": "mail@example.com"}, content_type="application/json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(callbacks), 1)  # wakes the sender after commit
+        self.assertEqual(mail.outbox, [])
+
+        queued = OutboundEmail.objects.get()
+        self.user.refresh_from_db()
+        self.assertEqual(queued.to, ["mail@example.com"])
+        self.assertIn(self.user.otp, queued.body)
+
+        self.assertEqual(outbox.drain(), (1, 0))
+        self.assertEqual(mail.outbox[0].alternatives[0][1], "text/html")
+        self.assertEqual(OutboundEmail.objects.get().status, OutboundEmail.SENT)
+
+        unknown = self.client.post(reverse("forget_password"), {"email": "nobody@example.com"})
+        self.assertEqual(unknown.status_code, 401)
+        self.assertEqual(self.client.get(reverse("forget_password")).status_code, 405)
+
+    @override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_DELAY=30)
+    def test_failures_back_off_then_give_up(self):
+        email = outbox.queue_email(["mail@example.com"], "Hi", "Body")
+        with mock.patch("django.core.mail.backends.locmem.EmailBackend.send_messages",
+                        side_effect=ConnectionRefusedError("connection refused")):
+            self.assertEqual(outbox.drain(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), (OutboundEmail.PENDING, 1))
+            self.assertGreater(email.next_attempt_at, timezone.now() + timedelta(seconds=25))
+            self.assertEqual(outbox.drain(), (0, 0))  # not due yet
+
+            OutboundEmail.objects.update(next_attempt_at=timezone.now())
+            with self.assertLogs("money.outbox", "ERROR"):
+                outbox.drain()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.last_error), (OutboundEmail.FAILED, "connection refused"))
+
+    def test_expired_lease_is_claimed_again(self):
+        email = outbox.queue_email(["mail@example.com"], "Hi", "Body")
+        self.assertEqual(len(outbox.claim_due()), 1)
+        self.assertEqual(outbox.claim_due(), [])
+
+        OutboundEmail.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([e.id for e in outbox.claim_due()], [email.id])
+
+    def test_batch_shares_one_smtp_connection(self):
+        with SMTPSink() as sink, override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST=sink.host, EMAIL_PORT=sink.port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="",
+        ):
+            for n in range(3):
+                outbox.queue_email([f"user{n}@example.com"], f"Message {n}", "Body", html_body="<p>Body</p>")
+            self.assertEqual(outbox.drain(), (3, 0))
+
+        self.assertEqual(sink.connections, 1)
+        self.assertEqual([m["Subject"] for _, _, m in sink.messages], ["Message 0", "Message 1", "Message 2"])
+        self.assertEqual(sink.messages[0][1], ["user0@example.com"])
+
+
+@override_settings(PASSWORD_HASH_ITERATIONS=1000)
+class PasswordTests(TestCase):
+    def setUp(self):
+        caches["ratelimit"].clear()
+
+    def login(self, email, password, **extra):
+        return self.client.post(reverse("login"), {"Email": email, "Password": password}, **extra)
+
+    def test_signup_stores_a_hash_and_login_checks_it(self):
+        response = self.client.post(reverse("signup"), {
+            "FullName": "Hash User", "Email": "hash@example.com", "Password": "s3cret-pass",
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertNotIn("Password", response.json()["user"])
+
+        stored = Userdetails.objects.get(Email="hash@example.com").Password
+        self.assertTrue(stored.startswith("pbkdf2_sha256$1000$"))
+        self.assertEqual(self.login("hash@example.com", "s3cret-pass").status_code, 200)
+        self.assertEqual(self.login("hash@example.com", "wrong").status_code, 400)
+        self.assertEqual(self.login("nobody@example.com", "s3cret-pass").status_code, 400)
+
+    def test_plaintext_and_outdated_hashes_upgrade_on_login(self):
+        user = Userdetails.objects.create(FullName="Legacy", Email="legacy@example.com", Password="plain-old")
+        self.assertEqual(self.login("legacy@example.com", "wrong").status_code, 400)
+        user.refresh_from_db()
+        self.assertEqual(user.Password, "plain-old")
+
+        self.assertEqual(self.login("legacy@example.com", "plain-old").status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(check_password("plain-old", user.Password))
+
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertEqual(self.login("legacy@example.com", "plain-old").status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(user.Password.startswith("pbkdf2_sha256$2000$"))
+
+    def test_hash_legacy_passwords_command(self):
+        Userdetails.objects.create(FullName="A", Email="a@example.com", Password="plain")
+        Userdetails.objects.create(FullName="B", Email="b@example.com", Password=hash_password("hashed"))
+        out = StringIO()
+        call_command("hash_legacy_passwords", stdout=out)
+        self.assertIn("1 plaintext passwords hashed", out.getvalue())
+        self.assertTrue(check_password("plain", Userdetails.objects.get(Email="a@example.com").Password))
+
+    def test_password_reset_stores_a_hash(self):
+        user = Userdetails.objects.create(
+            FullName="Reset", Email="reset@example.com", Password="old", otp="123456", otp_created_at=timezone.now()
+        )
+        wrong = self.client.post(reverse("reset_verify_opt"), {"Email": "reset@example.com", "otp": "000000", "Password": "new"})
+        self.assertEqual(wrong.status_code, 400)
+        response = self.client.post(reverse("reset_verify_opt"), {"Email": "reset@example.com", "otp": "123456", "Password": "new"})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertTrue(check_password("new", user.Password))
+
+    @override_settings(RATE_LIMITS={"login-ip": "", "login-email": "3/min"})
+    def test_login_is_throttled_per_account(self):
+        Userdetails.objects.create(FullName="T", Email="t@example.com", Password=hash_password("pw"))
+        for n in range(3):
+            self.assertEqual(self.login("t@example.com", "guess", REMOTE_ADDR=f"10.0.0.{n}").status_code, 400)
+
+        throttled = self.login("T@example.com", "pw", REMOTE_ADDR="10.0.0.9")
+        self.assertEqual(throttled.status_code, 429)
+        self.assertEqual(throttled["Retry-After"], "20")
+        self.assertEqual(self.login("other@example.com", "pw").status_code, 400)
+
+    @override_settings(RATE_LIMITS={"otp-ip": "", "otp-send-email": "1/h"})
+    def test_otp_requests_are_throttled(self):
+        Userdetails.objects.create(FullName="O", Email="otp@example.com", Password="x")
+        self.assertEqual(self.client.post(reverse("forget_password"), {"email": "otp@example.com"}).status_code, 200)
+        again = self.client.post(reverse("forget_password"), {"email": "otp@example.com"})
+        self.assertEqual(again.status_code, 429)
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+
+    @override_settings(RATE_LIMITS={"demo": "2/min"})
+    def test_token_bucket_refills_continuously(self):
+        self.assertEqual([ratelimit.take("demo", "k", now=0) for _ in range(2)], [0, 0])
+        self.assertEqual(ratelimit.take("demo", "k", now=0), 30)
+        self.assertEqual(ratelimit.take("demo", "k", now=15), 15)
+        self.assertEqual(ratelimit.take("demo", "k", now=30), 0)
+        self.assertEqual(ratelimit.take("demo", "other", now=30), 0)
+        self.assertEqual(ratelimit.parse_rate(""), None)
+
+
+class AuthTests(TestCase):
+    def setUp(self):
+        caches["ratelimit"].clear()
+        self.alice = Userdetails.objects.create(FullName="Alice", Email="alice@example.com", Password=hash_password("pw"))
+        self.bob = Userdetails.objects.create(FullName="Bob", Email="bob@example.com", Password=hash_password("pw"))
+
+    def test_login_returns_a_token_that_authenticates(self):
+        summary_url = reverse("expense_summary", args=[self.alice.id])
+        self.assertEqual(self.client.get(summary_url).status_code, 401)
+
+        login = self.client.post(reverse("login"), {"Email": "alice@example.com", "Password": "pw"}).json()
+        self.assertEqual(login["expires_in"], settings.AUTH_TOKEN_TTL)
+        response = self.client.get(summary_url, HTTP_AUTHORIZATION=f"Bearer {login['token']}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_bad_tokens_are_rejected(self):
+        url = reverse("expense_summary", args=[self.alice.id])
+        token = issue_token(self.alice)
+        header, payload, signature = token.split(".")
+        expired = issue_token(self.alice, now=0)
+        for bad in (f"{header}.{payload}.x{signature[1:]}", expired, "not-a-token"):
+            response = self.client.get(url, HTTP_AUTHORIZATION=f"Bearer {bad}")
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="api"')
+
+    def test_users_only_reach_their_own_data(self):
+        authorize(self.client, self.alice)
+        self.assertEqual(self.client.get(reverse("view_profile", args=[self.bob.id])).status_code, 403)
+        self.assertEqual(self.client.post(reverse("bulk_upload_expenses_json"), {
+            "userId": self.bob.id, "file": SimpleUploadedFile("e.json", b"[]"),
+        }).status_code, 403)
+
+        expense = Expense.objects.create(user=self.bob, amount=Decimal("4.00"), expense_date="2025-01-01")
+        job = ImportJob.objects.create(user=self.bob, format="csv")
+        self.assertEqual(self.client.get(reverse("import_status", args=[job.id])).status_code, 404)
+        self.assertEqual(self.client.delete(reverse("delete_expense", args=[expense.id])).status_code, 404)
+        self.assertTrue(Expense.objects.filter(id=expense.id).exists())
+
+    def test_password_change_revokes_old_tokens(self):
+        authorize(self.client, self.alice)
+        url = reverse("view_profile", args=[self.alice.id])
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.alice.Password = hash_password("new")
+        self.alice.save()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_principal_cache_saves_the_user_query(self):
+        authorize(self.client, self.alice)
+        url = reverse("import_status", args=[0])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        # Warm principal: only the job lookup hits the database.
+        with self.assertNumQueries(1):
+            self.client.get(url)
@@ -0,0 +1,37 @@
+"""
+Bulk writes of many rows, portable across the supported databases.
+
+SQLite and PostgreSQL take ``INSERT ... ON CONFLICT (target) DO UPDATE``.
+MySQL has ``ON DUPLICATE KEY UPDATE`` instead, which takes no target, so
+``bulk_create()`` there rejects ``unique_fields``.
+"""
+from django.db import connection
+
+
+def save_rows(model, rows, fields, batch_size=1000):
+    """
+    Writes ``fields`` of existing ``rows`` back. Where the database has a
+    conflict target this is an upsert on the primary key: one INSERT ... ON
+    CONFLICT (id) DO UPDATE instead of ``bulk_update()``'s CASE WHEN id = ...
+    per row, which Django takes far longer to build than the database takes
+    to run. Elsewhere it is ``bulk_update()``.
+    """
+    if not rows:
+        return
+    if connection.features.supports_update_conflicts_with_target:
+        model.objects.bulk_create(
+            rows, batch_size=batch_size, update_conflicts=True, unique_fields=["id"], update_fields=fields,
+        )
+    else:
+        model.objects.bulk_update(rows, fields, batch_size=batch_size)
+
+
+def upsert(model, rows, unique_fields, update_fields, batch_size=1000):
+    """
+    Inserts ``rows``, updating ``update_fields`` of any that collide on
+    ``unique_fields`` (a unique constraint). On MySQL any unique key counts.
+    """
+    target = unique_fields if connection.features.supports_update_conflicts_with_target else None
+    model.objects.bulk_create(
+        rows, batch_size=batch_size, update_conflicts=True, unique_fields=target, update_fields=update_fields,
+    )
@@ -8,15 +8,31 @@ urlpatterns = [
     path('login/',login,name="login"),
     path('expense/',add_or_update_expense,name="expense"),
     path('getexpense/<int:user_Id>/',getexpense,name="getexpense"),
+    path('search/<int:user_id>/',search_expenses,name="search_expenses"),
     path('forgetpassword/',forget_password,name="forget_password"),
     path('reset/',reset_verify_opt,name="reset_verify_opt"),
     path('editexpense/',add_or_update_expense,name="expense"),
+    path('expense/batch/', batch_expenses, name="batch_expenses"),
     path('editprofile/', edit_profile, name="edit_profile"),
     path('viewprofile/<int:user_id>/',view_profile,name="view_profile"),
     path('bulkexpense/',bulk_upload_expenses,name="bulk_upload_expenses_json"),
+    path('import/', import_expenses, name="import_expenses"),
+    path('import/<int:job_id>/', import_status, name="import_status"),
+    path('import/<int:job_id>/progress/', import_progress, name="import_progress"),
     path('summary/<int:user_id>/',expense_summary,name="expense_summary"),
+    path('budget/<int:user_id>/',budget,name="budget"),
+    path('recurring/<int:user_id>/',recurring_expenses,name="recurring_expenses"),
+    path('recurring/<int:user_id>/<int:schedule_id>/',recurring_expense,name="recurring_expense"),
     path('download-expense-report/<int:user_id>/<str:category>/', download_expense_report, name='download_expense_report_by_category'),
     path('download-expense-report/<int:user_id>/', download_expense_report, name='download_expense_report_by_category'),
+    path('export/<int:user_id>/<str:fmt>/', export_expenses, name='export_expenses'),
+    path('reports/<int:user_id>/', request_expense_report, name='request_expense_report'),
+    path('reports/jobs/<int:job_id>/', expense_report_status, name='expense_report_status'),
+    path('reports/jobs/<int:job_id>/download/', fetch_expense_report, name='fetch_expense_report'),
+    path('charts/<int:user_id>/<str:kind>/', expense_chart, name='expense_chart'),
+    path('metrics/cache/', response_cache_metrics, name='response_cache_metrics'),
+    path('health/', health, name='health'),
+    path('ready/', readiness, name='readiness'),
     path('deleteuser/<int:user_id>/', delete_user, name="delete_user"),
     path('api/deleteexpense/<int:id>/',delete_expense, name='delete_expense'),
 
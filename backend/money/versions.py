@@ -0,0 +1,65 @@
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+
+from .models import Userdetails
+
+
+def _version_key(user_id):
+    return f"data-version:{user_id}"
+
+
+def bump_data_version(user_id):
+    """
+    Marks everything derived from a user's data (reports, cached responses)
+    as stale. Call after any expense or profile write.
+    """
+    Userdetails.objects.filter(id=user_id).update(data_version=F("data_version") + 1)
+    forget_cached_version(user_id)
+
+
+def bump_data_versions(user_ids):
+    """``bump_data_version`` for many users with one UPDATE (batch writers)."""
+    user_ids = list(user_ids)
+    Userdetails.objects.filter(id__in=user_ids).update(data_version=F("data_version") + 1)
+    cache = caches["responses"]
+    keys = [_version_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def forget_cached_version(user_id):
+    cache = caches["responses"]
+    key = _version_key(user_id)
+    cache.delete(key)
+    # Again once the write is visible, in case a reader re-cached the old
+    # version from the database in between.
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def get_data_version(user_id):
+    return (
+        Userdetails.objects.filter(id=user_id)
+        .values_list("data_version", flat=True)
+        .first()
+    )
+
+
+def cached_version_token(user_id):
+    """
+    An opaque token that changes with the user's data version, read from the
+    response cache and through to the database on a miss. It also covers the
+    row's creation time, so a recreated user (e.g. after a database reset
+    behind a persistent cache) never matches old entries. ``None`` if the
+    user does not exist.
+    """
+    cache = caches["responses"]
+    key = _version_key(user_id)
+    token = cache.get(key)
+    if token is None:
+        row = Userdetails.objects.filter(id=user_id).values_list("data_version", "RegDate").first()
+        if row is None:
+            return None
+        token = f"{row[0]}-{row[1].timestamp()}"
+        cache.set(key, token)
+    return token
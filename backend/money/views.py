@@ -1,60 +1,135 @@
 # ==========================================
 # 🔹 Django Imports
 # ==========================================
-from django.shortcuts import get_object_or_404
-from django.http import FileResponse
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.db.models import Sum,Count
+from django.conf import settings
+from django.shortcuts import aget_object_or_404, get_object_or_404
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Q
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 
 # ==========================================
 # 🔹 Django REST Framework Imports
 # ==========================================
-from rest_framework.decorators import api_view, parser_classes
+from rest_framework.decorators import api_view, authentication_classes, parser_classes, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
+from rest_framework.views import exception_handler, set_rollback
 from rest_framework import status
 
 # ==========================================
 # 🔹 Project Imports
 # ==========================================
-from .models import Expense, Category, Userdetails
+from .models import Budget, Expense, Category, RecurringExpense, Userdetails, ImportJob, ReportJob
 from .serializers import *
+from .summary import build_expense_summary
+from . import (
+    batch, budgets, categories, exports, fx, ingest, jobs, listing, ratelimit, recurring, report_jobs, rollups, search,
+)
+from .response_cache import cache_stats, cached_user_response
+from .authentication import IsAccountOwner, TokenAuthentication
+from .outbox import queue_email
+from .passwords import burn_hash_time, check_user_password, hash_password
+from .sendfile import send_file
+from .tokens import issue_token
+from .versions import bump_data_version, forget_cached_version
 
 # ==========================================
 # 🔹 Python Standard Library
 # ==========================================
 import os
+import json
 import random
-import calendar
-import pandas as pd
-from io import BytesIO
+import socket
+import functools
+import math
 from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+
 
 # ==========================================
-# 🔹 ReportLab (PDF Generation)
+# 🔹 Async view helpers
 # ==========================================
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle,
-    PageBreak, Image
-)
-from reportlab.pdfgen import canvas
+# DRF's @api_view is sync-only, so the I/O-bound endpoints marked ⚡ are
+# plain async Django views behind this decorator. Under backend/asgi.py they
+# wait on the database without holding a thread. They keep @api_view's
+# contract: CSRF-exempt, a JSON 405 for other methods, a JSON 404 for
+# missing objects.
+
+def async_api_view(methods, public=False):
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = JsonResponse({"detail": f'Method "{request.method}" not allowed.'},
+                                        status=status.HTTP_405_METHOD_NOT_ALLOWED)
+                response["Allow"] = ", ".join(methods)
+                return response
+            if not public:
+                denied = await _authenticate_async(request, kwargs)
+                if denied is not None:
+                    return denied
+            try:
+                return await view(request, *args, **kwargs)
+            except Http404 as e:
+                return JsonResponse({"detail": str(e)}, status=status.HTTP_404_NOT_FOUND)
+        return wrapper
+    return decorator
+
+
+async def _authenticate_async(request, kwargs):
+    # Same checks as TokenAuthentication + IsAccountOwner; sets request.user.
+    try:
+        user = await sync_to_async(TokenAuthentication().authenticate)(request)
+    except AuthenticationFailed as e:
+        user, detail = None, str(e.detail)
+    else:
+        detail = "Authentication credentials were not provided."
+    if user is None:
+        response = JsonResponse({"detail": detail}, status=status.HTTP_401_UNAUTHORIZED)
+        response["WWW-Authenticate"] = TokenAuthentication().authenticate_header(request)
+        return response
+    request.user = user[0]
+    if not IsAccountOwner().has_permission(request, type("View", (), {"kwargs": kwargs})):
+        return JsonResponse({"detail": IsAccountOwner.message}, status=status.HTTP_403_FORBIDDEN)
+    return None
+
 
 # ==========================================
-# 🔹 Matplotlib (Graphs)
+# 🔹 Error responses
 # ==========================================
-import matplotlib
-matplotlib.use('Agg')  # ✅ Use non-GUI backend for Django
-import matplotlib.pyplot as plt
+def api_exception_handler(exc, context):
+    """
+    DRF's handler (``REST_FRAMEWORK['EXCEPTION_HANDLER']``), plus a 400 when
+    money.fx has no rates to convert the user's amounts with.
+    """
+    if isinstance(exc, fx.MissingRate):
+        set_rollback()
+        return Response({"success": False, "message": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return exception_handler(exc, context)
 
 
+def _request_data(request):
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return {}
+    return request.POST
 
 
 @api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
 def signup(request):
     try:
         fullname = request.data.get("FullName")
@@ -67,7 +142,7 @@ def signup(request):
         user = Userdetails.objects.create(
             FullName=fullname,
             Email=email,
-            Password=password
+            Password=hash_password(password)
         )
         serializer = UserdetailsSerializer(user)
         return Response({'message': 'User registered successfully', 'user': serializer.data}, status=status.HTTP_201_CREATED)
@@ -77,83 +152,200 @@ def signup(request):
 
 
 @api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
 def login(request):
     email = request.data.get("Email")
     password = request.data.get("Password")
 
+    # 🚧 Throttle guessing per address and per account before paying for a hash
+    retry_after = ratelimit.throttle(
+        ("login-ip", ratelimit.client_ip(request)),
+        ("login-email", str(email or "").strip().lower()),
+    )
+    if retry_after:
+        return _too_many_attempts(retry_after)
+
     try:
-        user = Userdetails.objects.get(Email=email, Password=password)
-        return Response({
-            'message': 'Login Successful',
-            'userId': user.id,
-            'username': user.FullName
-        }, status=status.HTTP_200_OK)
+        user = Userdetails.objects.get(Email=email)
     except Userdetails.DoesNotExist:
+        burn_hash_time(password)
         return Response({'message': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
 
+    if not check_user_password(user, password):
+        return Response({'message': 'Invalid credentials'}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'message': 'Login Successful',
+        'userId': user.id,
+        'username': user.FullName,
+        # 🔑 Send as "Authorization: Bearer <token>" on every other request
+        'token': issue_token(user),
+        'expires_in': settings.AUTH_TOKEN_TTL,
+    }, status=status.HTTP_200_OK)
+
+
+def _too_many_attempts(retry_after, response_class=Response):
+    retry_after = math.ceil(retry_after)
+    response = response_class({
+        'success': False,
+        'message': f'Too many attempts. Try again in {retry_after} seconds.'
+    }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+    response['Retry-After'] = str(retry_after)
+    return response
+
 
 @api_view(['POST'])
 def add_or_update_expense(request):
-    user_id = request.data.get("userId")
     expense_id = request.data.get("expenseId", None)
-    user = get_object_or_404(Userdetails, id=user_id)
+    user = request.user
     title = request.data.get("title", "Miscellaneous Expense")
     amount = request.data.get("amount", 0.00)
     category_name = request.data.get("category", "Other")
     payment_mode = request.data.get("payment_mode", "CASH")
     note = request.data.get("note", "")
     expense_date = request.data.get("expense_date", datetime.now().date())
+    currency = request.data.get("currency")
+
+    # 💱 Any currency we hold exchange rates for; new expenses default to the user's
+    if currency:
+        try:
+            currency = ingest.clean_currency(currency, user.currency)
+        except ValidationError as e:
+            return Response({'success': False, 'message': "; ".join(e.messages)},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-    # ✅ Create or get category
-    category, _ = Category.objects.get_or_create(name=category_name)
+    # ✅ Shared or the user's own category, created on first use (ids cached in-process)
+    category_id = categories.resolve_category(user.id, category_name)
 
     if expense_id:
         # 🔁 Update existing expense
         expense = get_object_or_404(Expense, id=expense_id, user=user)
+        previous = rollups.rollup_entry(expense)
         expense.title = title
         expense.amount = amount
-        expense.category = category
+        expense.category_id = category_id
         expense.payment_mode = payment_mode
         expense.note = note
         expense.expense_date = expense_date
-        expense.save()
+        if currency:
+            expense.currency = currency
+        with transaction.atomic():
+            expense.save()
+            rollups.move_expense(previous, expense)
+            bump_data_version(user.id)
         message = "Expense updated successfully!"
     else:
         # ➕ Add new expense
-        expense = Expense.objects.create(
-            user=user,
-            title=title,
-            amount=amount,
-            category=category,
-            payment_mode=payment_mode,
-            note=note,
-            expense_date=expense_date
-        )
+        with transaction.atomic():
+            expense = Expense.objects.create(
+                user=user,
+                title=title,
+                amount=amount,
+                category_id=category_id,
+                payment_mode=payment_mode,
+                currency=currency or user.currency,
+                note=note,
+                expense_date=expense_date
+            )
+            rollups.record_expenses([expense])
+            bump_data_version(user.id)
         message = "Expense added successfully!"
 
     serializer = ExpenseSerializer(expense)
     return Response({'message': message, 'expense': serializer.data}, status=status.HTTP_200_OK)
 
 
+@api_view(['POST'])
+def batch_expenses(request):
+    # 📦 Many creates/updates/deletes in one round trip and one transaction
+    try:
+        result = batch.apply_operations(
+            request.user,
+            request.data.get("operations"),
+            atomic=request.data.get("atomic", True) is not False,
+        )
+    except batch.BatchError as e:
+        return Response({'success': False, 'message': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    failed = sum(not r['success'] for r in result['results'])
+    return Response({
+        'success': not failed,
+        'message': f'{result["created"]} created, {result["updated"]} updated, {result["deleted"]} deleted'
+                   + (f', {failed} failed' if failed else ''),
+        **result,
+    }, status=status.HTTP_200_OK if result['applied'] else status.HTTP_400_BAD_REQUEST)
+
+
+def _small_enough_to_cache(data):
+    return len(data.get("expenses", ())) <= settings.RESPONSE_CACHE_MAX_ROWS
+
+
 @api_view(['GET'])
+@cached_user_response(
+    user_kwarg="user_Id",
+    bypass=lambda request: "stream" in request.query_params,
+    cache_if=_small_enough_to_cache,
+)
 def getexpense(request, user_Id):
-    user = get_object_or_404(Userdetails, id=user_Id)
-    expenses = Expense.objects.filter(user=user).select_related("category")
-    serializer = ExpenseSerializer(expenses, many=True)
-    return Response({"success": True, "expenses": serializer.data}, status=status.HTTP_200_OK)
+    user = request.user
+    params = request.query_params
+    stream_format = params.get("stream")
 
-@api_view(["POST"])
-def forget_password(request):
-    email = request.data.get("email")
     try:
-        user = Userdetails.objects.get(Email=email)
+        fields = listing.select_fields(params)
+        expenses = listing.filter_expenses(Expense.objects.filter(user=user), params)
+
+        # 🌊 Full export: streamed straight from a DB iterator
+        if stream_format:
+            if stream_format not in listing.STREAM_FORMATS:
+                raise ValueError(f"'stream' must be one of: {', '.join(listing.STREAM_FORMATS)}")
+            return listing.stream_expenses(expenses, fields, stream_format)
+
+        # 📄 Keyset pagination on (expense_date, id)
+        if "cursor" in params or "limit" in params:
+            page = listing.paginate_expenses(expenses, fields, params)
+            return Response({"success": True, **page}, status=status.HTTP_200_OK)
+    except ValueError as e:
+        return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    rows = listing.expense_rows(expenses.order_by("id"), fields)
+    return Response({"success": True, "expenses": list(rows)}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def search_expenses(request, user_id):
+    # 🔍 Ranked full-text search over titles and notes (prefix matches, then typos)
+    try:
+        page = search.search_page(request.user.id, request.query_params)
+    except ValueError as e:
+        return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"success": True, **page}, status=status.HTTP_200_OK)
+
+
+@async_api_view(['POST'], public=True)
+async def forget_password(request):
+    # ⚡ Async: a DB lookup and an outbox insert; the SMTP round trip happens in the background
+    email = _request_data(request).get("email")
+    retry_after = await sync_to_async(ratelimit.throttle)(
+        ("otp-ip", ratelimit.client_ip(request)),
+        ("otp-send-email", str(email or "").strip().lower()),
+    )
+    if retry_after:
+        return _too_many_attempts(retry_after, JsonResponse)
+    try:
+        user = await Userdetails.objects.aget(Email=email)
     except Userdetails.DoesNotExist:
-        return Response({'sucess':False,'message':'user not found'},status=status.HTTP_401_UNAUTHORIZED)
+        return JsonResponse({'sucess':False,'message':'user not found'},status=status.HTTP_401_UNAUTHORIZED)
+    await sync_to_async(_send_reset_otp)(user)
+    return JsonResponse({'sucess':True,'message':'otp sent to mail sucessfully'})
+
+
+def _send_reset_otp(user):
     otp = str(random.randint(100000,999999))
     user.otp = otp
     user.otp_created_at = timezone.now()
-    user.save()
-    
+
     subject = "🔒 Password Reset Request - Expense Tracker"
     text_content = f"Hi {user.FullName}, your OTP for password reset is {otp}. It will expire soon."
 
@@ -185,35 +377,43 @@ def forget_password(request):
     </html>
     """
 
-    # 🧠 Create both text and HTML email versions
-    msg = EmailMultiAlternatives(subject, text_content, 'noreply@yourexpensetracker.com', [email])
-    msg.attach_alternative(html_content, "text/html")
-    msg.send(fail_silently=False)
-
-    return Response({'sucess':True,'message':'otp sent to mail sucessfully'})
+    # 📮 Both text and HTML versions go through the outbox, committed with the OTP
+    with transaction.atomic():
+        user.save(update_fields=["otp", "otp_created_at"])
+        queue_email([user.Email], subject, text_content, html_body=html_content)
 
 @api_view(["POST"])
+@authentication_classes([])
+@permission_classes([AllowAny])
 def reset_verify_opt(request):
     email = request.data.get("Email", "").strip()
     otp = request.data.get("otp")
     password = request.data.get("Password")
 
+    # 🚧 A 6-digit OTP falls to brute force without a cap on guesses
+    retry_after = ratelimit.throttle(
+        ("otp-ip", ratelimit.client_ip(request)),
+        ("otp-verify-email", email.lower()),
+    )
+    if retry_after:
+        return _too_many_attempts(retry_after)
+
     try:
         user = Userdetails.objects.get(Email=email)
     except Userdetails.DoesNotExist:
         return Response({'success': False, 'message': 'User not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-    if user.otp != otp:
+    if not user.otp or not constant_time_compare(user.otp, str(otp or "")):
         return Response({'success': False, 'message': 'Invalid OTP.'}, status=status.HTTP_400_BAD_REQUEST)
 
     if not user.otp_created_at:
         return Response({'success': False, 'message': 'OTP timestamp missing. Please request a new one.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    expiry_time = user.otp_created_at + timezone.timedelta(minutes=5)
+    expiry_time = user.otp_created_at + timedelta(minutes=5)
     if timezone.now() > expiry_time:
         return Response({'success': False, 'message': 'OTP expired. Please request a new one.'}, status=status.HTTP_400_BAD_REQUEST)
 
-    user.Password = password
+    user.Password = hash_password(password)
     user.otp = None
     user.otp_created_at = None
     user.save()
@@ -244,7 +444,12 @@ def edit_profile(request):
     )
 
     if serializer.is_valid():
+        previous_currency = user.currency
         serializer.save()
+        bump_data_version(user.id)
+        if user.currency != previous_currency:
+            # 💱 Budget counters are kept in the user's currency
+            budgets.rebuild_spend([user.id])
 
         # 🖼️ Generate proper absolute image URL
         profile_image_url = None
@@ -265,6 +470,7 @@ def edit_profile(request):
 
 
 @api_view(['GET'])
+@cached_user_response()
 def view_profile(request, user_id):
     try:
         user = Userdetails.objects.get(id=user_id)
@@ -299,327 +505,388 @@ def bulk_upload_expenses(request):
         if not user_id:
             return Response({'success': False, 'message': 'User ID required'}, status=400)
 
-        import json
-        data = json.load(file)
-        print("📄 JSON content:", type(data), len(data) if isinstance(data, list) else "not list")  # <-- DEBUG
-
-        user = get_object_or_404(Userdetails, id=user_id)
-        created_count = 0
+        user = request.user
 
-        # ✅ Handle case if your JSON file has {"expenses": [...]} instead of [...]
-        if isinstance(data, dict) and "expenses" in data:
-            data = data["expenses"]
-
-        for entry in data:
-            print("🧾 Entry:", entry)  # <-- DEBUG check
-
-            category_name = entry.get("category", "Other")
-            category, _ = Category.objects.get_or_create(name=category_name)
-
-            Expense.objects.create(
-                user=user,
-                title=entry.get("title", "Miscellaneous"),
-                amount=entry.get("amount", 0),
-                category=category,
-                payment_mode=entry.get("payment_mode", "CASH"),
-                note=entry.get("note", ""),
-                expense_date=entry.get("expense_date")
-            )
-            created_count += 1
-
-        print(f"✅ Created {created_count} records")  # <-- DEBUG
+        # 📥 Streamed parse → validated rows → chunked bulk_create (one transaction)
+        try:
+            result = ingest.ingest_expenses(user, ingest.iter_json_entries(file))
+        except ingest.MalformedUpload as e:
+            return Response({'success': False, 'message': str(e)}, status=400)
 
         return Response({
             'success': True,
-            'message': f'{created_count} expenses uploaded successfully!'
+            'message': f'{result["created"]} expenses uploaded successfully!',
+            **result,
         }, status=201)
 
     except Exception as e:
-        print("❌ Error:", e)
         return Response({'success': False, 'error': str(e)}, status=500)
     
-@api_view(['GET'])
-def expense_summary(request, user_id):
-    try:
-        user = Userdetails.objects.get(id=user_id)
-    except Userdetails.DoesNotExist:
-        return Response(
-            {'success': False, 'message': 'User not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+@api_view(['POST'])
+@parser_classes([MultiPartParser, FormParser])
+def import_expenses(request):
+    file = request.FILES.get('file')
+    user_id = request.data.get('userId')
 
-    today = timezone.now().date()
-    start_of_week = today - timedelta(days=today.weekday())
-    start_of_month = today.replace(day=1)
-    start_of_year = today.replace(month=1, day=1)
+    if not file:
+        return Response({'success': False, 'message': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+    if not user_id:
+        return Response({'success': False, 'message': 'User ID required'}, status=status.HTTP_400_BAD_REQUEST)
+    user = request.user
 
-    expenses = Expense.objects.filter(user=user)
+    # 🔎 Format from the request, else from the file extension
+    file_format = (request.data.get('format') or os.path.splitext(file.name)[1].lstrip('.')).lower()
+    if file_format not in dict(ImportJob.FORMATS):
+        return Response({
+            'success': False,
+            'message': f"Unsupported format '{file_format}'. Use one of: {', '.join(dict(ImportJob.FORMATS))}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    column_mapping = request.data.get('mapping') or {}
+    if isinstance(column_mapping, str):
+        try:
+            column_mapping = json.loads(column_mapping)
+        except ValueError:
+            column_mapping = None
+    if not isinstance(column_mapping, dict):
+        return Response({'success': False, 'message': 'mapping must be a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+
+    job = ImportJob.objects.create(
+        user=user,
+        file=file,
+        format=file_format,
+        column_mapping=column_mapping,
+        date_format=request.data.get('date_format', ''),
+    )
+    # ⏩ Parsing happens in the background; the client polls the job
+    jobs.enqueue_import(job)
 
-    def get_total(qs):
-        return qs.aggregate(total=Sum('amount'))['total'] or 0
+    return Response({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+    }, status=status.HTTP_202_ACCEPTED)
 
-    def category_summary(qs):
-        return list(
-            qs.values('category__name')
-            .annotate(total=Sum('amount'))
-            .order_by('-total')
-        )
 
-    def payment_summary(qs):
-        return list(
-            qs.values('payment_mode')
-            .annotate(
-                total_amount=Sum('amount'),
-                count=Count('id')
-            )
-            .order_by('-total_amount')
-        )
+@async_api_view(['GET'])
+async def import_status(request, job_id):
+    job = await aget_object_or_404(ImportJob, id=job_id, user_id=request.user.id)
+    return JsonResponse({'success': True, 'job': ImportJobSerializer(job).data}, status=status.HTTP_200_OK)
 
-    # Filters by time period
-    today_expenses = expenses.filter(expense_date=today)
-    yesterday_expenses = expenses.filter(expense_date=today - timedelta(days=1))
-    weekly_expenses = expenses.filter(expense_date__gte=start_of_week)
-    monthly_expenses = expenses.filter(expense_date__gte=start_of_month)
-    yearly_expenses = expenses.filter(expense_date__gte=start_of_year)
 
-    data = {
-        "success": True,
-        "summary": {
-            "today": get_total(today_expenses),
-            "yesterday": get_total(yesterday_expenses),
-            "weekly": get_total(weekly_expenses),
-            "monthly": get_total(monthly_expenses),
-            "yearly": get_total(yearly_expenses),
-            "total": get_total(expenses),
-        },
-        "by_category": {
-            "today": category_summary(today_expenses),
-            "yesterday": category_summary(yesterday_expenses),
-            "weekly": category_summary(weekly_expenses),
-            "monthly": category_summary(monthly_expenses),
-            "yearly": category_summary(yearly_expenses),
-            "overall": category_summary(expenses),
-        },
-        "by_payment_mode": {
-            "today": payment_summary(today_expenses),
-            "yesterday": payment_summary(yesterday_expenses),
-            "weekly": payment_summary(weekly_expenses),
-            "monthly": payment_summary(monthly_expenses),
-            "yearly": payment_summary(yearly_expenses),
-            "overall": payment_summary(expenses),
-        }
-    }
+@async_api_view(['GET'])
+async def import_progress(request, job_id):
+    # ⚡ Polled every second or two while an import runs
+    job = await aget_object_or_404(
+        ImportJob.objects.only('status', 'progress', 'processed_rows', 'created_count', 'error_count'),
+        id=job_id,
+        user_id=request.user.id,
+    )
+    return JsonResponse({
+        'success': True,
+        'status': job.status,
+        'progress': round(job.progress, 1),
+        'processed_rows': job.processed_rows,
+        'created_count': job.created_count,
+        'error_count': job.error_count,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@cached_user_response(per_day=True)
+def expense_summary(request, user_id):
+    # 📊 Every window × category × payment mode in one grouped query
+    data = {"success": True, **build_expense_summary(request.user)}
 
     return Response(data, status=status.HTTP_200_OK)
 
-# ✅ Footer for every page
-def footer(canvas_obj, doc):
-    canvas_obj.saveState()
-    footer_text = "@Expense Tracker — Confidential Report"
-    canvas_obj.setFont("Helvetica-Oblique", 9)
-    canvas_obj.drawCentredString(A4[0] / 2, 0.5 * inch, footer_text)
-    canvas_obj.restoreState()
+def _save_schedule(serializer, user):
+    if not serializer.is_valid():
+        return Response({'success': False, 'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    extra = {}
+    category_name = serializer.validated_data.pop("category_name", None)
+    if category_name:
+        extra["category_id"] = categories.resolve_category(user.id, category_name)
+    with transaction.atomic():
+        if serializer.instance is None:
+            start_date = serializer.validated_data.get("start_date") or timezone.now().date()
+            schedule = serializer.save(
+                user_id=user.id,
+                currency=serializer.validated_data.get("currency") or user.currency,
+                start_date=start_date,
+                next_run=start_date,
+                **extra,
+            )
+        else:
+            schedule = serializer.save(**extra)
+            if {"frequency", "interval", "start_date", "end_date"} & set(serializer.validated_data):
+                recurring.reschedule(schedule)
+                schedule.save(update_fields=["next_run", "active"])
+        # ⏩ Occurrences already due (a start date in the past) show up right away
+        created = recurring.materialize_due(schedules=RecurringExpense.objects.filter(id=schedule.id))["created"]
+
+    schedule.refresh_from_db()
+    return Response({
+        'success': True,
+        'message': f'Recurring expense saved; {created} expense(s) added.',
+        'recurring': RecurringExpenseSerializer(schedule).data,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET', 'POST'])
+def recurring_expenses(request, user_id):
+    user = request.user
+    if request.method == 'GET':
+        schedules = RecurringExpense.objects.filter(user_id=user.id).select_related("category").order_by("id")
+        return Response({
+            'success': True,
+            'recurring': RecurringExpenseSerializer(schedules, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+    # 🔁 New schedule (materialized daily by `manage.py run_recurring`)
+    return _save_schedule(RecurringExpenseSerializer(data=request.data, context={'user': user}), user)
+
+
+@api_view(['POST', 'DELETE'])
+def recurring_expense(request, user_id, schedule_id):
+    user = request.user
+    schedule = get_object_or_404(RecurringExpense, id=schedule_id, user_id=user.id)
+    if request.method == 'DELETE':
+        # Expenses it already created stay.
+        schedule.delete()
+        return Response({'success': True, 'message': 'Recurring expense deleted'}, status=status.HTTP_200_OK)
+
+    serializer = RecurringExpenseSerializer(schedule, data=request.data, partial=True, context={'user': user})
+    return _save_schedule(serializer, user)
+
+
+def _visible_category(user, category_id):
+    """A shared category or one of the user's own, by id (an int or a string of one)."""
+    return Category.objects.filter(
+        Q(created_by__isnull=True) | Q(created_by=user.id), id=int(category_id)
+    ).get()
+
+
+@api_view(['GET', 'POST'])
+def budget(request, user_id):
+    user = request.user
+    if request.method == 'POST':
+        # 🎯 Set (or, with an amount of 0, remove) a category's monthly budget
+        category_id = request.data.get("category_id")
+        try:
+            if category_id:
+                category = _visible_category(user, category_id)
+            else:
+                category = Category(id=categories.resolve_category(user.id, request.data["category"]))
+            amount = Decimal(str(request.data.get("amount") or 0))
+        except (Category.DoesNotExist, KeyError, TypeError, ValueError, InvalidOperation):
+            return Response({
+                "success": False,
+                "message": "A valid category (or category_id) and amount are required."
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if amount > 0:
+            Budget.objects.update_or_create(user_id=user.id, category=category, defaults={"amount": amount})
+        else:
+            Budget.objects.filter(user_id=user.id, category=category).delete()
+
+    # 📈 Utilization straight from the running monthly counters (no Expense scan)
+    month = request.GET.get("month")
+    try:
+        month = datetime.strptime(month, "%Y-%m").date() if month else None
+    except ValueError:
+        return Response({
+            "success": False,
+            "message": "month must look like YYYY-MM."
+        }, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"success": True, **budgets.budget_status(user, month)}, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
-def download_expense_report(request, user_id):
+def download_expense_report(request, user_id, category=None):
+    user = request.user
+    category_id = request.GET.get("category_id") or category
     try:
-        user = get_object_or_404(Userdetails, id=user_id)
-        category_id = request.GET.get("category_id")
+        category_id = _visible_category(user, category_id).id if category_id else None
+    except (Category.DoesNotExist, TypeError, ValueError):
+        return Response({
+            "success": False,
+            "message": "category_id must be the id of one of your categories."
+        }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 🔹 Filter expenses
-        expenses = Expense.objects.filter(user=user)
-        if category_id:
-            expenses = expenses.filter(category_id=category_id)
+    try:
+        # 💾 Unchanged data → same cache key → served from disk without re-rendering
+        path = report_jobs.current_report(user, category_id)
 
-        if not expenses.exists():
+        if path is None:
             return Response({
                 "success": False,
                 "message": "No expenses found for this user/category."
             }, status=status.HTTP_404_NOT_FOUND)
 
-        # 🔹 Prepare PDF
-        buffer = BytesIO()
-        pdf = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            leftMargin=50,
-            rightMargin=50,
-            topMargin=70,
-            bottomMargin=50
-        )
+        return send_file(path, f"Expense_Report_{user.FullName}.pdf")
 
-        # 🔹 Styles
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name="ReportTitleCustom", fontSize=22, leading=28, alignment=1,
-                                  spaceAfter=15, textColor=colors.HexColor("#1F4E79")))
-        styles.add(ParagraphStyle(name="SectionHeaderCustom", fontSize=14, leading=18, spaceAfter=10,
-                                  textColor=colors.HexColor("#154360")))
-        styles.add(ParagraphStyle(name="BulletCustom", fontSize=11.5, leading=15, leftIndent=25, spaceAfter=6))
-        styles.add(ParagraphStyle(name="NormalTextCustom", fontSize=11.5, leading=14, spaceAfter=10))
-
-        content = []
-
-        # 🧾 Title
-        report_title = f"Expense Report — {user.FullName}"
-        if category_id:
-            cat_name = Category.objects.get(id=category_id).name
-            report_title += f" ({cat_name})"
-        content.append(Paragraph(report_title, styles["ReportTitleCustom"]))
-        content.append(Spacer(1, 5))
-        content.append(Paragraph("<hr width='100%' color='#1F4E79'/>", styles["NormalTextCustom"]))
-        content.append(Spacer(1, 20))
-
-        # 🧮 Data prep
-        df = pd.DataFrame(list(expenses.values("title", "amount", "expense_date", "category__name")))
-        df["month_year"] = pd.to_datetime(df["expense_date"]).dt.strftime("%b %Y")
-
-        total_expense = df["amount"].sum()
-        avg_expense = df["amount"].mean()
-        max_expense = df["amount"].max()
-        min_expense = df["amount"].min()
-        num_expenses = len(df)
-
-        # 📘 Summary
-        content.append(Paragraph("📘 Executive Summary", styles["SectionHeaderCustom"]))
-        summary_points = [
-            f"• Total Spending Recorded: <b>Rs {total_expense:,.2f}</b>",
-            f"• Average Expense per Entry: <b>Rs {avg_expense:,.2f}</b>",
-            f"• Highest Single Expense: <b>Rs {max_expense:,.2f}</b>",
-            f"• Lowest Expense Recorded: <b>Rs {min_expense:,.2f}</b>",
-            f"• Total Transactions: <b>{num_expenses}</b>",
-        ]
-        if category_id:
-            summary_points.append(f"• Report focused on Category: <b>{cat_name}</b>")
-        else:
-            summary_points.append("• Report includes all categories.")
-        for line in summary_points:
-            content.append(Paragraph(line, styles["BulletCustom"]))
-        content.append(Spacer(1, 25))
-
-        # 📅 Monthly summary table
-        monthly_totals = df.groupby("month_year")["amount"].sum().to_dict()
-        sorted_months = sorted(
-            monthly_totals.items(),
-            key=lambda x: (
-                int(x[0].split()[1]),  # Year
-                list(calendar.month_abbr).index(x[0].split()[0])  # Month order
-            )
-        )
+    except Exception as e:
+        return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        content.append(Paragraph("📅 Monthly Expense Summary", styles["SectionHeaderCustom"]))
-        month_data = [["Month", "Total (Rs.)"]]
-        for month, total in sorted_months:
-            month_data.append([month, f"Rs {total:,.2f}"])
-
-        month_table = Table(month_data, colWidths=[260, 230])
-        month_table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1F618D")),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-            ("FONTSIZE", (0, 0), (-1, -1), 11),
-            ("BOTTOMPADDING", (0, 0), (-1, 0), 8),
-            ("TOPPADDING", (0, 0), (-1, 0), 8),
-        ]))
-        content.append(month_table)
-        content.append(Spacer(1, 25))
-
-        # 📊 Bar Chart (centered & larger)
-        months, totals = zip(*sorted_months)
-        plt.figure(figsize=(8, 4))  # ✅ Bigger width for full-page center alignment
-        plt.bar(months, totals, color="#2874A6", width=0.6)
-        plt.title("Monthly Expense Trend", fontsize=14, fontweight='bold', pad=15)
-        plt.xlabel("Month", fontsize=11)
-        plt.ylabel("Total (Rs)", fontsize=11)
-        plt.xticks(rotation=45, ha="center")
-        plt.grid(axis="y", linestyle="--", alpha=0.6)
-
-        chart_buffer = BytesIO()
-        plt.tight_layout()
-        plt.savefig(chart_buffer, format="png", bbox_inches='tight')
-        plt.close()
-        chart_buffer.seek(0)
-        chart = Image(chart_buffer, width=500, height=300)  # ✅ Wider chart for visual balance
-        content.append(chart)
-        content.append(Spacer(1, 20))
-
-        # 🔹 Monthly difference analysis (below graph)
-        content.append(Paragraph("📈 Month-over-Month Analysis", styles["SectionHeaderCustom"]))
-        diff_texts = []
-        for i in range(1, len(sorted_months)):
-            prev_month, prev_total = sorted_months[i - 1]
-            curr_month, curr_total = sorted_months[i]
-            diff = curr_total - prev_total
-            direction = "increased" if diff > 0 else "decreased"
-            diff_texts.append(
-                f"• From <b>{prev_month}</b> to <b>{curr_month}</b>, expenses {direction} by <b>Rs {abs(diff):,.2f}</b>."
-            )
-        if not diff_texts:
-            diff_texts.append("• Only one month of data available, no comparison possible.")
-        for line in diff_texts:
-            content.append(Paragraph(line, styles["BulletCustom"]))
-        content.append(Spacer(1, 25))
-
-        # 🥧 Pie Chart — only if NOT category-filtered
-        if not category_id:
-            cat_totals = df.groupby("category__name")["amount"].sum()
-            plt.figure(figsize=(5.5, 5.5))
-            plt.pie(cat_totals, labels=cat_totals.index, autopct="%1.1f%%", startangle=140)
-            plt.title("Expenses by Category", fontsize=13, fontweight='bold')
-            pie_buffer = BytesIO()
-            plt.savefig(pie_buffer, format="png")
-            plt.close()
-            pie_buffer.seek(0)
-            pie_chart = Image(pie_buffer, width=350, height=350)
-            content.append(pie_chart)
-            content.append(Spacer(1, 25))
-
-        # 📑 Detailed Expense Records (start new page)
-        content.append(PageBreak())
-        content.append(Paragraph("📑 Detailed Expense Records", styles["SectionHeaderCustom"]))
-
-        detail_data = [["Title", "Category", "Date", "Amount (Rs.)"]]
-        for exp in expenses:
-            detail_data.append([
-                exp.title,
-                exp.category.name if exp.category else "N/A",
-                exp.expense_date.strftime("%d-%b-%Y"),
-                f"Rs {exp.amount:,.2f}",
-            ])
-
-        detail_table = Table(detail_data, colWidths=[220, 140, 100, 90])
-        detail_table.setStyle(TableStyle([
-            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#154360")),
-            ("TEXTCOLOR", (0, 0), (-1, 0), colors.whitesmoke),
-            ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-            ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-            ("FONTSIZE", (0, 0), (-1, -1), 10.5),
-            ("BOTTOMPADDING", (0, 0), (-1, -1), 7),
-            ("TOPPADDING", (0, 0), (-1, -1), 7),
-        ]))
-        content.append(detail_table)
-
-        # 🔹 Footer
-        def footer(canvas, doc):
-            canvas.saveState()
-            canvas.setFont("Helvetica-Oblique", 8)
-            canvas.drawCentredString(A4[0] / 2, 30, "@Expense Tracker — Confidential Report")
-            canvas.restoreState()
-
-        pdf.build(content, onFirstPage=footer, onLaterPages=footer)
-        buffer.seek(0)
-
-        return FileResponse(buffer, as_attachment=True, filename=f"Expense_Report_{user.FullName}.pdf")
 
+@api_view(['GET'])
+def export_expenses(request, user_id, fmt):
+    # 📤 CSV / XLSX streamed straight from the database cursor
+    if fmt not in exports.FORMATS:
+        return Response({
+            "success": False,
+            "message": f"Unsupported export format '{fmt}' (expected csv or xlsx)"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    user = request.user
+    try:
+        expenses = listing.filter_expenses(Expense.objects.filter(user_id=user.id), request.query_params)
+    except ValueError as e:
+        return Response({"success": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return exports.export_response(request, expenses, fmt, f"Expenses_{user.FullName}")
+
+
+@api_view(['POST'])
+def request_expense_report(request, user_id):
+    user = request.user
+    category_id = request.data.get("category_id") or request.GET.get("category_id")
+    try:
+        category_id = _visible_category(user, category_id).id if category_id else None
+    except (Category.DoesNotExist, TypeError, ValueError):
+        return Response({
+            "success": False,
+            "message": "category_id must be the id of one of your categories."
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # 📄 Queue a render (or reuse the cached one for unchanged data)
+    job = report_jobs.request_report(user, category_id)
+    return Response({
+        "success": True,
+        "job_id": job.id,
+        "status": job.status,
+    }, status=status.HTTP_200_OK if job.status == ReportJob.DONE else status.HTTP_202_ACCEPTED)
+
+
+@async_api_view(['GET'])
+async def expense_report_status(request, job_id):
+    job = await aget_object_or_404(ReportJob, id=job_id, user_id=request.user.id)
+    return JsonResponse({
+        "success": job.status != ReportJob.FAILED,
+        "job_id": job.id,
+        "status": job.status,
+        "message": job.message,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def fetch_expense_report(request, job_id):
+    job = get_object_or_404(ReportJob, id=job_id, user_id=request.user.id)
+    if job.status != ReportJob.DONE:
+        return Response({
+            "success": False,
+            "status": job.status,
+            "message": job.message or "Report is not ready yet."
+        }, status=status.HTTP_409_CONFLICT)
+
+    path = report_jobs.cached_report(job.cache_key)
+    if path is None:
+        return Response({
+            "success": False,
+            "message": "Report expired; request a new one."
+        }, status=status.HTTP_410_GONE)
+
+    return send_file(path, f"Expense_Report_{request.user.FullName}.pdf")
+
+
+@api_view(['GET'])
+def expense_chart(request, user_id, kind):
+    # NumPy + matplotlib load on first use so API-only workers never pay for them.
+    from . import analytics, charts
+
+    user = request.user
+    fmt = request.GET.get("fmt", "png")
+    if kind not in charts.KINDS or fmt not in charts.FORMATS:
+        return Response({
+            "success": False,
+            "message": f"Chart kind must be one of {', '.join(charts.KINDS)}; fmt one of {', '.join(charts.FORMATS)}."
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    # 📊 Same data → same chart key → served from the LRU/disk cache (shared with the PDF report)
+    series = analytics.load_rollup_series(user, request.GET.get("category_id"))
+    data = charts.chart_data(kind, series)
+    if data is None:
+        return Response({
+            "success": False,
+            "message": "No expenses found for this user/category."
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    key, image = charts.get_chart(data, fmt)
+    etag = f'"{key}"'
+    if request.headers.get("If-None-Match") == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(image, content_type=charts.FORMATS[fmt])
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def response_cache_metrics(request):
+    # 📈 Per-process counters; scrape every worker for the full picture
+    return Response({"success": True, "response_cache": cache_stats()}, status=status.HTTP_200_OK)
+
+
+@async_api_view(['GET'], public=True)
+async def health(request):
+    # 💓 Liveness: the worker answers. No I/O, so a slow database never gets pods restarted
+    return JsonResponse({
+        "success": True,
+        "status": "ok",
+        "host": socket.gethostname(),
+        "pid": os.getpid(),
+    }, status=status.HTTP_200_OK)
+
+
+def _check_database():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+
+@async_api_view(['GET'], public=True)
+async def readiness(request):
+    # 🚦 Readiness: only take traffic while the database and shared cache respond
+    checks = {}
+    try:
+        await sync_to_async(_check_database)()
+        checks["database"] = "ok"
     except Exception as e:
-        return Response({"success": False, "message": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        checks["database"] = str(e)
+    try:
+        await caches["responses"].aget("readiness-probe")
+        checks["cache"] = "ok"
+    except Exception as e:
+        checks["cache"] = str(e)
+
+    ready = all(result == "ok" for result in checks.values())
+    return JsonResponse({
+        "success": ready,
+        "status": "ready" if ready else "unavailable",
+        "checks": checks,
+        "host": socket.gethostname(),
+    }, status=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE)
+
 
 @api_view(['DELETE'])
 def delete_user(request, user_id):
     try:
         user = Userdetails.objects.get(id=user_id)
         user.delete()
+        forget_cached_version(user_id)
         return Response({
             "success": True,
             "message": "User deleted successfully!"
@@ -633,8 +900,11 @@ def delete_user(request, user_id):
 @api_view(['DELETE'])
 def delete_expense(request, id):
     try:
-        expense = Expense.objects.get(id=id)
-        expense.delete()
+        expense = Expense.objects.get(id=id, user_id=request.user.id)
+        with transaction.atomic():
+            rollups.retract_expenses([expense])
+            expense.delete()
+            bump_data_version(expense.user_id)
         return Response({"message": "Expense deleted successfully!"}, status=status.HTTP_200_OK)
     except Expense.DoesNotExist:
         return Response({"error": "Expense not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -28,6 +28,7 @@ import "./Dashboard.css";
 
 const Dashboard = () => {
   const [summary, setSummary] = useState({});
+  const [currency, setCurrency] = useState("INR");
   const [categoryData, setCategoryData] = useState([]);
   const [paymentData, setPaymentData] = useState([]);
   const [trendData, setTrendData] = useState([]);
@@ -41,11 +42,14 @@ const Dashboard = () => {
 
   const fetchSummary = async () => {
     try {
-      const response = await fetch(`http://127.0.0.1:8000/api/summary/${user.id}`);
+      const response = await fetch(`http://127.0.0.1:8000/api/summary/${user.id}`, {
+        headers: { Authorization: `Bearer ${localStorage.getItem("token")}` },
+      });
       const data = await response.json();
 
       if (data.success) {
         setSummary(data.summary);
+        setCurrency(data.currency || "INR");
         setCategoryData(data.by_category.overall || []);
         setPaymentData(
           (data.by_payment_mode.overall || []).map((item) => ({
@@ -81,7 +85,9 @@ const Dashboard = () => {
     "#f44336",
     "#03a9f4",
   ];
-  const roundValue = (val) => Math.round(val).toLocaleString();
+  // 💱 Totals come back converted into the user's currency
+  const roundValue = (val) =>
+    Number(val || 0).toLocaleString(undefined, { style: "currency", currency, maximumFractionDigits: 0 });
 
   if (loading) {
     return (
@@ -116,7 +122,7 @@ const Dashboard = () => {
               <div className="dashboard-info-card">
                 <div className="dashboard-icon">{item.icon}</div>
                 <h6 className="fw-semibold">{item.label}</h6>
-                <h4 className="fw-bold text-gradient">₹{roundValue(item.value || 0)}</h4>
+                <h4 className="fw-bold text-gradient">{roundValue(item.value)}</h4>
               </div>
             </div>
           ))}
@@ -145,7 +151,7 @@ const Dashboard = () => {
                         <Cell key={`cell-${index}`} fill={COLORS[index % COLORS.length]} />
                       ))}
                     </Pie>
-                    <Tooltip formatter={(value) => `₹${roundValue(value)}`} />
+                    <Tooltip formatter={(value) => roundValue(value)} />
                   </PieChart>
                 </ResponsiveContainer>
               </div>
@@ -162,7 +168,7 @@ const Dashboard = () => {
                     <CartesianGrid strokeDasharray="3 3" />
                     <XAxis dataKey="category__name" />
                     <YAxis />
-                    <Tooltip formatter={(value) => `₹${roundValue(value)}`} />
+                    <Tooltip formatter={(value) => roundValue(value)} />
                     <Bar dataKey="total" fill="#00bfff" barSize={45} radius={[8, 8, 0, 0]} />
                   </BarChart>
                 </ResponsiveContainer>
@@ -183,7 +189,7 @@ const Dashboard = () => {
                     <CartesianGrid strokeDasharray="3 3" />
                     <XAxis dataKey="payment_mode" />
                     <YAxis />
-                    <Tooltip formatter={(value) => `₹${roundValue(value)}`} />
+                    <Tooltip formatter={(value) => roundValue(value)} />
                     <Bar dataKey="total_amount" fill="#007bff" barSize={45} radius={[8, 8, 0, 0]} />
                   </BarChart>
                 </ResponsiveContainer>
@@ -201,7 +207,7 @@ const Dashboard = () => {
                     <CartesianGrid strokeDasharray="3 3" />
                     <XAxis dataKey="name" />
                     <YAxis />
-                    <Tooltip formatter={(value) => `₹${roundValue(value)}`} />
+                    <Tooltip formatter={(value) => roundValue(value)} />
                     <Line
                       type="monotone"
                       dataKey="value"
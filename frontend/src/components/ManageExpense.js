@@ -35,6 +35,8 @@ const ManageExpense = () => {
   const [categoryGraphs, setCategoryGraphs] = useState({});
   const [showGraph, setShowGraph] = useState({});
   const [editExpense, setEditExpense] = useState(null);
+  const [query, setQuery] = useState("");
+  const [results, setResults] = useState(null);
   const [formData, setFormData] = useState({
     title: "",
     amount: "",
@@ -51,6 +53,25 @@ const ManageExpense = () => {
     fetchExpenses();
   }, [userId]);
 
+  // 🔍 Server-side search, a moment after the user stops typing
+  useEffect(() => {
+    if (!userId || !query.trim()) {
+      setResults(null);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const res = await axios.get(`http://127.0.0.1:8000/api/search/${userId}/`, {
+          params: { q: query, limit: 20 },
+        });
+        setResults(res.data.expenses || []);
+      } catch (error) {
+        console.error("Error searching expenses:", error);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [userId, query]);
+
   const fetchExpenses = async () => {
     try {
       const res = await axios.get(`http://127.0.0.1:8000/api/getexpense/${userId}/`);
@@ -124,8 +145,16 @@ const ManageExpense = () => {
         
       <h2 className="page-title"><center> Manage Expenses</center></h2>
 
+      <input
+        type="search"
+        className="expense-search"
+        placeholder="Search titles and notes"
+        value={query}
+        onChange={(e) => setQuery(e.target.value)}
+      />
+
       <div className="expense-list full-width">
-        {expenses.map((exp) => (
+        {(results || expenses).map((exp) => (
           <div key={exp.id} className="expense-card full-width-card">
             <div className="expense-info">
               <h4>{exp.title}</h4>
@@ -41,7 +41,8 @@ const Report = () => {
       const response = await fetch(
         `http://127.0.0.1:8000/api/download-expense-report/${userId}/${
           categoryId ? `?category_id=${categoryId}` : ""
-        }`
+        }`,
+        { headers: { Authorization: `Bearer ${localStorage.getItem("token")}` } }
       );
 
       if (!response.ok) throw new Error("Failed to generate report");
@@ -62,6 +63,33 @@ const Report = () => {
     }
   };
 
+  // 📤 CSV / Excel exports stream from the server, so they start right away
+  const handleExport = async (categoryId, format) => {
+    const categoryName =
+      categoryId === null
+        ? "All_Categories"
+        : categories.find((c) => c.id === categoryId)?.name || "Expenses";
+
+    try {
+      const response = await fetch(
+        `http://127.0.0.1:8000/api/export/${userId}/${format}/${
+          categoryId ? `?category_id=${categoryId}` : ""
+        }`,
+        { headers: { Authorization: `Bearer ${localStorage.getItem("token")}` } }
+      );
+      if (!response.ok) throw new Error("Failed to export expenses");
+
+      const blob = await response.blob();
+      const link = document.createElement("a");
+      link.href = window.URL.createObjectURL(blob);
+      link.download = `${categoryName}_Expenses.${format}`;
+      link.click();
+    } catch (error) {
+      console.error(error);
+      toast.error(`❌ Failed to export ${categoryName} expenses.`);
+    }
+  };
+
   return (
     <div className="report-page">
       <ToastContainer position="top-center" autoClose={2000} theme="colored" />
@@ -101,6 +129,14 @@ const Report = () => {
                 </>
               )}
             </button>
+            <div className="export-links">
+              <button className="download-btn" onClick={() => handleExport(cat.id, "csv")}>
+                <Download size={18} /> CSV
+              </button>
+              <button className="download-btn" onClick={() => handleExport(cat.id, "xlsx")}>
+                <Download size={18} /> Excel
+              </button>
+            </div>
           </div>
         ))}
       </div>
@@ -46,6 +46,7 @@ const Login = () => {
         localStorage.setItem("user", JSON.stringify(userData));
         localStorage.setItem("user_id", userId);
         localStorage.setItem("username", username);
+        localStorage.setItem("token", res.data.token);
 
         toast.success("🎉 Login Successful!", {
           position: "top-center",